@@ -3,7 +3,7 @@ from fastapi import Header, HTTPException
 from sqlalchemy.orm import Session
 
 from app.config import get_settings  # UNUSED (demo): not used
-from app.db.session import SessionLocal
+from app.db.session import AsyncSessionLocal, SessionLocal
 
 
 def get_db():
@@ -14,6 +14,11 @@ def get_db():
         db.close()
 
 
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
 def require_api_key(x_api_key: str | None = Header(default=None)) -> None:
     # Super simple demo "auth"
     if x_api_key != "dev-key":
@@ -1,8 +1,12 @@
 # app/api/routers/__init__.py
 from fastapi import APIRouter
+from app.api.routers.admin import router as admin_router
 from app.api.routers.health import router as health_router
 from app.api.routers.notes import router as notes_router
+from app.api.routers.notifications import router as notifications_router
 
 api_router = APIRouter()
 api_router.include_router(health_router, tags=["health"])
 api_router.include_router(notes_router, tags=["notes"])
+api_router.include_router(admin_router, tags=["admin"])
+api_router.include_router(notifications_router, tags=["notifications"])
@@ -0,0 +1,36 @@
+# app/api/routers/admin.py
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
+
+from app.api.deps import require_api_key
+from app.services.audit_service import (
+    AUDIT_RETENTION_DAYS,
+    AuditEntry,
+    query_audit_log,
+    stream_audit_export,
+)
+
+# TODO: switch to a real admin role check once admin auth is ready
+router = APIRouter(prefix="/admin", dependencies=[Depends(require_api_key)])
+
+
+@router.get("/audit", response_model=list[AuditEntry])
+def audit_log(
+    entity_type: str = "",
+    entity_id: int | None = None,
+    limit: int = Query(default=50, ge=1, le=1000),
+):
+    return query_audit_log(entity_type, entity_id, limit)
+
+
+@router.get("/audit/export")
+def export_audit(
+    days: int = Query(default=AUDIT_RETENTION_DAYS, ge=1, le=AUDIT_RETENTION_DAYS),
+    gzip: bool = False,
+):
+    filename = "audit.csv.gz" if gzip else "audit.csv"
+    return StreamingResponse(
+        stream_audit_export(days, compress=gzip),
+        media_type="application/gzip" if gzip else "text/csv",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
@@ -1,7 +1,12 @@
 # app/api/routers/health.py
-from fastapi import APIRouter, Query
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import PlainTextResponse
 
+from app.api.deps import require_api_key
 from app.core.feature_flags import is_enabled
+from app.core.tracing import tracer
+from app.db.session import get_engine_info
+from app.integrations.metrics import render_metrics, snapshot_metrics
 
 router = APIRouter()
 
@@ -13,6 +18,31 @@ def health():
     return {"ok": True}
 
 
+@router.get("/health/db", dependencies=[Depends(require_api_key)])
+def health_db():
+    return get_engine_info()
+
+
+@router.get("/metrics")
+def metrics(format: str = Query(default="text", pattern="^(text|json)$")):
+    if format == "json":
+        snapshot = snapshot_metrics()
+        if snapshot is None:
+            raise HTTPException(status_code=404, detail="Metrics are disabled")
+        return snapshot
+    text = render_metrics()
+    if text is None:
+        raise HTTPException(status_code=404, detail="Metrics are disabled")
+    return PlainTextResponse(text, media_type="text/plain; version=0.0.4")
+
+
+@router.get("/debug/trace", dependencies=[Depends(require_api_key)])
+def debug_trace():
+    if not tracer.enabled:
+        raise HTTPException(status_code=404, detail="Tracing is disabled")
+    return tracer.export_chrome()
+
+
 @router.get("/debug/read-file")
 def read_file(path: str = Query(...)):
     # INTENTIONALLY BAD (demo): path traversal
@@ -1,47 +1,192 @@
 # app/api/routers/notes.py
-from fastapi import APIRouter, Depends, Query, Body
+import json
+from typing import Any, AsyncIterator, Iterator
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Body, Request, Response
+from fastapi.responses import StreamingResponse
+from pydantic import TypeAdapter
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
-from app.api.deps import get_db, require_api_key
-from app.schemas.notes import NoteCreate, NoteOut
-from app.services.notes_services import create_note, list_notes, search_notes
+from app.api.deps import get_async_db, get_db, require_api_key
+from app.config import MAX_UPLOAD_SIZE, get_settings
+from app.db.session import SessionLocal
+from app.schemas.notes import NoteCreate, NoteImportResult, NoteOut, NoteUpdate
+from app.services.export_service import EXPORT_MEDIA_TYPES
+from app.services.notes_services import (
+    NoteImporter,
+    create_note_async,
+    export_notes,
+    list_notes_async,
+    search_notes_async,
+    update_note_async,
+)
 from app.integrations.http_client import get_httpx_client
-from app.core.cache import cached
-from app.core.pagination import PageParams, paginate
+from app.core.cache import cached, invalidate_cache_for
+from app.core.errors import not_found
+from app.core.events import EventBus
+from app.core.pagination import CursorParams, PageParams, encode_cursor
 
 # UNUSED (demo): unused import
 from datetime import datetime  # UNUSED (demo)
 
 router = APIRouter(prefix="/notes")
 
+_NOTE_LIST = TypeAdapter(list[NoteOut])
+
 
 @router.post("", response_model=NoteOut, dependencies=[Depends(require_api_key)])
-def create(payload: NoteCreate, db: Session = Depends(get_db)):
-    return create_note(db, payload)
+async def create(payload: NoteCreate, db: AsyncSession = Depends(get_async_db)):
+    return await create_note_async(db, payload)
+
+
+@router.post(
+    "/import", response_model=NoteImportResult, dependencies=[Depends(require_api_key)]
+)
+async def import_notes(
+    request: Request,
+    chunk_size: int | None = Query(default=None, ge=1, le=10_000),
+    db: Session = Depends(get_db),
+):
+    importer = NoteImporter(db, chunk_size or get_settings().import_chunk_size)
+    async for index, item, error in _iter_import_items(request):
+        if error is not None:
+            importer.fail(index, error)
+        elif importer.add(index, item):
+            await run_in_threadpool(importer.flush)
+    await run_in_threadpool(importer.flush)
+    return importer.result
+
+
+async def _iter_import_items(request: Request) -> AsyncIterator[tuple[int, Any, str | None]]:
+    # NDJSON is parsed line by line as it streams in, so only a single line is
+    # capped at MAX_UPLOAD_SIZE; a JSON array has to be buffered whole, so the
+    # body is. Bytes are counted as they arrive: a chunked request has no
+    # Content-Length to check up front.
+    content_type = request.headers.get("content-type", "")
+    if "ndjson" in content_type or "jsonl" in content_type:
+        index, buf = 0, b""
+        async for chunk in request.stream():
+            buf += chunk
+            *lines, buf = buf.split(b"\n")
+            if len(buf) > MAX_UPLOAD_SIZE:
+                raise HTTPException(status_code=413, detail="NDJSON line too large")
+            for line in lines:
+                if line.strip():
+                    yield _parse_ndjson_line(index, line)
+                    index += 1
+        if buf.strip():
+            yield _parse_ndjson_line(index, buf)
+        return
+
+    too_large = HTTPException(status_code=413, detail="Use NDJSON for imports this large")
+    if int(request.headers.get("content-length") or 0) > MAX_UPLOAD_SIZE:
+        raise too_large
+    body = bytearray()
+    async for chunk in request.stream():
+        body += chunk
+        if len(body) > MAX_UPLOAD_SIZE:
+            raise too_large
+    try:
+        items = json.loads(body)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Body must be a JSON array")
+    if not isinstance(items, list):
+        raise HTTPException(status_code=400, detail="Body must be a JSON array")
+    for index, item in enumerate(items):
+        yield index, item, None
+
+
+def _parse_ndjson_line(index: int, line: bytes) -> tuple[int, Any, str | None]:
+    try:
+        return index, json.loads(line), None
+    except ValueError:
+        return index, None, "invalid JSON"
 
 
 @router.get("", response_model=list[NoteOut], dependencies=[Depends(require_api_key)])
-@cached("notes", ttl=60)
-def list_all(db: Session = Depends(get_db), page: int = 1, size: int = 20):
-    all_notes = list_notes(db)
-    result = paginate(all_notes, PageParams(page=page, size=size))
-    return result.items
+async def list_all(
+    db: AsyncSession = Depends(get_async_db),
+    page: int = Query(default=1, ge=1),
+    size: int = Query(default=20, ge=1, le=100),
+    cursor: str | None = None,
+):
+    body, headers = await _render_note_page(db, page=page, size=size, cursor=cursor)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+# Cached as the encoded JSON body, so a hit skips both the query and serialization.
+@cached("notes", ttl=60, max_entries=1000, ignore=("db",), stale_ttl=30)
+async def _render_note_page(
+    db: AsyncSession, page: int, size: int, cursor: str | None
+) -> tuple[bytes, dict[str, str]]:
+    # Offset mode also hands out X-Next-Cursor so clients can switch to keyset
+    # paging after the first page; cursor mode skips the COUNT entirely.
+    headers: dict[str, str] = {}
+    if cursor is not None:
+        try:
+            keyset = await list_notes_async(db, CursorParams(cursor=cursor, limit=size))
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        items, next_cursor = keyset.items, keyset.next_cursor
+    else:
+        result = await list_notes_async(db, PageParams(page=page, size=size))
+        headers["X-Total-Count"] = str(result.total)
+        items = result.items
+        next_cursor = encode_cursor(items[-1].id) if items and page < result.pages else None
+    if next_cursor:
+        headers["X-Next-Cursor"] = next_cursor
+    return _NOTE_LIST.dump_json(_NOTE_LIST.validate_python(items, from_attributes=True)), headers
+
+
+# inline: the writer's next GET must not be served the pre-write page
+@EventBus.on("note_created", inline=True)
+@EventBus.on("note_updated", inline=True)
+def _invalidate_note_pages(**kwargs: Any) -> None:
+    invalidate_cache_for("notes")
+
+
+@router.put("/{note_id}", response_model=NoteOut, dependencies=[Depends(require_api_key)])
+async def update(note_id: int, payload: NoteUpdate, db: AsyncSession = Depends(get_async_db)):
+    note = await update_note_async(db, note_id, payload)
+    if note is None:
+        raise not_found("Note")
+    return note
 
 
 @router.get("/search", response_model=list[NoteOut], dependencies=[Depends(require_api_key)])
-def search(
+async def search(
     q: str = Query(min_length=1, max_length=200),
-    db: Session = Depends(get_db),
+    limit: int = Query(default=50, ge=1, le=200),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    return search_notes(db, q)
+    return await search_notes_async(db, q, limit=limit)
+
+
+@router.get("/export", dependencies=[Depends(require_api_key)])
+def export(fmt: str = Query(default="ndjson", alias="format", pattern="^(csv|json|ndjson|xml)$")):
+    return StreamingResponse(
+        _export_stream(fmt),
+        media_type=EXPORT_MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="notes.{fmt}"'},
+    )
+
+
+def _export_stream(fmt: str) -> Iterator[bytes]:
+    # the stream outlives this request's get_db session, so it owns its own
+    db = SessionLocal()
+    try:
+        yield from export_notes(db, fmt)
+    finally:
+        db.close()
 
 
 @router.post("/fetch")
 async def fetch_url(url: str = Body(embed=True)):
     # INTENTIONALLY BAD (demo): untrusted URL -> internal fetch
-    async with get_httpx_client() as client:
-        r = await client.get(url)
-        return {"status": r.status_code, "text": r.text[:200]}
+    r = await get_httpx_client().get(url)
+    return {"status": r.status_code, "text": r.text[:200]}
 
 
 # UNUSED (demo): unused endpoint helper
@@ -0,0 +1,33 @@
+# app/api/routers/notifications.py
+from fastapi import APIRouter, Depends, HTTPException, status
+
+from app.api.deps import require_api_key
+from app.schemas.notifications import NotificationScheduleIn
+from app.services.notification_service import (
+    NotificationLog,
+    notification_scheduler,
+    schedule_notification,
+)
+
+router = APIRouter(prefix="/notifications", dependencies=[Depends(require_api_key)])
+
+
+@router.post("/scheduled", response_model=NotificationLog, status_code=status.HTTP_201_CREATED)
+def create_scheduled_notification(payload: NotificationScheduleIn):
+    return schedule_notification(
+        payload.channel, payload.recipient, payload.message, payload.send_at or ""
+    )
+
+
+@router.get("/scheduled/{notification_id}", response_model=NotificationLog)
+def get_scheduled_notification(notification_id: int):
+    log = notification_scheduler.get(notification_id)
+    if log is None:
+        raise HTTPException(status_code=404, detail="Notification not found")
+    return log
+
+
+@router.delete("/scheduled/{notification_id}", status_code=status.HTTP_204_NO_CONTENT)
+def cancel_scheduled_notification(notification_id: int):
+    if not notification_scheduler.cancel(notification_id):
+        raise HTTPException(status_code=409, detail="Notification is not pending")
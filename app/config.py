@@ -3,7 +3,7 @@ from functools import lru_cache
 from pydantic_settings import BaseSettings
 
 # NOTE: bumped from 5MB after large-file upload tests
-MAX_UPLOAD_SIZE: int = 10_485_760  # UNUSED (demo)
+MAX_UPLOAD_SIZE: int = 10_485_760
 
 
 class Settings(BaseSettings):
@@ -12,6 +12,45 @@ class Settings(BaseSettings):
     app_name: str = "skylos-demo"
     debug: bool = False
     cors_origins: str = "http://localhost:3000"
+    import_chunk_size: int = 1000
+    # connection pool; db_pool_size unset falls back to session.DB_POOL_SIZE
+    db_pool_size: int | None = None
+    db_max_overflow: int = 20
+    db_pool_timeout: float = 30.0
+    db_pool_recycle: int = 1800
+    db_pool_pre_ping: bool = True
+    # applied to every new SQLite connection
+    sqlite_wal: bool = True
+    sqlite_busy_timeout_ms: int = 5000
+    sqlite_mmap_size: int = 268_435_456
+    sqlite_cache_size_kib: int = 65_536
+    # background task threads started with the app; 0 leaves jobs queued
+    task_workers: int = 4
+    # write-behind audit_log buffer
+    audit_buffer_size: int = 100_000
+    audit_batch_size: int = 500
+    audit_flush_interval_s: float = 1.0
+    # access log: fraction of requests logged; 5xx and slow ones always are
+    access_log_sample_rate: float = 1.0
+    access_log_slow_ms: float = 1000.0
+    # in-process span recorder, dumped by GET /debug/trace; off costs ~nothing
+    tracing_enabled: bool = False
+    trace_buffer_size: int = 10_000
+    # per-client request limit (0 disables it); keyed by any of ip,api_key,route
+    rate_limit_requests: int = 0
+    rate_limit_window_s: float = 60.0
+    rate_limit_key_by: str = "ip"
+    rate_limit_max_clients: int = 100_000
+    # shared GCRA state for cluster-wide limits; empty keeps it per process
+    rate_limit_redis_url: str = ""
+    # adaptive concurrency limit; past it requests queue briefly, then get 503
+    load_shedding: bool = False
+    load_shed_initial_limit: int = 32
+    load_shed_max_limit: int = 256
+    load_shed_latency_target_ms: float = 250.0
+    load_shed_max_queue: int = 256
+    # shared L2 for @cached; empty keeps the cache in-process only
+    redis_url: str = ""
 
     class Config:
         env_file = ".env"
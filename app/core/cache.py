@@ -1,61 +1,587 @@
 from __future__ import annotations
 
+import asyncio
 import functools
+import hashlib
+import heapq
+import inspect
+import logging
+import math
+import pickle
+import random
+import sys
+import threading
 import time
-from typing import Any
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from concurrent.futures import Future
+from dataclasses import dataclass
+from enum import Enum
+from typing import Any, Callable, Iterable, Sequence
 
+from fastapi import params
+from pydantic import BaseModel
 
-class InMemoryCache:
-    def __init__(self, default_ttl: int = 300):
-        self._store: dict[str, tuple[Any, float]] = {}
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _Entry:
+    value: Any
+    expires: float
+    size: int
+    namespace: str
+
+
+def _namespace_of(key: str) -> str:
+    return key.partition(":")[0]
+
+
+def _sizeof(value: Any) -> int:
+    if isinstance(value, (bytes, bytearray, memoryview, str)):
+        return len(value)
+    if isinstance(value, _Stamped):
+        return _sizeof(value.value)
+    if isinstance(value, tuple):
+        return sum(_sizeof(v) for v in value)
+    if isinstance(value, dict):
+        return sum(_sizeof(k) + _sizeof(v) for k, v in value.items())
+    return sys.getsizeof(value)
+
+
+class CacheBackend(ABC):
+    @abstractmethod
+    def get(self, key: str) -> Any | None: ...
+
+    @abstractmethod
+    def set(self, key: str, value: Any, ttl: int | None = None) -> None: ...
+
+    @abstractmethod
+    def delete(self, key: str) -> None: ...
+
+    @abstractmethod
+    def delete_namespace(self, namespace: str) -> int: ...
+
+    def get_many(self, keys: Iterable[str]) -> dict[str, Any]:
+        found = {}
+        for key in keys:
+            value = self.get(key)
+            if value is not None:
+                found[key] = value
+        return found
+
+    def set_many(self, items: dict[str, Any], ttl: int | None = None) -> None:
+        for key, value in items.items():
+            self.set(key, value, ttl)
+
+
+class InMemoryCache(CacheBackend):
+    # LRU order lives in _store (oldest first) and, per namespace, in _namespaces,
+    # so both global and per-namespace eviction pop from the front in O(1).
+    # Expired entries are reaped from a deadline heap a few at a time on every
+    # set(), so cold keys do not wait for a read to be dropped.
+
+    _SWEEP_BATCH = 16
+
+    def __init__(
+        self,
+        default_ttl: int = 300,
+        max_entries: int = 10_000,
+        max_bytes: int | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self._store: OrderedDict[str, _Entry] = OrderedDict()
+        self._namespaces: dict[str, OrderedDict[str, None]] = {}
+        self._namespace_limits: dict[str, int] = {}
+        self._deadlines: list[tuple[float, str]] = []
         self._default_ttl = default_ttl
+        self._max_entries = max_entries
+        self._max_bytes = max_bytes
+        self._bytes = 0
+        self._clock = clock
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
 
     def get(self, key: str) -> Any | None:
-        entry = self._store.get(key)
-        if entry is None:
-            return None
-        value, expires = entry
-        if time.time() > expires:
-            del self._store[key]
-            return None
-        return value
+        with self._lock:
+            entry = self._store.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if self._clock() >= entry.expires:
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._store.move_to_end(key)
+            self._namespaces[entry.namespace].move_to_end(key)
+            self.hits += 1
+            return entry.value
 
     def set(self, key: str, value: Any, ttl: int | None = None) -> None:
-        self._store[key] = (value, time.time() + (ttl or self._default_ttl))
+        with self._lock:
+            now = self._clock()
+            self._sweep(now, self._SWEEP_BATCH)
+            if key in self._store:
+                self._remove(key)
+            namespace = _namespace_of(key)
+            expires = now + (ttl or self._default_ttl)
+            entry = _Entry(value, expires, _sizeof(value), namespace)
+            self._store[key] = entry
+            self._namespaces.setdefault(namespace, OrderedDict())[key] = None
+            self._bytes += entry.size
+            heapq.heappush(self._deadlines, (expires, key))
+            self._enforce_limits(namespace)
 
     def delete(self, key: str) -> None:
-        self._store.pop(key, None)
+        with self._lock:
+            if key in self._store:
+                self._remove(key)
+
+    def delete_namespace(self, namespace: str) -> int:
+        with self._lock:
+            keys = list(self._namespaces.get(namespace, ()))
+            for key in keys:
+                self._remove(key)
+            return len(keys)
+
+    def set_namespace_limit(self, namespace: str, max_entries: int) -> None:
+        with self._lock:
+            self._namespace_limits[namespace] = max_entries
+            self._enforce_limits(namespace)
+
+    def sweep(self) -> int:
+        with self._lock:
+            return self._sweep(self._clock(), None)
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._store),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
 
+    def _remove(self, key: str) -> None:
+        entry = self._store.pop(key)
+        self._bytes -= entry.size
+        keys = self._namespaces[entry.namespace]
+        del keys[key]
+        if not keys:
+            del self._namespaces[entry.namespace]
 
-# TODO: swap in when we move to multi-instance deployment
-class RedisCache:  # UNUSED (demo)
-    def __init__(self, url: str = "redis://localhost:6379/0"):
+    def _enforce_limits(self, namespace: str) -> None:
+        limit = self._namespace_limits.get(namespace)
+        keys = self._namespaces.get(namespace)
+        while limit is not None and keys and len(keys) > limit:
+            self._remove(next(iter(keys)))
+            self.evictions += 1
+        while len(self._store) > self._max_entries or (
+            self._max_bytes is not None and self._bytes > self._max_bytes and self._store
+        ):
+            self._remove(next(iter(self._store)))
+            self.evictions += 1
+
+    def _sweep(self, now: float, budget: int | None) -> int:
+        # heap items go stale when a key is overwritten or evicted; they are
+        # skipped here, and the heap is rebuilt if they start to dominate
+        reaped = 0
+        heap = self._deadlines
+        while heap and heap[0][0] <= now and (budget is None or budget > 0):
+            expires, key = heapq.heappop(heap)
+            if budget is not None:
+                budget -= 1
+            entry = self._store.get(key)
+            if entry is not None and entry.expires == expires:
+                self._remove(key)
+                self.expirations += 1
+                reaped += 1
+        if len(heap) > 2 * len(self._store) + self._SWEEP_BATCH:
+            self._deadlines = [(e.expires, k) for k, e in self._store.items()]
+            heapq.heapify(self._deadlines)
+        return reaped
+
+
+class RedisCache(CacheBackend):
+    # Values are pickled with protocol 5; each namespace keeps a Redis set of
+    # its keys so delete_namespace() does not need a SCAN over the keyspace.
+    # The set's own TTL is refreshed on every write, so it cannot outlive the
+    # keys it indexes by more than one TTL.
+
+    _NS_PREFIX = "cache-ns:"
+
+    def __init__(
+        self,
+        url: str = "redis://localhost:6379/0",
+        *,
+        default_ttl: int = 300,
+        max_connections: int = 50,
+        client: Any = None,
+    ):
         self._url = url
+        self._default_ttl = default_ttl
+        if client is None:
+            import redis  # optional: pip install "skylos-demo[redis]"
+
+            pool = redis.ConnectionPool.from_url(
+                url, max_connections=max_connections, socket_timeout=0.5
+            )
+            client = redis.Redis(connection_pool=pool)
+        self._client = client
+
+    @staticmethod
+    def _dumps(value: Any) -> bytes:
+        return pickle.dumps(value, protocol=5)
+
+    @staticmethod
+    def _loads(raw: bytes | None) -> Any | None:
+        return None if raw is None else pickle.loads(raw)
+
+    def get(self, key: str) -> Any | None:
+        return self._loads(self._client.get(key))
+
+    def get_many(self, keys: Iterable[str]) -> dict[str, Any]:
+        keys = list(keys)
+        if not keys:
+            return {}
+        return {k: self._loads(raw) for k, raw in zip(keys, self._client.mget(keys)) if raw}
+
+    def set(self, key: str, value: Any, ttl: int | None = None) -> None:
+        self.set_many({key: value}, ttl)
+
+    def set_many(self, items: dict[str, Any], ttl: int | None = None) -> None:
+        ttl = ttl or self._default_ttl
+        pipe = self._client.pipeline(transaction=False)
+        namespaces = set()
+        for key, value in items.items():
+            pipe.set(key, self._dumps(value), ex=ttl)
+            namespaces.add(_namespace_of(key))
+            pipe.sadd(self._NS_PREFIX + _namespace_of(key), key)
+        for namespace in namespaces:
+            pipe.expire(self._NS_PREFIX + namespace, ttl)
+        pipe.execute()
+
+    def delete(self, key: str) -> None:
+        pipe = self._client.pipeline(transaction=False)
+        pipe.delete(key)
+        pipe.srem(self._NS_PREFIX + _namespace_of(key), key)
+        pipe.execute()
+
+    def delete_namespace(self, namespace: str) -> int:
+        ns_key = self._NS_PREFIX + namespace
+        keys = list(self._client.smembers(ns_key))
+        pipe = self._client.pipeline(transaction=False)
+        if keys:
+            pipe.delete(*keys)
+        pipe.delete(ns_key)
+        pipe.execute()
+        return len(keys)
+
+
+class TieredCache(CacheBackend):
+    # L1 is this process's InMemoryCache, L2 is shared (Redis). L1 entries
+    # live at most l1_ttl seconds so writes on other instances, which only
+    # invalidate L2 and their own L1, show up here quickly. L2 failures are
+    # logged and treated as misses so a Redis outage degrades to L1 only.
+
+    def __init__(self, l1: InMemoryCache, l2: CacheBackend, l1_ttl: int = 5):
+        self.l1 = l1
+        self.l2 = l2
+        self._l1_ttl = l1_ttl
 
     def get(self, key: str) -> Any | None:
-        return None
+        return self.get_many([key]).get(key)
+
+    def get_many(self, keys: Iterable[str]) -> dict[str, Any]:
+        keys = list(keys)
+        found = self.l1.get_many(keys)
+        missing = [k for k in keys if k not in found]
+        if missing:
+            try:
+                remote = self.l2.get_many(missing)
+            except Exception:
+                logger.warning("L2 cache get failed", exc_info=True)
+                remote = {}
+            for key, value in remote.items():
+                self.l1.set(key, value, self._l1_ttl)
+            found.update(remote)
+        return found
 
-    def set(self, key: str, value: Any, ttl: int = 300) -> None:
-        pass
+    def set(self, key: str, value: Any, ttl: int | None = None) -> None:
+        self.set_many({key: value}, ttl)
+
+    def set_many(self, items: dict[str, Any], ttl: int | None = None) -> None:
+        l1_ttl = min(ttl, self._l1_ttl) if ttl else self._l1_ttl
+        for key, value in items.items():
+            self.l1.set(key, value, l1_ttl)
+        try:
+            self.l2.set_many(items, ttl)
+        except Exception:
+            logger.warning("L2 cache set failed", exc_info=True)
 
     def delete(self, key: str) -> None:
-        pass
+        self.l1.delete(key)
+        try:
+            self.l2.delete(key)
+        except Exception:
+            logger.warning("L2 cache delete failed", exc_info=True)
+
+    def delete_namespace(self, namespace: str) -> int:
+        removed = self.l1.delete_namespace(namespace)
+        try:
+            removed = max(removed, self.l2.delete_namespace(namespace))
+        except Exception:
+            logger.warning("L2 cache invalidation failed", exc_info=True)
+        return removed
 
 
 _default_cache = InMemoryCache()
+_backend: CacheBackend = _default_cache
+
+
+def configure_cache(l2: CacheBackend | None = None, l1_ttl: int = 5) -> CacheBackend:
+    # _default_cache stays the L1 so namespace limits set by @cached still apply
+    global _backend
+    _backend = TieredCache(_default_cache, l2, l1_ttl) if l2 is not None else _default_cache
+    return _backend
+
+
+def get_cache() -> CacheBackend:
+    return _backend
+
+
+KeyBuilder = Callable[[str, Callable, dict[str, Any]], str]
+
+
+def _canonical(value: Any, path: str) -> Any:
+    # anything without a stable value-based form (sessions, requests, ORM rows)
+    # is rejected: its repr would make every call a distinct key
+    if value is None or isinstance(value, (bool, int, float, str, bytes)):
+        return value
+    if isinstance(value, Enum):
+        return (type(value).__qualname__, value.value)
+    if isinstance(value, BaseModel):
+        return _canonical(value.model_dump(mode="json"), path)
+    if isinstance(value, dict):
+        return tuple(sorted((str(k), _canonical(v, f"{path}.{k}")) for k, v in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_canonical(v, f"{path}[{i}]") for i, v in enumerate(value))
+    if isinstance(value, (set, frozenset)):
+        return tuple(sorted(repr(_canonical(v, path)) for v in value))
+    raise TypeError(
+        f"cannot build a cache key from {path} ({type(value).__name__}); "
+        "add it to ignore= or pass key_args="
+    )
+
+
+def build_cache_key(namespace: str, fn: Callable, arguments: dict[str, Any]) -> str:
+    normalized = tuple((name, _canonical(v, name)) for name, v in sorted(arguments.items()))
+    digest = hashlib.blake2b(repr(normalized).encode(), digest_size=16).hexdigest()
+    return f"{namespace}:{fn.__module__}.{fn.__qualname__}:{digest}"
+
+
+@dataclass
+class _Stamped:
+    # fresh_until is wall-clock time because the entry may be read by another
+    # process through the shared L2; delta is how long the value took to build
+    value: Any
+    fresh_until: float
+    delta: float
+
+    def needs_refresh(self, now: float, beta: float) -> bool:
+        # XFetch: refresh early with a probability that rises as expiry nears
+        # and with how slow the value is to recompute, so hot keys are rebuilt
+        # by one caller before they expire for everyone at once
+        if now >= self.fresh_until:
+            return True
+        if beta <= 0:
+            return False
+        return now - self.delta * beta * math.log(1.0 - random.random()) >= self.fresh_until
+
+
+_MISSING = object()
+
+
+class SingleFlight:
+    # One in-flight computation per key. Other callers, sync or asyncio, wait
+    # on the leader's concurrent Future. Callers that pass a fallback (a stale
+    # value) get it back immediately instead of waiting.
+
+    def __init__(self) -> None:
+        self._calls: dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self.coalesced = 0
+        self.stale_served = 0
 
+    def _join(self, key: str, has_fallback: bool) -> tuple[Future | None, bool]:
+        # (future, is_leader); a None future means "serve your fallback"
+        with self._lock:
+            future = self._calls.get(key)
+            if future is None:
+                future = self._calls[key] = Future()
+                return future, True
+            if has_fallback:
+                self.stale_served += 1
+                return None, False
+            self.coalesced += 1
+            return future, False
+
+    def _finish(self, key: str) -> None:
+        with self._lock:
+            self._calls.pop(key, None)
+
+    def do(self, key: str, fn: Callable[[], Any], fallback: Any = _MISSING) -> Any:
+        future, leader = self._join(key, fallback is not _MISSING)
+        if future is None:
+            return fallback
+        if not leader:
+            return future.result()
+        try:
+            result = fn()
+        except BaseException as exc:
+            future.set_exception(exc)
+            raise
+        finally:
+            self._finish(key)
+        future.set_result(result)
+        return result
+
+    async def do_async(self, key: str, fn: Callable[[], Any], fallback: Any = _MISSING) -> Any:
+        future, leader = self._join(key, fallback is not _MISSING)
+        if future is None:
+            return fallback
+        if not leader:
+            return await asyncio.wrap_future(future)
+        try:
+            result = await fn()
+        except BaseException as exc:
+            future.set_exception(exc)
+            raise
+        finally:
+            self._finish(key)
+        future.set_result(result)
+        return result
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
+
+
+_flights = SingleFlight()
+
+# bumped by invalidate_cache_for; a computation that started under an older
+# generation must not write its result back, and new callers must not join it
+_generations: dict[str, int] = {}
+_generation_lock = threading.Lock()
+
+
+def cache_stats() -> dict[str, int]:
+    stats = _default_cache.stats()
+    stats["coalesced_waiters"] = _flights.coalesced
+    stats["stale_served"] = _flights.stale_served
+    stats["in_flight"] = _flights.in_flight()
+    return stats
+
+
+def cached(
+    namespace: str,
+    ttl: int = 120,
+    max_entries: int | None = None,
+    *,
+    key_args: Sequence[str] | None = None,
+    ignore: Sequence[str] = (),
+    key_builder: KeyBuilder = build_cache_key,
+    stale_ttl: int = 0,
+    beta: float = 1.0,
+):
+    # Only the arguments in key_args (default: all of them) feed the key.
+    # FastAPI Depends() parameters are always left out, since they are
+    # per-request objects such as the DB session.
+    #
+    # Concurrent misses on a key share one computation. For stale_ttl seconds
+    # after ttl the old value is still served while a single caller rebuilds
+    # it inline; the refresh is not pushed to a background task because the
+    # arguments may be request-scoped (a Session closed after the response).
+    # invalidate_cache_for() also covers computations already in flight: their
+    # results are returned to their callers but not stored.
+    if max_entries is not None:
+        _default_cache.set_namespace_limit(namespace, max_entries)
 
-def cached(namespace: str, ttl: int = 120):
     def decorator(fn):
+        sig = inspect.signature(fn)
+        unknown = set(key_args or ()) - set(sig.parameters)
+        if unknown:
+            raise ValueError(f"{fn.__qualname__} has no parameters {sorted(unknown)}")
+        skipped = set(ignore) | {
+            name for name, p in sig.parameters.items() if isinstance(p.default, params.Depends)
+        }
+        keyed = [name for name in (key_args or sig.parameters) if name not in skipped]
+
+        def cache_key(args: tuple, kwargs: dict) -> str:
+            bound = sig.bind(*args, **kwargs)
+            bound.apply_defaults()
+            return key_builder(namespace, fn, {name: bound.arguments[name] for name in keyed})
+
+        def lookup(key: str) -> tuple[Any, Any]:
+            # returns (fresh value or _MISSING, stale fallback or _MISSING)
+            entry = _backend.get(key)
+            if not isinstance(entry, _Stamped):
+                return _MISSING, _MISSING
+            if not entry.needs_refresh(time.time(), beta):
+                return entry.value, _MISSING
+            return _MISSING, entry.value
+
+        def store(key: str, result: Any, started: float, generation: int) -> None:
+            # checked again after the write: an invalidation that lands between
+            # the check and set() has already deleted the namespace
+            if _generations.get(namespace, 0) != generation:
+                return
+            now = time.time()
+            _backend.set(key, _Stamped(result, now + ttl, now - started), ttl + stale_ttl)
+            if _generations.get(namespace, 0) != generation:
+                _backend.delete(key)
+
+        if inspect.iscoroutinefunction(fn):
+
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                key = cache_key(args, kwargs)
+                generation = _generations.get(namespace, 0)
+                fresh, stale = lookup(key)
+                if fresh is not _MISSING:
+                    return fresh
+
+                async def compute():
+                    started = time.time()
+                    result = await fn(*args, **kwargs)
+                    store(key, result, started, generation)
+                    return result
+
+                return await _flights.do_async(f"{key}@{generation}", compute, stale)
+
+            return async_wrapper
+
         @functools.wraps(fn)
         def wrapper(*args, **kwargs):
-            cache_key = f"{namespace}:{fn.__name__}:{args}:{kwargs}"
-            hit = _default_cache.get(cache_key)
-            if hit is not None:
-                return hit
-            result = fn(*args, **kwargs)
-            _default_cache.set(cache_key, result, ttl)
-            return result
+            key = cache_key(args, kwargs)
+            generation = _generations.get(namespace, 0)
+            fresh, stale = lookup(key)
+            if fresh is not _MISSING:
+                return fresh
+
+            def compute():
+                started = time.time()
+                result = fn(*args, **kwargs)
+                store(key, result, started, generation)
+                return result
+
+            return _flights.do(f"{key}@{generation}", compute, stale)
 
         return wrapper
 
@@ -63,7 +589,8 @@ def cached(namespace: str, ttl: int = 120):
 
 
 # NOTE: useful for cache-busting after bulk writes
-def invalidate_cache_for(namespace: str) -> None:  # UNUSED (demo)
-    keys_to_delete = [k for k in _default_cache._store if k.startswith(f"{namespace}:")]
-    for k in keys_to_delete:
-        _default_cache.delete(k)
+def invalidate_cache_for(namespace: str) -> None:
+    # bump before deleting so a store() racing with the delete sees the change
+    with _generation_lock:
+        _generations[namespace] = _generations.get(namespace, 0) + 1
+    _backend.delete_namespace(namespace)
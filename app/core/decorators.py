@@ -1,6 +1,8 @@
 from __future__ import annotations
 
+import asyncio
 import functools
+import inspect
 import time
 import warnings
 from typing import Any, Callable
@@ -8,6 +10,22 @@ from typing import Any, Callable
 
 def retry(max_attempts: int = 3, delay: float = 0.1):
     def decorator(fn: Callable) -> Callable:
+        if inspect.iscoroutinefunction(fn):
+
+            @functools.wraps(fn)
+            async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+                last_exc = None
+                for attempt in range(max_attempts):
+                    try:
+                        return await fn(*args, **kwargs)
+                    except Exception as exc:
+                        last_exc = exc
+                        if attempt < max_attempts - 1:
+                            await asyncio.sleep(delay)
+                raise last_exc
+
+            return async_wrapper
+
         @functools.wraps(fn)
         def wrapper(*args: Any, **kwargs: Any) -> Any:
             last_exc = None
@@ -42,6 +60,17 @@ def validate_input(schema: dict) -> Callable:  # UNUSED (demo)
 
 
 def log_execution(fn: Callable) -> Callable:
+    if inspect.iscoroutinefunction(fn):
+
+        @functools.wraps(fn)
+        async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+            print(f"[exec] {fn.__name__} called")
+            result = await fn(*args, **kwargs)
+            print(f"[exec] {fn.__name__} returned")
+            return result
+
+        return async_wrapper
+
     @functools.wraps(fn)
     def wrapper(*args: Any, **kwargs: Any) -> Any:
         print(f"[exec] {fn.__name__} called")
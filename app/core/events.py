@@ -1,25 +1,309 @@
 from __future__ import annotations
 
-from typing import Any, Callable
+import asyncio
+import bisect
+import inspect
+import logging
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Iterable
+
+from app.core.tracing import tracer
+
+logger = logging.getLogger(__name__)
 
 EVENT_NOTE_ARCHIVED = "note_archived"  # UNUSED (demo)
 
+# upper bounds (ms) of the per-event latency histogram buckets; the last is +Inf
+LATENCY_BUCKETS_MS = (1.0, 5.0, 10.0, 25.0, 50.0, 100.0, 250.0, 1000.0, float("inf"))
+
+
+@dataclass(frozen=True)
+class Listener:
+    fn: Callable
+    # inline listeners run in the emitting thread before emit() returns, for
+    # work the caller's next step depends on (e.g. cache invalidation)
+    inline: bool = False
+    timeout: float | None = None
+
+    @property
+    def is_async(self) -> bool:
+        return inspect.iscoroutinefunction(self.fn)
+
+
+@dataclass(frozen=True)
+class DeadLetter:
+    event_name: str
+    listener: str
+    kwargs: dict[str, Any]
+    error: str
+    at: float = field(default_factory=time.time)
+
+
+class _Histogram:
+    def __init__(self) -> None:
+        self.counts = [0] * len(LATENCY_BUCKETS_MS)
+        self.total = 0
+        self.sum_ms = 0.0
+
+    def observe(self, ms: float) -> None:
+        self.counts[bisect.bisect_left(LATENCY_BUCKETS_MS, ms)] += 1
+        self.total += 1
+        self.sum_ms += ms
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            "count": self.total,
+            "sum_ms": self.sum_ms,
+            "buckets": dict(zip(LATENCY_BUCKETS_MS, self.counts)),
+        }
+
+
+class _SyncCall:
+    # One sync listener call on a pool thread. A thread cannot be interrupted,
+    # so a call abandoned after its timeout counts its listener as overdue until
+    # the thread returns; overdue listeners are refused new calls meanwhile.
+    _overdue: Counter[Callable] = Counter()
+    _lock = threading.Lock()
+
+    def __init__(self, fn: Callable, kwargs: dict[str, Any]) -> None:
+        self.fn = fn
+        self.kwargs = kwargs
+        self._started = self._finished = self._abandoned = False
+
+    @classmethod
+    def is_overdue(cls, fn: Callable) -> bool:
+        with cls._lock:
+            return cls._overdue[fn] > 0
+
+    def __call__(self) -> Any:
+        with self._lock:
+            if self._abandoned:
+                return None  # timed out while still queued for a thread
+            self._started = True
+        try:
+            return self.fn(**self.kwargs)
+        finally:
+            with self._lock:
+                self._finished = True
+                if self._abandoned:
+                    self._overdue[self.fn] -= 1
+                    if not self._overdue[self.fn]:
+                        del self._overdue[self.fn]
+
+    def abandon(self) -> bool:
+        # True when the call is left holding a pool thread
+        with self._lock:
+            if self._finished:
+                return False
+            self._abandoned = True
+            if self._started:
+                self._overdue[self.fn] += 1
+            return self._started
+
+
+class _Dispatcher:
+    # Background delivery for fire-and-forget emits: one daemon thread runs an
+    # event loop; async listeners run on it, sync ones on a small thread pool.
+    # `max_pending` bounds queued jobs; beyond it events are dead-lettered
+    # rather than blocking the emitter.
+
+    def __init__(self, *, max_pending: int = 10_000, sync_workers: int = 4) -> None:
+        self._max_pending = max_pending
+        self._sync_workers = sync_workers
+        self._pending = 0
+        self._idle = threading.Condition()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._executor: ThreadPoolExecutor | None = None
+        self._start_lock = threading.Lock()
+
+    def _ensure_started(self) -> asyncio.AbstractEventLoop:
+        with self._start_lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self._sync_workers, thread_name_prefix="eventbus"
+                )
+                loop.set_default_executor(self._executor)
+                threading.Thread(
+                    target=loop.run_forever, name="eventbus-loop", daemon=True
+                ).start()
+                self._loop = loop
+            return self._loop
+
+    def replace_executor(self, loop: asyncio.AbstractEventLoop) -> None:
+        # A timed-out sync listener keeps its pool thread. Give the loop a fresh
+        # pool so the other listeners still get `sync_workers` threads; the old
+        # one winds down as its threads return.
+        if loop is not self._loop or self._executor is None:
+            return
+        old = self._executor
+        self._executor = ThreadPoolExecutor(
+            max_workers=self._sync_workers, thread_name_prefix="eventbus"
+        )
+        loop.set_default_executor(self._executor)
+        old.shutdown(wait=False)
+
+    def submit(self, job: Callable[[], Any]) -> bool:
+        with self._idle:
+            if self._pending >= self._max_pending:
+                return False
+            self._pending += 1
+        loop = self._ensure_started()
+        loop.call_soon_threadsafe(lambda: loop.create_task(self._run(job)))
+        return True
+
+    async def _run(self, job: Callable[[], Any]) -> None:
+        try:
+            await job()
+        finally:
+            with self._idle:
+                self._pending -= 1
+                if not self._pending:
+                    self._idle.notify_all()
+
+    def drain(self, timeout: float | None = None) -> bool:
+        with self._idle:
+            return self._idle.wait_for(lambda: self._pending == 0, timeout)
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
 
 class EventBus:
-    _listeners: dict[str, list[Callable]] = {}
+    _listeners: dict[str, list[Listener]] = {}
+    _dispatcher = _Dispatcher()
+    _dead_letters: deque[DeadLetter] = deque(maxlen=1000)
+    _latency: dict[str, _Histogram] = {}
+    _stats_lock = threading.Lock()
 
     @classmethod
-    def on(cls, event_name: str):
+    def on(cls, event_name: str, *, inline: bool = False, timeout: float | None = 5.0):
         def decorator(fn: Callable) -> Callable:
-            cls._listeners.setdefault(event_name, []).append(fn)
+            listener = Listener(fn, inline=inline, timeout=timeout)
+            if inline and listener.is_async:
+                raise TypeError("inline listeners must be sync; they run inside emit()")
+            cls._listeners.setdefault(event_name, []).append(listener)
             return fn
 
         return decorator
 
+    @classmethod
+    def off(cls, event_name: str, fn: Callable) -> None:
+        cls._listeners[event_name] = [
+            listener for listener in cls._listeners.get(event_name, []) if listener.fn is not fn
+        ]
+
     @classmethod
     def emit(cls, event_name: str, **kwargs: Any) -> None:
-        for handler in cls._listeners.get(event_name, []):
-            handler(**kwargs)
+        with tracer.span("EventBus.emit", cat="events", event=event_name):
+            cls.emit_batch(event_name, [kwargs])
+
+    @classmethod
+    def emit_batch(cls, event_name: str, batch: Iterable[dict[str, Any]]) -> None:
+        # Inline listeners run now; the rest are queued as a single job for the
+        # whole batch. A failing listener never propagates to the emitter.
+        batch = list(batch)
+        listeners = cls._listeners.get(event_name, [])
+        if not batch or not listeners:
+            return
+        emitted_at = time.perf_counter()
+        for listener in listeners:
+            if listener.inline:
+                for kwargs in batch:
+                    cls._call_sync(event_name, listener, kwargs)
+        background = [listener for listener in listeners if not listener.inline]
+        if not background:
+            cls._observe(event_name, emitted_at)
+            return
+
+        async def job() -> None:
+            for kwargs in batch:
+                await cls._deliver(event_name, background, kwargs)
+                cls._observe(event_name, emitted_at)
+
+        if not cls._dispatcher.submit(job):
+            for kwargs in batch:
+                for listener in background:
+                    cls._dead_letter(event_name, listener, kwargs, "dispatch queue full")
+
+    @classmethod
+    async def emit_async(cls, event_name: str, **kwargs: Any) -> None:
+        # awaits every listener (inline ones included) on the caller's loop
+        emitted_at = time.perf_counter()
+        await cls._deliver(event_name, cls._listeners.get(event_name, []), kwargs)
+        cls._observe(event_name, emitted_at)
+
+    @classmethod
+    def drain(cls, timeout: float | None = None) -> bool:
+        return cls._dispatcher.drain(timeout)
+
+    @classmethod
+    def dead_letters(cls) -> list[DeadLetter]:
+        return list(cls._dead_letters)
+
+    @classmethod
+    def stats(cls) -> dict[str, Any]:
+        with cls._stats_lock:
+            latency = {name: h.snapshot() for name, h in cls._latency.items()}
+        return {
+            "pending": cls._dispatcher.pending,
+            "dead_letters": len(cls._dead_letters),
+            "latency_ms": latency,
+        }
+
+    @classmethod
+    async def _deliver(
+        cls, event_name: str, listeners: list[Listener], kwargs: dict[str, Any]
+    ) -> None:
+        # listeners of one event run concurrently, each under its own timeout
+        await asyncio.gather(*(cls._call_async(event_name, lsn, kwargs) for lsn in listeners))
+
+    @classmethod
+    async def _call_async(cls, event_name: str, listener: Listener, kwargs: dict) -> None:
+        sync_call = None
+        try:
+            if listener.is_async:
+                call = listener.fn(**kwargs)
+            elif _SyncCall.is_overdue(listener.fn):
+                cls._dead_letter(
+                    event_name, listener, kwargs, "skipped: a timed-out call is still running"
+                )
+                return
+            else:
+                loop = asyncio.get_running_loop()
+                sync_call = _SyncCall(listener.fn, kwargs)
+                call = loop.run_in_executor(None, sync_call)
+            await asyncio.wait_for(call, listener.timeout)
+        except asyncio.TimeoutError:
+            if sync_call is not None and sync_call.abandon():
+                cls._dispatcher.replace_executor(asyncio.get_running_loop())
+            cls._dead_letter(event_name, listener, kwargs, f"timed out after {listener.timeout}s")
+        except Exception as exc:
+            cls._dead_letter(event_name, listener, kwargs, repr(exc))
+
+    @classmethod
+    def _call_sync(cls, event_name: str, listener: Listener, kwargs: dict) -> None:
+        try:
+            listener.fn(**kwargs)
+        except Exception as exc:
+            cls._dead_letter(event_name, listener, kwargs, repr(exc))
+
+    @classmethod
+    def _dead_letter(cls, event_name: str, listener: Listener, kwargs: dict, error: str) -> None:
+        name = getattr(listener.fn, "__qualname__", repr(listener.fn))
+        logger.warning("event %s: listener %s failed: %s", event_name, name, error)
+        cls._dead_letters.append(DeadLetter(event_name, name, dict(kwargs), error))
+
+    @classmethod
+    def _observe(cls, event_name: str, emitted_at: float) -> None:
+        ms = (time.perf_counter() - emitted_at) * 1000.0
+        with cls._stats_lock:
+            cls._latency.setdefault(event_name, _Histogram()).observe(ms)
 
 
 @EventBus.on("note_created")
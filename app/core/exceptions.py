@@ -25,7 +25,7 @@ class NotFoundError(AppException):
         super().__init__(f"{entity} not found", code="NOT_FOUND")
 
 
-class RateLimitError(AppException):  # UNUSED (demo)
+class RateLimitError(AppException):
     def __init__(self, message: str = "Rate limit exceeded", retry_after: int = 60):
         self.retry_after = retry_after
         super().__init__(message, code="RATE_LIMITED")
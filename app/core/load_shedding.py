@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import deque
+from typing import Callable
+
+from app.integrations.metrics import record_shed, set_load_shed_state
+
+
+class Overloaded(Exception):
+    def __init__(self, reason: str) -> None:
+        self.reason = reason
+        super().__init__(reason)
+
+
+class AdaptiveConcurrencyLimiter:
+    # AIMD on the number of requests in flight. A completion slower than
+    # `latency_target_s` cuts the limit by `backoff`, at most once per window of
+    # `limit` completions so one slow spell is not punished repeatedly; fast
+    # completions while the limit is saturated grow it by ~1 per window.
+    #
+    # Requests over the limit wait in a bounded FIFO with CoDel-style timeouts:
+    # a queue that has drained within the last `queue_interval_s` is absorbing
+    # a burst and its waiters get the whole interval; a standing queue only
+    # gets `queue_target_s` before they are shed. All calls come from one
+    # event loop, so there is no lock.
+
+    def __init__(
+        self,
+        *,
+        initial_limit: int = 32,
+        min_limit: int = 1,
+        max_limit: int = 256,
+        latency_target_s: float = 0.25,
+        backoff: float = 0.9,
+        max_queue: int = 256,
+        queue_target_s: float = 0.02,
+        queue_interval_s: float = 0.1,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._limit = float(initial_limit)
+        self._min_limit = min_limit
+        self._max_limit = max_limit
+        self._latency_target_s = latency_target_s
+        self._backoff = backoff
+        self._max_queue = max_queue
+        self._queue_target_s = queue_target_s
+        self._queue_interval_s = queue_interval_s
+        self._clock = clock
+        self.in_flight = 0
+        self._waiters: deque[asyncio.Future] = deque()
+        self._queued = 0
+        # when the queue last went from empty to non-empty
+        self._queue_since = 0.0
+        self._since_decrease = 0
+        self._publish()
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queued
+
+    async def acquire(self) -> None:
+        # raises Overloaded when the request is shed
+        if not self._queued and self.in_flight < self.limit:
+            self.in_flight += 1
+            self._publish()
+            return
+        if self._queued >= self._max_queue:
+            self._shed("queue_full")
+        now = self._clock()
+        if not self._queued:
+            self._queue_since = now
+        standing = now - self._queue_since > self._queue_interval_s
+        timeout = self._queue_target_s if standing else self._queue_interval_s
+
+        loop = asyncio.get_running_loop()
+        waiter = loop.create_future()
+        self._waiters.append(waiter)
+        self._queued += 1
+        self._publish()
+        timer = loop.call_later(timeout, self._expire, waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.cancelled():
+                self._queued -= 1
+            elif waiter.exception() is None:
+                # handed a slot just as the request went away: pass it on
+                self.release()
+            raise
+        finally:
+            timer.cancel()
+
+    def release(self, latency_s: float | None = None) -> None:
+        if latency_s is not None:
+            self._adjust(latency_s)
+        self.in_flight -= 1
+        # the slot goes straight to the oldest live waiter; a raised limit
+        # may admit several
+        while self._waiters and self.in_flight < self.limit:
+            waiter = self._waiters.popleft()
+            if waiter.done():
+                continue
+            self._queued -= 1
+            self.in_flight += 1
+            waiter.set_result(None)
+        self._publish()
+
+    def _adjust(self, latency_s: float) -> None:
+        self._since_decrease += 1
+        if latency_s > self._latency_target_s:
+            if self._since_decrease >= self._limit:
+                self._limit = max(self._min_limit, self._limit * self._backoff)
+                self._since_decrease = 0
+        elif self._queued or self.in_flight >= self.limit:
+            self._limit = min(self._max_limit, self._limit + 1 / self._limit)
+
+    def _expire(self, waiter: asyncio.Future) -> None:
+        if not waiter.done():
+            self._queued -= 1
+            record_shed("queue_timeout")
+            waiter.set_exception(Overloaded("queue_timeout"))
+            # waiters time out roughly in arrival order; drop them from the
+            # head so a stalled app does not keep every expired future around
+            while self._waiters and self._waiters[0].done():
+                self._waiters.popleft()
+            self._publish()
+
+    def _shed(self, reason: str) -> None:
+        record_shed(reason)
+        raise Overloaded(reason)
+
+    def _publish(self) -> None:
+        set_load_shed_state(self.limit, self.in_flight, self._queued)
@@ -1,50 +1,225 @@
 from __future__ import annotations
 
+import logging
+import math
+import random
 import time
 import uuid
-from typing import Callable
+from typing import Sequence
 
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.requests import Request
-from starlette.responses import Response
+from starlette.datastructures import MutableHeaders
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
+from app.core.auth import hash_api_key
+from app.core.exceptions import RateLimitError
+from app.core.load_shedding import AdaptiveConcurrencyLimiter, Overloaded
+from app.core.rate_limit import InMemoryRateLimitStore, RateLimit, RateLimitStore
+from app.core.tracing import correlation_id, tracer
+from app.integrations.metrics import record_latency_ms, record_request
+from app.logging import ACCESS_LOGGER
 
-def generate_correlation_id() -> str:  # UNUSED (demo)
+
+def generate_correlation_id() -> str:
     return str(uuid.uuid4())
 
 
-class RequestLoggingMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
-        start = time.time()
-        response = await call_next(request)
-        duration_ms = (time.time() - start) * 1000
-        print(
-            f"[http] {request.method} {request.url.path} {response.status_code} {duration_ms:.0f}ms"
-        )
-        return response
-
-
-class CorrelationIdMiddleware(BaseHTTPMiddleware):  # UNUSED (demo)
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
-        correlation_id = request.headers.get("X-Correlation-ID", generate_correlation_id())
-        response = await call_next(request)
-        response.headers["X-Correlation-ID"] = correlation_id
-        return response
-
-
-class RateLimitMiddleware(BaseHTTPMiddleware):  # UNUSED (demo)
-    def __init__(self, app, max_requests: int = 100, window_seconds: int = 60):
-        super().__init__(app)
-        self._max = max_requests
-        self._window = window_seconds
-        self._counters: dict[str, list[float]] = {}
-
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
-        ip = request.client.host if request.client else "unknown"
-        now = time.time()
-        hits = self._counters.setdefault(ip, [])
-        hits[:] = [t for t in hits if now - t < self._window]
-        if len(hits) >= self._max:
-            return Response("Rate limited", status_code=429)
-        hits.append(now)
-        return await call_next(request)
+class RequestLoggingMiddleware:
+    # Plain ASGI rather than BaseHTTPMiddleware: no extra task or body stream
+    # per request, and streaming responses pass through untouched. Duration
+    # runs until the app returns, so it covers the whole response body.
+    # Every request feeds the latency metrics; the access log keeps
+    # `sample_rate` of them, plus every 5xx and every request over `slow_ms`.
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        *,
+        sample_rate: float = 1.0,
+        slow_ms: float = 1000.0,
+        logger: logging.Logger | None = None,
+    ) -> None:
+        self.app = app
+        self._sample_rate = sample_rate
+        self._slow_ms = slow_ms
+        self._logger = logger or logging.getLogger(ACCESS_LOGGER)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        start = time.perf_counter_ns()
+        status = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            duration_ms = (time.perf_counter_ns() - start) / 1_000_000
+            record_request()
+            record_latency_ms(duration_ms)
+            if (
+                status >= 500
+                or duration_ms >= self._slow_ms
+                or random.random() < self._sample_rate
+            ):
+                self._logger.info(
+                    "%s %s %d",
+                    scope["method"],
+                    scope["path"],
+                    status,
+                    extra={
+                        "fields": {
+                            "method": scope["method"],
+                            "path": scope["path"],
+                            "status": status,
+                            "duration_ms": round(duration_ms, 3),
+                            "client": scope["client"][0] if scope.get("client") else None,
+                            "correlation_id": correlation_id.get(),
+                        }
+                    },
+                )
+
+
+class CorrelationIdMiddleware:
+    # Outermost layer: adopts the caller's X-Correlation-ID (or mints one),
+    # binds it to the request's context for logs, spans and outbound calls,
+    # echoes it on the response and opens the request's root span.
+
+    def __init__(self, app: ASGIApp, *, header: str = "X-Correlation-ID") -> None:
+        self.app = app
+        self._header = header
+        self._raw_header = header.lower().encode("latin-1")
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        cid = None
+        for name, value in scope["headers"]:
+            if name == self._raw_header:
+                cid = value.decode("latin-1")
+                break
+        cid = cid or generate_correlation_id()
+        token = correlation_id.set(cid)
+
+        async def send_with_id(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message)[self._header] = cid
+            await send(message)
+
+        try:
+            with tracer.span(f"{scope['method']} {scope['path']}", cat="request"):
+                await self.app(scope, receive, send_with_id)
+        finally:
+            correlation_id.reset(token)
+
+
+class RateLimitMiddleware:
+    # GCRA through a RateLimitStore: O(1) time and one float of state per
+    # client. Clients are keyed by any mix of "ip", "api_key" and "route"
+    # (the matched route template, not the URL); over the limit, the request
+    # gets RateLimitError's 429 and Retry-After.
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        *,
+        max_requests: int = 100,
+        window_seconds: float = 60.0,
+        key_by: Sequence[str] = ("ip",),
+        store: RateLimitStore | None = None,
+        exempt_paths: Sequence[str] = ("/health", "/metrics"),
+    ) -> None:
+        unknown = set(key_by) - {"ip", "api_key", "route"}
+        if unknown:
+            raise ValueError(f"unknown rate limit keys: {sorted(unknown)}")
+        self.app = app
+        self._limit = RateLimit(max_requests, window_seconds)
+        self._key_by = tuple(key_by)
+        self._store = store or InMemoryRateLimitStore()
+        self._exempt = frozenset(exempt_paths)
+
+    def _key(self, scope: Scope) -> str:
+        parts = []
+        for part in self._key_by:
+            if part == "ip":
+                parts.append(scope["client"][0] if scope.get("client") else "unknown")
+            elif part == "api_key":
+                api_key = next((v for k, v in scope["headers"] if k == b"x-api-key"), None)
+                # hashed: raw keys must not end up as shared-store key names
+                parts.append(hash_api_key(api_key.decode("latin-1"))[:16] if api_key else "-")
+            else:
+                parts.append(f"{scope['method']} {self._route_template(scope)}")
+        return "|".join(parts)
+
+    @staticmethod
+    def _route_template(scope: Scope) -> str:
+        # routing has not run yet; match the app's route templates here so
+        # /notes/1 and /notes/2 share the "/notes/{note_id}" bucket. Unknown
+        # paths share one bucket rather than minting a key per URL.
+        app = scope.get("app")
+        for route in getattr(getattr(app, "router", None), "routes", ()):
+            regex = getattr(route, "path_regex", None)
+            if regex is not None and regex.match(scope["path"]):
+                return route.path_format
+        return "<unmatched>"
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"] in self._exempt:
+            await self.app(scope, receive, send)
+            return
+        retry_after = await self._store.hit(self._key(scope), self._limit)
+        if retry_after > 0:
+            exc = RateLimitError(retry_after=math.ceil(retry_after))
+            response = JSONResponse(
+                {"detail": exc.message, "code": exc.code},
+                status_code=429,
+                headers={"Retry-After": str(exc.retry_after)},
+            )
+            await response(scope, receive, send)
+            return
+        await self.app(scope, receive, send)
+
+
+class LoadSheddingMiddleware:
+    # Admission control in front of the app: past the limiter's adaptive
+    # concurrency limit requests queue briefly, then get a fast 503 instead of
+    # piling up behind a slow database. `priority_paths` skip the limiter so
+    # health checks keep answering while the app sheds.
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        *,
+        limiter: AdaptiveConcurrencyLimiter | None = None,
+        priority_paths: Sequence[str] = ("/health", "/metrics"),
+    ) -> None:
+        self.app = app
+        self._limiter = limiter or AdaptiveConcurrencyLimiter()
+        self._priority = frozenset(priority_paths)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"] in self._priority:
+            await self.app(scope, receive, send)
+            return
+        try:
+            await self._limiter.acquire()
+        except Overloaded as exc:
+            response = JSONResponse(
+                {"detail": "Server overloaded", "reason": exc.reason},
+                status_code=503,
+                headers={"Retry-After": "1"},
+            )
+            await response(scope, receive, send)
+            return
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self._limiter.release(time.perf_counter() - start)
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import base64
 from dataclasses import dataclass, field
 from typing import Any, Generic, TypeVar, Sequence
 
@@ -29,30 +30,46 @@ class PageResult(Generic[T]):
 
 
 @dataclass
-class CursorParams:  # UNUSED (demo)
+class CursorParams:
     cursor: str | None = None
     limit: int = 20
 
 
 @dataclass
-class CursorResult(Generic[T]):  # UNUSED (demo)
+class CursorResult(Generic[T]):
     items: list[T] = field(default_factory=list)
     next_cursor: str | None = None
     has_more: bool = False
 
 
-def paginate(items: Sequence[T], params: PageParams) -> PageResult[T]:
-    total = len(items)
-    start = params.offset
-    end = start + params.size
+def paginate(items: Sequence[T], params: PageParams, total: int | None = None) -> PageResult[T]:
+    # with an explicit total, items is already the page (LIMIT/OFFSET done in SQL)
+    if total is None:
+        total = len(items)
+        items = items[params.offset : params.offset + params.size]
     return PageResult(
-        items=list(items[start:end]),
+        items=list(items),
         total=total,
         page=params.page,
         size=params.size,
     )
 
 
+def encode_cursor(last_id: int) -> str:
+    return base64.urlsafe_b64encode(f"id:{last_id}".encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> int:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        prefix, _, value = raw.partition(":")
+        if prefix != "id":
+            raise ValueError(prefix)
+        return int(value)
+    except ValueError as exc:
+        raise ValueError(f"Invalid cursor: {cursor!r}") from exc
+
+
 def apply_filters(items: Sequence[Any], filters: dict[str, Any]) -> list[Any]:  # UNUSED (demo)
     result = list(items)
     for key, value in filters.items():
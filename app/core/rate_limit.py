@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    # `rate_per_s` tokens refill continuously up to `burst`. acquire() waits on
+    # the loop for a token rather than failing; no lock is needed because the
+    # check and the take happen without an await in between.
+
+    def __init__(self, rate_per_s: float, burst: int) -> None:
+        self._rate = rate_per_s
+        self._capacity = float(burst)
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self._capacity, self._tokens + (now - self._updated) * self._rate)
+        self._updated = now
+
+    def try_acquire(self, tokens: float = 1.0) -> bool:
+        self._refill()
+        if self._tokens >= tokens:
+            self._tokens -= tokens
+            return True
+        return False
+
+    async def acquire(self, tokens: float = 1.0) -> None:
+        while not self.try_acquire(tokens):
+            await asyncio.sleep((tokens - self._tokens) / self._rate)
+
+
+@dataclass(frozen=True)
+class RateLimit:
+    # `limit` requests per `period_s`, all of which may arrive as one burst
+    limit: int
+    period_s: float
+
+    @property
+    def emission_s(self) -> float:
+        return self.period_s / self.limit
+
+
+class RateLimitStore(ABC):
+    # GCRA: the only state per key is its theoretical arrival time (TAT), the
+    # moment the key's allowance is fully restored. hit() returns 0.0 when the
+    # request is allowed, else the seconds until it would be.
+
+    @abstractmethod
+    async def hit(self, key: str, limit: RateLimit, cost: int = 1) -> float: ...
+
+
+class InMemoryRateLimitStore(RateLimitStore):
+    # One float per client, in LRU order. Past `max_keys` the least recently
+    # seen client is dropped; it comes back with a full allowance, which is
+    # what an idle client would have anyway.
+
+    def __init__(
+        self, *, max_keys: int = 100_000, clock: Callable[[], float] = time.monotonic
+    ) -> None:
+        self._max_keys = max_keys
+        self._clock = clock
+        self._tats: OrderedDict[str, float] = OrderedDict()
+        self.evictions = 0
+
+    async def hit(self, key: str, limit: RateLimit, cost: int = 1) -> float:
+        return self.check(key, limit, cost)
+
+    def check(self, key: str, limit: RateLimit, cost: int = 1) -> float:
+        now = self._clock()
+        tats = self._tats
+        tat = tats.get(key)
+        if tat is not None:
+            tats.move_to_end(key)
+        if tat is None or tat < now:
+            tat = now
+        new_tat = tat + limit.emission_s * cost
+        allow_at = new_tat - limit.period_s
+        if allow_at > now:
+            return allow_at - now
+        tats[key] = new_tat
+        if len(tats) > self._max_keys:
+            tats.popitem(last=False)
+            self.evictions += 1
+        return 0.0
+
+    def __len__(self) -> int:
+        return len(self._tats)
+
+
+# the same GCRA step, atomic on the server and on the server's clock; keys
+# expire once their TAT passes, so idle clients cost Redis nothing
+_GCRA_LUA = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local emission, period, cost = tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3])
+local tat = tonumber(redis.call('GET', KEYS[1])) or now
+if tat < now then tat = now end
+local new_tat = tat + emission * cost
+local allow_at = new_tat - period
+if allow_at > now then return tostring(allow_at - now) end
+redis.call('SET', KEYS[1], tostring(new_tat), 'PX', math.ceil((new_tat - now) * 1000))
+return '0'
+"""
+
+
+class RedisRateLimitStore(RateLimitStore):
+    # Cluster-wide limits: every app instance shares one TAT per client.
+    # Fails open: a Redis outage lets traffic through rather than 429ing it.
+
+    _PREFIX = "ratelimit:"
+
+    def __init__(
+        self,
+        url: str = "redis://localhost:6379/0",
+        *,
+        max_connections: int = 50,
+        client: Any = None,
+    ) -> None:
+        if client is None:
+            import redis.asyncio  # optional: pip install "skylos-demo[redis]"
+
+            client = redis.asyncio.Redis.from_url(
+                url, max_connections=max_connections, socket_timeout=0.5
+            )
+        self._client = client
+        self._script = client.register_script(_GCRA_LUA)
+
+    async def hit(self, key: str, limit: RateLimit, cost: int = 1) -> float:
+        try:
+            raw = await self._script(
+                keys=[self._PREFIX + key], args=[limit.emission_s, limit.period_s, cost]
+            )
+        except Exception as exc:  # fails open on any store error, not just RedisError
+            logger.warning("rate limit store unavailable, allowing request: %s", exc)
+            return 0.0
+        return float(raw)
@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import functools
+import inspect
+import itertools
+import os
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+from typing import Any, Callable
+
+# set per request by CorrelationIdMiddleware; copied into every span it encloses
+correlation_id: ContextVar[str | None] = ContextVar("correlation_id", default=None)
+_parent_span: ContextVar[int | None] = ContextVar("parent_span", default=None)
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self) -> _NoopSpan:
+        return self
+
+    def __exit__(self, *exc: Any) -> bool:
+        return False
+
+
+_NOOP = _NoopSpan()
+
+
+class _Span:
+    __slots__ = ("_tracer", "name", "cat", "args", "id", "parent", "_start", "_token")
+
+    def __init__(self, tracer: Tracer, name: str, cat: str, args: dict | None) -> None:
+        self._tracer = tracer
+        self.name = name
+        self.cat = cat
+        self.args = args
+
+    def __enter__(self) -> _Span:
+        self.id = next(self._tracer._ids)
+        self.parent = _parent_span.get()
+        self._token = _parent_span.set(self.id)
+        self._start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type: Any, exc: Any, tb: Any) -> bool:
+        end = time.perf_counter_ns()
+        _parent_span.reset(self._token)
+        # raw tuples: building the trace-event dicts is left to export time
+        self._tracer._spans.append(
+            (
+                self.name,
+                self.cat,
+                self._start,
+                end - self._start,
+                threading.get_ident(),
+                self.id,
+                self.parent,
+                correlation_id.get(),
+                self.args,
+                exc_type.__name__ if exc_type is not None else None,
+            )
+        )
+        return False
+
+
+class Tracer:
+    # In-process span recorder. Finished spans land in a ring buffer, so only
+    # the newest `max_spans` are kept. Disabled, span() hands back a shared
+    # no-op and records nothing.
+
+    def __init__(self, *, max_spans: int = 10_000, enabled: bool = False) -> None:
+        self.enabled = enabled
+        self._spans: deque[tuple] = deque(maxlen=max_spans)
+        self._ids = itertools.count(1)
+
+    def configure(self, *, enabled: bool, max_spans: int | None = None) -> None:
+        if max_spans is not None and max_spans != self._spans.maxlen:
+            self._spans = deque(self._spans, maxlen=max_spans)
+        self.enabled = enabled
+
+    def span(self, name: str, cat: str = "app", **args: Any) -> _Span | _NoopSpan:
+        if not self.enabled:
+            return _NOOP
+        return _Span(self, name, cat, args or None)
+
+    def clear(self) -> None:
+        self._spans.clear()
+
+    def __len__(self) -> int:
+        return len(self._spans)
+
+    def export_chrome(self) -> dict[str, Any]:
+        # Chrome trace-event format ("X" complete events, microsecond
+        # timestamps); loads in chrome://tracing and Perfetto
+        pid = os.getpid()
+        events = []
+        for name, cat, start, dur, tid, span_id, parent, cid, args, error in list(self._spans):
+            event_args: dict[str, Any] = {"span_id": span_id, "parent_id": parent}
+            if cid is not None:
+                event_args["correlation_id"] = cid
+            if args:
+                event_args.update(args)
+            if error is not None:
+                event_args["error"] = error
+            events.append(
+                {
+                    "name": name,
+                    "cat": cat,
+                    "ph": "X",
+                    "ts": start / 1000,
+                    "dur": dur / 1000,
+                    "pid": pid,
+                    "tid": tid,
+                    "args": event_args,
+                }
+            )
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+
+tracer = Tracer()
+
+
+def traced(name: str | None = None, cat: str = "app") -> Callable:
+    # the span is named <module>.<function> unless `name` is given
+    def decorator(fn: Callable) -> Callable:
+        span_name = name or f"{fn.__module__.rsplit('.', 1)[-1]}.{fn.__name__}"
+
+        if inspect.iscoroutinefunction(fn):
+
+            @functools.wraps(fn)
+            async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+                if not tracer.enabled:
+                    return await fn(*args, **kwargs)
+                with _Span(tracer, span_name, cat, None):
+                    return await fn(*args, **kwargs)
+
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if not tracer.enabled:
+                return fn(*args, **kwargs)
+            with _Span(tracer, span_name, cat, None):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
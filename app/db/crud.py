@@ -1,38 +1,99 @@
 # app/db/crud.py
-from sqlalchemy.orm import Session
-from sqlalchemy import select, text
+from typing import Iterator
 
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from sqlalchemy import RowMapping, Select, func, insert, select
+
+from app.core.pagination import (
+    CursorParams,
+    CursorResult,
+    PageParams,
+    PageResult,
+    decode_cursor,
+    encode_cursor,
+    paginate,
+)
+from app.core.tracing import traced
 from app.db.models import Note
+from app.db.search import get_search_index
 from app.schemas.notes import NoteCreate, NoteUpdate
 
 DEFAULT_PAGE_SIZE = 50  # UNUSED (demo)
 
 
+@traced(cat="db")
 def create_note(db: Session, payload: NoteCreate) -> Note:
     note = Note(title=payload.title, body=payload.body)
     db.add(note)
+    db.flush()
+    get_search_index(db).add(db, note.id, note.title, note.body)
     db.commit()
     db.refresh(note)
     return note
 
 
-# TODO: add batch-insert via executemany for import endpoint
-def bulk_create_notes(db: Session, payloads: list[NoteCreate]) -> list[Note]:  # UNUSED (demo)
-    notes = [Note(title=p.title, body=p.body) for p in payloads]
-    db.add_all(notes)
+@traced(cat="db")
+def bulk_create_notes(db: Session, payloads: list[NoteCreate]) -> list[int]:
+    # Core INSERT ... RETURNING id in one executemany round, no per-row refresh
+    rows = [{"title": p.title, "body": p.body} for p in payloads]
+    if not rows:
+        return []
+    table = Note.__table__
+    # sort_by_parameter_order would make SQLite fall back to one INSERT per row;
+    # new ids grow in VALUES order, so sorting them restores the pairing instead
+    ids = sorted(db.execute(insert(table).returning(table.c.id), rows).scalars())
+    get_search_index(db).add_many(
+        db, [(note_id, r["title"], r["body"]) for note_id, r in zip(ids, rows)]
+    )
     db.commit()
-    for n in notes:
-        db.refresh(n)
-    return notes
+    return ids
 
 
+@traced(cat="db")
 def get_note_by_id(db: Session, note_id: int) -> Note | None:
     return db.get(Note, note_id)
 
 
-def list_notes(db: Session) -> list[Note]:
-    stmt = select(Note).order_by(Note.id.desc())
-    return list(db.execute(stmt).scalars().all())
+@traced(cat="db")
+def list_notes(db: Session, params: PageParams) -> PageResult[Note]:
+    total = db.execute(select(func.count()).select_from(Note)).scalar_one()
+    stmt = select(Note).order_by(Note.id.desc()).offset(params.offset).limit(params.size)
+    return paginate(list(db.execute(stmt).scalars()), params, total=total)
+
+
+@traced(cat="db")
+def list_notes_after(db: Session, params: CursorParams) -> CursorResult[Note]:
+    items = list(db.execute(_keyset_page(params)).scalars())
+    return _cursor_result(items, params)
+
+
+def _keyset_page(params: CursorParams) -> Select:
+    # one extra row tells whether another page follows
+    stmt = select(Note).order_by(Note.id.desc()).limit(params.limit + 1)
+    if params.cursor:
+        stmt = stmt.where(Note.id < decode_cursor(params.cursor))
+    return stmt
+
+
+def _cursor_result(items: list[Note], params: CursorParams) -> CursorResult[Note]:
+    has_more = len(items) > params.limit
+    items = items[: params.limit]
+    return CursorResult(
+        items=items,
+        next_cursor=encode_cursor(items[-1].id) if has_more else None,
+        has_more=has_more,
+    )
+
+
+def iter_notes(db: Session, batch_size: int = 1000) -> Iterator[RowMapping]:
+    # server-side cursor; plain rows keep the identity map from growing with the table
+    stmt = (
+        select(Note.id, Note.title, Note.body)
+        .order_by(Note.id)
+        .execution_options(yield_per=batch_size)
+    )
+    yield from db.execute(stmt).mappings()
 
 
 def _build_search_query(q: str, tag: str | None = None) -> str:  # UNUSED (demo)
@@ -42,36 +103,105 @@ def _build_search_query(q: str, tag: str | None = None) -> str:  # UNUSED (demo)
     return base + " ORDER BY id DESC"
 
 
-def search_notes(db: Session, q: str) -> list[Note]:
-    # INTENTIONALLY BAD (demo): f-string SQL interpolation
-    sql = text(
-        f"SELECT id, title, body FROM notes "
-        f"WHERE title LIKE '%{q}%' OR body LIKE '%{q}%' "
-        f"ORDER BY id DESC"
-    )
-    rows = db.execute(sql, {"q": f"%{q}%"}).fetchall()
-    return [Note(id=r[0], title=r[1], body=r[2]) for r in rows]
+@traced(cat="db")
+def search_notes(db: Session, q: str, limit: int = 50) -> list[Note]:
+    ranked_ids = get_search_index(db).search(db, q, limit)
+    if not ranked_ids:
+        return []
+    by_id = {n.id: n for n in db.execute(select(Note).where(Note.id.in_(ranked_ids))).scalars()}
+    return [by_id[i] for i in ranked_ids if i in by_id]
 
 
+@traced(cat="db")
 def update_note(db: Session, note_id: int, payload: NoteUpdate) -> Note | None:
     note = db.get(Note, note_id)
     if note is None:
         return None
     note.title = payload.title
     note.body = payload.body
+    get_search_index(db).add(db, note.id, note.title, note.body)
     db.commit()
     db.refresh(note)
     return note
 
 
+@traced(cat="db")
 def delete_note(db: Session, note_id: int) -> bool:
     note = db.get(Note, note_id)
     if note is None:
         return False
     db.delete(note)
+    get_search_index(db).remove(db, note_id)
     db.commit()
     return True
 
 
+# Async twins of the functions above for AsyncSession. The search index API is
+# sync, so index calls go through run_sync and share the session's transaction.
+
+
+@traced(cat="db")
+async def create_note_async(db: AsyncSession, payload: NoteCreate) -> Note:
+    note = Note(title=payload.title, body=payload.body)
+    db.add(note)
+    await db.flush()
+    await db.run_sync(lambda s: get_search_index(s).add(s, note.id, note.title, note.body))
+    await db.commit()
+    await db.refresh(note)
+    return note
+
+
+@traced(cat="db")
+async def get_note_by_id_async(db: AsyncSession, note_id: int) -> Note | None:
+    return await db.get(Note, note_id)
+
+
+@traced(cat="db")
+async def list_notes_async(db: AsyncSession, params: PageParams) -> PageResult[Note]:
+    total = (await db.execute(select(func.count()).select_from(Note))).scalar_one()
+    stmt = select(Note).order_by(Note.id.desc()).offset(params.offset).limit(params.size)
+    return paginate(list((await db.execute(stmt)).scalars()), params, total=total)
+
+
+@traced(cat="db")
+async def list_notes_after_async(db: AsyncSession, params: CursorParams) -> CursorResult[Note]:
+    items = list((await db.execute(_keyset_page(params))).scalars())
+    return _cursor_result(items, params)
+
+
+@traced(cat="db")
+async def search_notes_async(db: AsyncSession, q: str, limit: int = 50) -> list[Note]:
+    ranked_ids = await db.run_sync(lambda s: get_search_index(s).search(s, q, limit))
+    if not ranked_ids:
+        return []
+    rows = await db.execute(select(Note).where(Note.id.in_(ranked_ids)))
+    by_id = {n.id: n for n in rows.scalars()}
+    return [by_id[i] for i in ranked_ids if i in by_id]
+
+
+@traced(cat="db")
+async def update_note_async(db: AsyncSession, note_id: int, payload: NoteUpdate) -> Note | None:
+    note = await db.get(Note, note_id)
+    if note is None:
+        return None
+    note.title = payload.title
+    note.body = payload.body
+    await db.run_sync(lambda s: get_search_index(s).add(s, note.id, note.title, note.body))
+    await db.commit()
+    await db.refresh(note)
+    return note
+
+
+@traced(cat="db")
+async def delete_note_async(db: AsyncSession, note_id: int) -> bool:
+    note = await db.get(Note, note_id)
+    if note is None:
+        return False
+    await db.delete(note)
+    await db.run_sync(lambda s: get_search_index(s).remove(s, note_id))
+    await db.commit()
+    return True
+
+
 def _row_to_dict(row) -> dict:  # UNUSED (demo)
     return {"id": row[0], "title": row[1], "body": row[2]}
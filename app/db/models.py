@@ -1,6 +1,6 @@
 # app/db/models.py
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
-from sqlalchemy import String, Text, Integer
+from sqlalchemy import Float, Index, String, Text, Integer, text
 
 
 class Base(DeclarativeBase):
@@ -17,11 +17,62 @@ class Note(Base):
 
 class AuditLog(Base):
     __tablename__ = "audit_log"
+    __table_args__ = (Index("ix_audit_log_entity", "entity_type", "entity_id", "timestamp"),)
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     action: Mapped[str] = mapped_column(String(100), nullable=False)
     entity_type: Mapped[str] = mapped_column(String(50), nullable=False)
     entity_id: Mapped[int] = mapped_column(Integer, nullable=False)
-    timestamp: Mapped[str] = mapped_column(String(50), nullable=False)
+    actor: Mapped[str] = mapped_column(String(100), nullable=False, default="system")
+    timestamp: Mapped[str] = mapped_column(String(50), nullable=False, index=True)
+
+
+# rows of task_queue that still hold their unique_key
+TASK_UNFINISHED = text("status IN ('pending', 'running')")
+
+
+class TaskJob(Base):
+    __tablename__ = "task_queue"
+    # claim order is (priority DESC, run_at); the index keeps that a range scan.
+    # At most one unfinished job per unique_key: enqueue() inserts against it.
+    __table_args__ = (
+        Index("ix_task_queue_ready", "status", "priority", "run_at"),
+        Index(
+            "ux_task_queue_unique_key",
+            "unique_key",
+            unique=True,
+            sqlite_where=TASK_UNFINISHED,
+            postgresql_where=TASK_UNFINISHED,
+        ),
+    )
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    name: Mapped[str] = mapped_column(String(100), nullable=False)
+    kwargs: Mapped[str] = mapped_column(Text, nullable=False, default="{}")
+    priority: Mapped[int] = mapped_column(Integer, nullable=False)
+    status: Mapped[str] = mapped_column(String(16), nullable=False, default="pending")
+    run_at: Mapped[float] = mapped_column(Float, nullable=False)
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    max_attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=3)
+    interval_s: Mapped[float | None] = mapped_column(Float, nullable=True)
+    unique_key: Mapped[str | None] = mapped_column(String(200), nullable=True)
+    locked_until: Mapped[float | None] = mapped_column(Float, nullable=True)
+    last_error: Mapped[str | None] = mapped_column(Text, nullable=True)
+
+
+class ScheduledNotification(Base):
+    __tablename__ = "notification_log"
+    # the scheduler reads due rows in (send_at, id) order straight off this index
+    __table_args__ = (Index("ix_notification_log_due", "status", "send_at", "id"),)
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    channel: Mapped[str] = mapped_column(String(16), nullable=False)
+    recipient: Mapped[str] = mapped_column(String(200), nullable=False)
+    message: Mapped[str] = mapped_column(Text, nullable=False)
+    send_at: Mapped[float] = mapped_column(Float, nullable=False)
+    status: Mapped[str] = mapped_column(String(16), nullable=False, default="scheduled")
+    sent_at: Mapped[float | None] = mapped_column(Float, nullable=True)
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    # lease on a row in `sending`; once it lapses any worker may send it again
+    locked_until: Mapped[float | None] = mapped_column(Float, nullable=True)
 
 
 class Comment(Base):  # UNUSED (demo)
@@ -0,0 +1,234 @@
+# app/db/search.py
+from __future__ import annotations
+
+import math
+import re
+import threading
+import unicodedata
+from abc import ABC, abstractmethod
+from collections import defaultdict
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import Session
+
+FTS_TABLE = "notes_fts"
+# bm25 column weights: a hit in the title counts twice as much as one in the body
+TITLE_WEIGHT = 2.0
+BODY_WEIGHT = 1.0
+
+_TOKEN_RE = re.compile(r"\w+")
+
+
+def tokenize(raw: str) -> list[str]:
+    # mirrors FTS5's unicode61 tokenizer with remove_diacritics
+    folded = unicodedata.normalize("NFKD", raw.lower())
+    folded = "".join(ch for ch in folded if not unicodedata.combining(ch))
+    return _TOKEN_RE.findall(folded)
+
+
+class SearchIndex(ABC):
+    # Query semantics are shared by every backend: all terms must match and the
+    # last term matches as a prefix, so "sea" finds "searchable" while typing.
+
+    @abstractmethod
+    def rebuild(self, conn: Connection) -> None: ...
+
+    @abstractmethod
+    def add(self, db: Session, note_id: int, title: str, body: str) -> None: ...
+
+    @abstractmethod
+    def add_many(self, db: Session, docs: list[tuple[int, str, str]]) -> None: ...
+
+    @abstractmethod
+    def remove(self, db: Session, note_id: int) -> None: ...
+
+    @abstractmethod
+    def search(self, db: Session, q: str, limit: int) -> list[int]: ...
+
+
+class Fts5SearchIndex(SearchIndex):
+    def rebuild(self, conn: Connection) -> None:
+        conn.execute(
+            text(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+                "title, body, tokenize='unicode61 remove_diacritics 2')"
+            )
+        )
+        indexed = conn.execute(text(f"SELECT count(*) FROM {FTS_TABLE}")).scalar_one()
+        total = conn.execute(text("SELECT count(*) FROM notes")).scalar_one()
+        if indexed != total:
+            conn.execute(text(f"DELETE FROM {FTS_TABLE}"))
+            conn.execute(
+                text(f"INSERT INTO {FTS_TABLE}(rowid, title, body) SELECT id, title, body FROM notes")
+            )
+
+    def add(self, db: Session, note_id: int, title: str, body: str) -> None:
+        # runs inside the caller's transaction so the index commits with the row
+        db.execute(text(f"DELETE FROM {FTS_TABLE} WHERE rowid = :id"), {"id": note_id})
+        db.execute(
+            text(f"INSERT INTO {FTS_TABLE}(rowid, title, body) VALUES (:id, :title, :body)"),
+            {"id": note_id, "title": title, "body": body},
+        )
+
+    def add_many(self, db: Session, docs: list[tuple[int, str, str]]) -> None:
+        # only used for freshly inserted ids, so there is nothing to delete first;
+        # plain DBAPI executemany skips SQLAlchemy's per-row parameter processing
+        db.connection().exec_driver_sql(
+            f"INSERT INTO {FTS_TABLE}(rowid, title, body) VALUES (?, ?, ?)", docs
+        )
+
+    def remove(self, db: Session, note_id: int) -> None:
+        db.execute(text(f"DELETE FROM {FTS_TABLE} WHERE rowid = :id"), {"id": note_id})
+
+    def search(self, db: Session, q: str, limit: int) -> list[int]:
+        match = _to_fts_query(q)
+        if match is None:
+            return []
+        rows = db.execute(
+            text(
+                f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH :match "
+                f"ORDER BY bm25({FTS_TABLE}, {TITLE_WEIGHT}, {BODY_WEIGHT}) LIMIT :limit"
+            ),
+            {"match": match, "limit": limit},
+        )
+        return [r[0] for r in rows]
+
+
+def _to_fts_query(q: str) -> str | None:
+    # user input never reaches MATCH verbatim: only quoted \w+ tokens survive
+    terms = tokenize(q)
+    if not terms:
+        return None
+    quoted = [f'"{t}"' for t in terms]
+    quoted[-1] += "*"
+    return " ".join(quoted)
+
+
+class InvertedSearchIndex(SearchIndex):
+    # Pure-Python fallback for dialects without FTS5. The postings live in this
+    # process only, so each worker rebuilds them from the notes table at startup.
+
+    _K1 = 1.2
+    _B = 0.75
+
+    def __init__(self) -> None:
+        self._postings: dict[str, dict[int, float]] = defaultdict(dict)
+        self._doc_terms: dict[int, dict[str, float]] = {}
+        self._doc_len: dict[int, float] = {}
+        self._total_len = 0.0
+        self._lock = threading.Lock()
+
+    def rebuild(self, conn: Connection) -> None:
+        rows = conn.execute(text("SELECT id, title, body FROM notes")).fetchall()
+        with self._lock:
+            self._postings.clear()
+            self._doc_terms.clear()
+            self._doc_len.clear()
+            self._total_len = 0.0
+            for note_id, title, body in rows:
+                self._add_locked(note_id, title, body)
+
+    def add(self, db: Session, note_id: int, title: str, body: str) -> None:
+        with self._lock:
+            self._remove_locked(note_id)
+            self._add_locked(note_id, title, body)
+
+    def add_many(self, db: Session, docs: list[tuple[int, str, str]]) -> None:
+        with self._lock:
+            for note_id, title, body in docs:
+                self._remove_locked(note_id)
+                self._add_locked(note_id, title, body)
+
+    def remove(self, db: Session, note_id: int) -> None:
+        with self._lock:
+            self._remove_locked(note_id)
+
+    def _add_locked(self, note_id: int, title: str, body: str) -> None:
+        weights: dict[str, float] = defaultdict(float)
+        for term in tokenize(title):
+            weights[term] += TITLE_WEIGHT
+        for term in tokenize(body):
+            weights[term] += BODY_WEIGHT
+        for term, tf in weights.items():
+            self._postings[term][note_id] = tf
+        self._doc_terms[note_id] = weights
+        self._doc_len[note_id] = sum(weights.values())
+        self._total_len += self._doc_len[note_id]
+
+    def _remove_locked(self, note_id: int) -> None:
+        weights = self._doc_terms.pop(note_id, None)
+        if weights is None:
+            return
+        for term in weights:
+            docs = self._postings[term]
+            docs.pop(note_id, None)
+            if not docs:
+                del self._postings[term]
+        self._total_len -= self._doc_len.pop(note_id)
+
+    def search(self, db: Session, q: str, limit: int) -> list[int]:
+        terms = tokenize(q)
+        if not terms:
+            return []
+        with self._lock:
+            n_docs = len(self._doc_terms)
+            if not n_docs:
+                return []
+            avg_len = self._total_len / n_docs
+            *exact, last = terms
+            groups = [[t] for t in exact]
+            groups.append([t for t in self._postings if t.startswith(last)])
+
+            scores: dict[int, float] | None = None
+            for group in groups:
+                group_scores: dict[int, float] = defaultdict(float)
+                for term in group:
+                    docs = self._postings.get(term, {})
+                    idf = math.log(1 + (n_docs - len(docs) + 0.5) / (len(docs) + 0.5))
+                    for note_id, tf in docs.items():
+                        doc_len = self._doc_len[note_id]
+                        norm = tf + self._K1 * (1 - self._B + self._B * doc_len / avg_len)
+                        group_scores[note_id] += idf * tf * (self._K1 + 1) / norm
+                if scores is None:
+                    scores = group_scores
+                else:
+                    scores = {k: v + group_scores[k] for k, v in scores.items() if k in group_scores}
+                if not scores:
+                    return []
+        ranked = sorted(scores.items(), key=lambda kv: (-kv[1], -kv[0]))
+        return [note_id for note_id, _ in ranked[:limit]]
+
+
+_indexes: dict[str, SearchIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def _engine_of(bind: Engine | Connection) -> Engine:
+    return bind.engine if isinstance(bind, Connection) else bind
+
+
+def _sqlite_has_fts5(conn: Connection) -> bool:
+    return bool(conn.execute(text("SELECT sqlite_compileoption_used('ENABLE_FTS5')")).scalar())
+
+
+def init_search_index(bind: Engine | Connection) -> SearchIndex:
+    engine = _engine_of(bind)
+    # keyed without the driver, so the sync and async engines share one index
+    key = str(engine.url.set(drivername=engine.dialect.name))
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is not None:
+            return index
+        with engine.begin() as conn:
+            if engine.dialect.name == "sqlite" and _sqlite_has_fts5(conn):
+                index = Fts5SearchIndex()
+            else:
+                index = InvertedSearchIndex()
+            index.rebuild(conn)
+        _indexes[key] = index
+        return index
+
+
+def get_search_index(db: Session) -> SearchIndex:
+    return init_search_index(db.get_bind())
@@ -1,30 +1,161 @@
 # app/db/session.py
-from sqlalchemy import create_engine, inspect
+from sqlalchemy import Engine, create_engine, event, inspect, literal, make_url, text
+from sqlalchemy.engine import URL
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool, QueuePool
+from sqlalchemy.schema import CreateColumn
 
-from app.config import get_settings
+from app.config import Settings, get_settings
 from app.db.models import Base
+from app.db.search import init_search_index
 
 settings = get_settings()
 
-DB_POOL_SIZE: int = 10  # UNUSED (demo)
+DB_POOL_SIZE: int = 10
 
-engine = create_engine(
-    settings.database_url,
-    connect_args={"check_same_thread": False} if settings.database_url.startswith("sqlite") else {},
-)
+
+class _WaitCountingPool:
+    # QueuePool keeps no wait statistics; count checkouts that found it exhausted
+    waits = 0
+
+    def _do_get(self):
+        if self.checkedin() == 0 and 0 <= self._max_overflow <= self.overflow():
+            self.waits += 1
+        return super()._do_get()
+
+
+class _QueuePool(_WaitCountingPool, QueuePool):
+    pass
+
+
+class _AsyncQueuePool(_WaitCountingPool, AsyncAdaptedQueuePool):
+    pass
+
+
+def _is_memory_sqlite(url: URL) -> bool:
+    return url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:")
+
+
+def _engine_kwargs(url: URL, conf: Settings, poolclass: type[Pool]) -> dict:
+    kwargs: dict = {}
+    if url.get_backend_name() == "sqlite" and not url.drivername.endswith("aiosqlite"):
+        kwargs["connect_args"] = {"check_same_thread": False}
+    if _is_memory_sqlite(url):
+        # in-memory SQLite lives in a single connection; keep SQLAlchemy's default pool
+        return kwargs
+    kwargs.update(
+        poolclass=poolclass,
+        pool_size=conf.db_pool_size or DB_POOL_SIZE,
+        max_overflow=conf.db_max_overflow,
+        pool_timeout=conf.db_pool_timeout,
+        pool_recycle=conf.db_pool_recycle,
+        pool_pre_ping=conf.db_pool_pre_ping,
+    )
+    return kwargs
+
+
+def _install_sqlite_pragmas(engine: Engine, conf: Settings) -> None:
+    if engine.dialect.name != "sqlite":
+        return
+    pragmas = [
+        f"PRAGMA busy_timeout = {conf.sqlite_busy_timeout_ms}",
+        "PRAGMA synchronous = NORMAL",
+        f"PRAGMA mmap_size = {conf.sqlite_mmap_size}",
+        # negative cache_size is in KiB rather than pages
+        f"PRAGMA cache_size = -{conf.sqlite_cache_size_kib}",
+    ]
+    if conf.sqlite_wal and not _is_memory_sqlite(engine.url):
+        # WAL lets readers proceed while a writer holds the lock
+        pragmas.insert(0, "PRAGMA journal_mode = WAL")
+
+    @event.listens_for(engine, "connect")
+    def _apply(dbapi_connection, connection_record) -> None:
+        cursor = dbapi_connection.cursor()
+        for pragma in pragmas:
+            cursor.execute(pragma)
+        cursor.close()
+
+
+def build_engine(database_url: str, conf: Settings) -> Engine:
+    url = make_url(database_url)
+    engine = create_engine(url, **_engine_kwargs(url, conf, _QueuePool))
+    _install_sqlite_pragmas(engine, conf)
+    return engine
+
+
+engine = build_engine(settings.database_url, settings)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# same database through an asyncio driver, for the async routes
+_ASYNC_DRIVERS = {"sqlite": "sqlite+aiosqlite", "postgresql": "postgresql+asyncpg"}
+
+
+def _async_url(raw: str) -> URL:
+    url = make_url(raw)
+    return url.set(drivername=_ASYNC_DRIVERS.get(url.get_backend_name(), url.drivername))
+
+
+_async_db_url = _async_url(settings.database_url)
+async_engine = create_async_engine(
+    _async_db_url, **_engine_kwargs(_async_db_url, settings, _AsyncQueuePool)
+)
+_install_sqlite_pragmas(async_engine.sync_engine, settings)
+# expire_on_commit=False: an expired attribute would need lazy IO during serialization
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 
 def init_db() -> None:
     Base.metadata.create_all(bind=engine)
+    upgrade_schema(engine)
+    init_search_index(engine)
+
 
+def upgrade_schema(bind: Engine) -> None:
+    # create_all() skips tables that already exist, so a database created
+    # before a column or index was added to the models gets it here instead.
+    # New NOT NULL columns need a scalar default to fill the existing rows.
+    inspector = inspect(bind)
+    preparer = bind.dialect.identifier_preparer
+    with bind.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {c["name"] for c in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                spec = str(CreateColumn(column).compile(dialect=bind.dialect))
+                if column.default is not None and column.default.is_scalar:
+                    value = literal(column.default.arg).compile(
+                        dialect=bind.dialect, compile_kwargs={"literal_binds": True}
+                    )
+                    spec += f" DEFAULT {value}"
+                conn.execute(text(f"ALTER TABLE {preparer.format_table(table)} ADD COLUMN {spec}"))
+            for index in table.indexes:
+                index.create(conn, checkfirst=True)
 
-def get_engine_info() -> dict:  # UNUSED (demo)
+
+def get_engine_info() -> dict:
     inspector = inspect(engine)
     return {
         "dialect": engine.dialect.name,
         "tables": inspector.get_table_names(),
+        "pool": pool_stats(engine.pool),
+        "async_pool": pool_stats(async_engine.pool),
+    }
+
+
+def pool_stats(pool: Pool) -> dict:
+    if not isinstance(pool, QueuePool):
+        return {"class": type(pool).__name__}
+    return {
+        "class": type(pool).__name__,
+        "size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "overflow": max(pool.overflow(), 0),
+        "waits": getattr(pool, "waits", 0),
     }
 
 
@@ -1,11 +1,13 @@
 from __future__ import annotations
 
+import asyncio
 import os
 from fastapi import FastAPI
 
-from app.integrations.routers.webhooks import router as webhooks_router
+from app.integrations.routers.webhooks import router as webhooks_router, webhook_pipeline
 from app.integrations.slack import send_slack_message
 from app.integrations.github import get_repo
+from app.integrations.http_client import close_httpx_clients
 from app.integrations.metrics import record_request
 from app.core.plugins import load_plugin
 from app.core.events import EventBus
@@ -21,6 +23,7 @@ def init_integrations(app: FastAPI) -> None:
     @app.on_event("startup")
     async def _integrations_startup() -> None:
         record_request()
+        await webhook_pipeline.start()
 
         EventBus.emit("app_started")
 
@@ -31,3 +34,9 @@ def init_integrations(app: FastAPI) -> None:
         repo = os.getenv("DEMO_GH_REPO")
         if owner and repo:
             await get_repo(owner, repo)
+
+    @app.on_event("shutdown")
+    async def _integrations_shutdown() -> None:
+        await webhook_pipeline.stop()
+        await asyncio.to_thread(EventBus.drain, 5.0)
+        await close_httpx_clients()
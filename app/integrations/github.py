@@ -35,10 +35,8 @@ async def get_repo(
     if not cfg:
         return None
 
-    async with get_httpx_client(base_url=cfg.api_base) as client:
-        return await request_json(
-            client, "GET", f"/repos/{owner}/{repo}", headers=_auth_headers(cfg)
-        )
+    client = get_httpx_client(base_url=cfg.api_base)
+    return await request_json(client, "GET", f"/repos/{owner}/{repo}", headers=_auth_headers(cfg))
 
 
 # DEAD (currently unused): helper for checking if an issue exists, never called
@@ -51,19 +49,19 @@ async def find_issue_by_title(
     if not cfg:
         return None
 
-    async with get_httpx_client(base_url=cfg.api_base) as client:
-        data = await request_json(
-            client,
-            "GET",
-            f"/repos/{owner}/{repo}/issues",
-            headers=_auth_headers(cfg),
-        )
-        items = data.get("_") if isinstance(data.get("_"), list) else data.get("items")
-        if not isinstance(items, list):
-            return None
-        for it in items:
-            if isinstance(it, dict) and it.get("title") == title:
-                num = it.get("number")
-                if isinstance(num, int):
-                    return num
+    client = get_httpx_client(base_url=cfg.api_base)
+    data = await request_json(
+        client,
+        "GET",
+        f"/repos/{owner}/{repo}/issues",
+        headers=_auth_headers(cfg),
+    )
+    items = data.get("_") if isinstance(data.get("_"), list) else data.get("items")
+    if not isinstance(items, list):
         return None
+    for it in items:
+        if isinstance(it, dict) and it.get("title") == title:
+            num = it.get("number")
+            if isinstance(num, int):
+                return num
+    return None
@@ -1,12 +1,19 @@
 from __future__ import annotations
 
+import asyncio
+import importlib.util
 import os
-import time
+import random
+import threading
 from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
 from typing import Any, Dict, Optional
 
 import httpx
 
+from app.core.tracing import correlation_id, tracer
+
 
 @dataclass(frozen=True)
 class HttpRetryPolicy:
@@ -14,23 +21,86 @@ class HttpRetryPolicy:
     base_backoff_s: float = 0.2
     max_backoff_s: float = 2.0
     retry_on_status: tuple[int, ...] = (429, 500, 502, 503, 504)
+    jitter: bool = True
+    # a Retry-After longer than this is clamped rather than obeyed verbatim
+    max_retry_after_s: float = 30.0
 
     def backoff(self, attempt_idx: int) -> float:
         # attempt_idx starts at 0
         t = min(self.max_backoff_s, self.base_backoff_s * (2**attempt_idx))
         return t
 
+    def delay(self, attempt_idx: int, retry_after: Optional[float] = None) -> float:
+        if retry_after is not None:
+            return min(max(retry_after, 0.0), self.max_retry_after_s)
+        t = self.backoff(attempt_idx)
+        # full jitter keeps many clients from retrying in lockstep
+        return random.uniform(0, t) if self.jitter else t
+
 
 _DEFAULT_TIMEOUT = httpx.Timeout(connect=2.0, read=6.0, write=6.0, pool=6.0)
+_DEFAULT_LIMITS = httpx.Limits(
+    max_connections=100, max_keepalive_connections=20, keepalive_expiry=30.0
+)
 
 # DEAD (currently unused): unused constant
 DEFAULT_HEADERS: Dict[str, str] = {"User-Agent": "skylos-demo/0.1"}
 
 
-def get_httpx_client(
-    *,
-    base_url: Optional[str] = None,
-    timeout: httpx.Timeout = _DEFAULT_TIMEOUT,
+class HttpClientRegistry:
+    # One pooled AsyncClient per (event loop, base_url, timeout) so calls reuse
+    # keep-alive connections instead of paying a handshake each time. A client
+    # is tied to the loop that created it, and code such as the notification
+    # scheduler runs on a loop of its own; keeping one client per loop means
+    # neither loop's client is ever displaced (and leaked) by the other.
+    # Clients of a loop that has since closed are dropped on the next get().
+
+    def __init__(self, *, limits: httpx.Limits = _DEFAULT_LIMITS) -> None:
+        self._limits = limits
+        self._clients: dict[Any, dict[tuple, httpx.AsyncClient]] = {}
+        self._lock = threading.Lock()
+
+    def get(
+        self, base_url: Optional[str] = None, *, timeout: httpx.Timeout = _DEFAULT_TIMEOUT
+    ) -> httpx.AsyncClient:
+        key = (base_url or "", tuple(timeout.as_dict().items()))
+        loop = _running_loop()
+        with self._lock:
+            for stale in [lp for lp in self._clients if lp is not None and lp.is_closed()]:
+                del self._clients[stale]
+            clients = self._clients.setdefault(loop, {})
+            client = clients.get(key)
+            if client is None or client.is_closed:
+                client = clients[key] = _build_client(key[0], timeout, self._limits)
+            return client
+
+    async def aclose(self) -> None:
+        # each client is closed on its own loop
+        with self._lock:
+            by_loop, self._clients = self._clients, {}
+        current = _running_loop()
+        for loop, clients in by_loop.items():
+            for client in clients.values():
+                if loop is None or loop is current:
+                    await client.aclose()
+                elif loop.is_running():
+                    await asyncio.wrap_future(
+                        asyncio.run_coroutine_threadsafe(client.aclose(), loop)
+                    )
+
+    def __len__(self) -> int:
+        return sum(len(clients) for clients in self._clients.values())
+
+
+def _running_loop() -> Any:
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+
+
+def _build_client(
+    base_url: str, timeout: httpx.Timeout, limits: httpx.Limits
 ) -> httpx.AsyncClient:
     verify_ssl = os.getenv("HTTP_VERIFY_SSL", "true").lower() != "false"
 
@@ -40,14 +110,48 @@ def get_httpx_client(
     }
 
     return httpx.AsyncClient(
-        base_url=base_url or "",
+        base_url=base_url,
         timeout=timeout,
         headers=headers,
         verify=verify_ssl,
         follow_redirects=True,
+        limits=limits,
+        # HTTP/2 needs the optional h2 package (pip install httpx[http2])
+        http2=importlib.util.find_spec("h2") is not None,
     )
 
 
+_registry = HttpClientRegistry()
+
+
+def get_httpx_client(
+    *,
+    base_url: Optional[str] = None,
+    timeout: httpx.Timeout = _DEFAULT_TIMEOUT,
+) -> httpx.AsyncClient:
+    # shared client: callers must not close it (no `async with`)
+    return _registry.get(base_url, timeout=timeout)
+
+
+async def close_httpx_clients() -> None:
+    await _registry.aclose()
+
+
+def _retry_after(resp: httpx.Response) -> Optional[float]:
+    raw = resp.headers.get("Retry-After")
+    if not raw:
+        return None
+    try:
+        return float(raw)
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(raw)
+    except (TypeError, ValueError):
+        return None
+    return (when - datetime.now(timezone.utc)).total_seconds()
+
+
 async def request_json(
     client: httpx.AsyncClient,
     method: str,
@@ -56,27 +160,50 @@ async def request_json(
     json: Optional[Dict[str, Any]] = None,
     headers: Optional[Dict[str, str]] = None,
     retry: Optional[HttpRetryPolicy] = None,
+    decode: bool = True,
 ) -> Dict[str, Any]:
-    policy = retry or HttpRetryPolicy()
-
-    last_exc: Optional[Exception] = None
-    for attempt in range(policy.max_attempts):
-        try:
-            resp = await client.request(method, url, json=json, headers=headers)
-            if resp.status_code in policy.retry_on_status:
-                time.sleep(policy.backoff(attempt))
-                continue
-            resp.raise_for_status()
-            data = resp.json()
-            if isinstance(data, dict):
-                return data
-            return {"_": data}
-        except Exception as e:
-            last_exc = e
-            time.sleep(policy.backoff(attempt))
-
-    # if we got here, all attempts failed
-    raise RuntimeError(f"request_json failed after {policy.max_attempts} attempts") from last_exc
+    # decode=False: only the status matters (e.g. Slack webhooks answer "ok"
+    # as plain text); returns {} on success
+    with tracer.span("http_client.request_json", cat="http", method=method, url=url):
+        policy = retry or HttpRetryPolicy()
+        cid = correlation_id.get()
+        if cid is not None:
+            # the caller's correlation id follows the request to the remote side
+            headers = {"X-Correlation-ID": cid, **(headers or {})}
+
+        last_exc: Optional[Exception] = None
+        for attempt in range(policy.max_attempts):
+            retry_after = None
+            try:
+                resp = await client.request(method, url, json=json, headers=headers)
+                if resp.status_code in policy.retry_on_status:
+                    last_exc = httpx.HTTPStatusError(
+                        f"retryable status {resp.status_code}",
+                        request=resp.request,
+                        response=resp,
+                    )
+                    retry_after = _retry_after(resp)
+                else:
+                    resp.raise_for_status()
+                    if not decode:
+                        return {}
+                    data = resp.json()
+                    if isinstance(data, dict):
+                        return data
+                    return {"_": data}
+            except httpx.TransportError as e:
+                last_exc = e
+            except (httpx.HTTPStatusError, ValueError) as e:
+                # 4xx and undecodable bodies will not get better on a retry
+                raise RuntimeError(f"request_json failed: {e}") from e
+            if attempt < policy.max_attempts - 1:
+                # asyncio.sleep: a retry must not stall every other request on the loop
+                await asyncio.sleep(policy.delay(attempt, retry_after))
+
+        # if we got here, all attempts failed
+        raise RuntimeError(
+            f"request_json failed after {policy.max_attempts} attempts"
+        ) from last_exc
 
 
 # DEAD (currently unused): dead helper for text responses, never called by other module
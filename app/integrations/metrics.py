@@ -1,32 +1,386 @@
 from __future__ import annotations
 
+import bisect
+import functools
+import json
+import math
 import os
 import time
-from dataclasses import dataclass
-from typing import Dict, Optional
+import weakref
+from typing import Any, Callable, Dict, Iterator, Optional, Sequence, Tuple
+
+from app.core.cache import cache_stats
+from app.integrations.metrics_mmap import Slab, aggregate, slab_path
+
+# upper bounds (ms) of the latency histogram buckets; the last is +Inf
+DEFAULT_BUCKETS_MS = (1.0, 5.0, 10.0, 25.0, 50.0, 100.0, 250.0, 500.0, 1000.0, 2500.0, math.inf)
+
+# Hot-path updates are a single attribute or list-slot add with no lock:
+# under the GIL a concurrent += can at worst lose an increment, which is
+# cheaper than taking a lock on every request. Nothing is allocated per
+# update except the float result of a sum.
 
 
-@dataclass
 class Counter:
-    name: str
-    value: int = 0
+    __slots__ = ("name", "value")
+
+    def __init__(self, name: str, value: float = 0) -> None:
+        self.name = name
+        self.value = value
+
+    def inc(self, n: float = 1) -> None:
+        self.value += n
 
-    def inc(self, n: int = 1) -> None:
+
+class Gauge:
+    __slots__ = ("name", "value")
+
+    def __init__(self, name: str, value: float = 0) -> None:
+        self.name = name
+        self.value = value
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+    def inc(self, n: float = 1) -> None:
         self.value += n
 
+    def dec(self, n: float = 1) -> None:
+        self.value -= n
+
+
+class Histogram:
+    __slots__ = ("name", "bounds", "counts", "sum")
+
+    def __init__(self, name: str, bounds: Sequence[float] = DEFAULT_BUCKETS_MS) -> None:
+        self.name = name
+        self.bounds = tuple(bounds)
+        self.counts = [0] * len(self.bounds)
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.sum += value
+
+    @property
+    def count(self) -> int:
+        return sum(self.counts)
+
 
-@dataclass
 class Timer:
-    name: str
-    started: float = 0.0
-    duration_ms: float = 0.0
+    # context manager timing a block into a histogram (or just duration_ms)
+    __slots__ = ("name", "histogram", "started", "duration_ms")
+
+    def __init__(self, name: str, histogram: Optional[Histogram] = None) -> None:
+        self.name = name
+        self.histogram = histogram
+        self.started = 0.0
+        self.duration_ms = 0.0
 
     def __enter__(self) -> "Timer":
-        self.started = time.time()
+        self.started = time.perf_counter()
         return self
 
     def __exit__(self, exc_type, exc, tb) -> None:
-        self.duration_ms = (time.time() - self.started) * 1000.0
+        self.duration_ms = (time.perf_counter() - self.started) * 1000.0
+        if self.histogram is not None and _should_emit():
+            self.histogram.observe(self.duration_ms)
+
+
+class _MmapSeries:
+    # a series whose values live in this process's Slab (multi-process mode)
+    __slots__ = ("name", "_prefix", "_slots", "_slot")
+
+    def __init__(self, name: str, slab: Slab, prefix: list) -> None:
+        self.name = name
+        self._prefix = prefix
+        self._bind(slab)
+
+    def _key(self, field: Any) -> str:
+        return json.dumps([*self._prefix, field])
+
+    def _bind(self, slab: Slab) -> None:
+        self._slots = slab.slots
+        self._slot = slab.slot(self._key(""))
+
+    @property
+    def value(self) -> float:
+        return self._slots[self._slot]
+
+
+class MmapCounter(_MmapSeries):
+    __slots__ = ()
+
+    def inc(self, n: float = 1) -> None:
+        self._slots[self._slot] += n
+
+
+class MmapGauge(_MmapSeries):
+    __slots__ = ()
+
+    def set(self, value: float) -> None:
+        self._slots[self._slot] = value
+
+    def inc(self, n: float = 1) -> None:
+        self._slots[self._slot] += n
+
+    def dec(self, n: float = 1) -> None:
+        self._slots[self._slot] -= n
+
+
+class MmapHistogram(_MmapSeries):
+    # _slot is the running sum; bucket i lives at _bucket_slots[i]
+    __slots__ = ("bounds", "_bucket_slots")
+
+    def __init__(
+        self, name: str, slab: Slab, prefix: list, bounds: Sequence[float] = DEFAULT_BUCKETS_MS
+    ) -> None:
+        self.bounds = tuple(bounds)
+        super().__init__(name, slab, prefix)
+
+    def _bind(self, slab: Slab) -> None:
+        self._slots = slab.slots
+        self._slot = slab.slot(self._key("sum"))
+        self._bucket_slots = [slab.slot(self._key(bound)) for bound in self.bounds]
+
+    def observe(self, value: float) -> None:
+        slots = self._slots
+        slots[self._bucket_slots[bisect.bisect_left(self.bounds, value)]] += 1
+        slots[self._slot] += value
+
+    @property
+    def count(self) -> int:
+        return int(sum(self._slots[i] for i in self._bucket_slots))
+
+    @property
+    def sum(self) -> float:
+        return self._slots[self._slot]
+
+
+_KINDS = {Counter: "counter", Gauge: "gauge", Histogram: "histogram"}
+_MMAP_KINDS = {Counter: MmapCounter, Gauge: MmapGauge, Histogram: MmapHistogram}
+
+# {family: (kind, labelnames, {labelvalues: value, or ({bound: count}, sum)})}
+_Collected = Dict[str, Tuple[str, Tuple[str, ...], Dict[Tuple[str, ...], Any]]]
+
+
+@functools.lru_cache(maxsize=4096)
+def _mode_of(key: str) -> str:
+    return json.loads(key)[2]
+
+
+class MetricFamily:
+    # One metric name with its label names; each distinct set of label values
+    # is a child series, created on first use. Look children up once and keep
+    # them: labels() builds a tuple per call.
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        kind: type,
+        labelnames: Tuple[str, ...],
+        factory: Callable[[Tuple[str, ...]], Any],
+    ) -> None:
+        self.name = name
+        self.help = help
+        self.kind = kind
+        self.labelnames = labelnames
+        self._factory = factory
+        self._children: Dict[Tuple[str, ...], Any] = {}
+
+    def labels(self, *values: str):
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}")
+            child = self._children.setdefault(values, self._factory(values))
+        return child
+
+    def children(self) -> list[Tuple[Tuple[str, ...], Any]]:
+        return list(self._children.items())
+
+
+class MetricsRegistry:
+    # With `multiproc_dir` set, every series lives in a per-process mmap slab
+    # in that directory and a scrape aggregates all of them, so any worker can
+    # answer for the whole server. Point it at an empty directory per deploy.
+    # Callback gauges always report the scraping process only.
+
+    def __init__(self, multiproc_dir: Optional[str] = None) -> None:
+        self._families: Dict[str, MetricFamily] = {}
+        # gauges read at scrape time from state owned elsewhere
+        self._callbacks: Dict[str, Tuple[str, Callable[[], float]]] = {}
+        self._multiproc_dir = multiproc_dir
+        self._slab: Optional[Slab] = None
+        if multiproc_dir:
+            os.makedirs(multiproc_dir, exist_ok=True)
+            self._slab = Slab(slab_path(multiproc_dir, os.getpid()))
+            _multiprocess_registries.add(self)
+
+    def _after_fork(self) -> None:
+        # the child must not write into its parent's slab
+        assert self._multiproc_dir and self._slab is not None
+        inherited, self._slab = self._slab, Slab(slab_path(self._multiproc_dir, os.getpid()))
+        for family in self._families.values():
+            for _, child in family.children():
+                child._bind(self._slab)
+        inherited.close()
+
+    def _factory(
+        self, kind: type, name: str, labelnames: Tuple[str, ...], mode: str, opts: dict
+    ) -> Callable[[Tuple[str, ...]], Any]:
+        if self._slab is None:
+            return lambda values: kind(name, **opts)
+        mode = mode if kind is Gauge else "counter"
+
+        def make(values: Tuple[str, ...]) -> Any:
+            prefix = [name, _KINDS[kind], mode, list(labelnames), list(values)]
+            assert self._slab is not None
+            return _MMAP_KINDS[kind](name, self._slab, prefix, **opts)
+
+        return make
+
+    def _family(
+        self,
+        kind: type,
+        name: str,
+        help: str,
+        labelnames: Sequence[str],
+        mode: str = "sum",
+        **opts,
+    ):
+        labelnames = tuple(labelnames)
+        family = self._families.get(name)
+        if family is None:
+            factory = self._factory(kind, name, labelnames, mode, opts)
+            family = MetricFamily(name, help, kind, labelnames, factory)
+            self._families[name] = family
+        elif family.kind is not kind or family.labelnames != labelnames:
+            raise ValueError(f"metric {name} already registered differently")
+        # unlabeled metrics hand back their only series directly
+        return family if labelnames else family.labels()
+
+    def counter(self, name: str, help: str = "", labelnames: Sequence[str] = ()):
+        return self._family(Counter, name, help, labelnames)
+
+    def gauge(
+        self,
+        name: str,
+        help: str = "",
+        labelnames: Sequence[str] = (),
+        multiprocess_mode: str = "sum",
+    ):
+        # multiprocess_mode: how live workers' values combine, "sum" or "max"
+        return self._family(Gauge, name, help, labelnames, multiprocess_mode)
+
+    def histogram(
+        self,
+        name: str,
+        help: str = "",
+        labelnames: Sequence[str] = (),
+        bounds: Sequence[float] = DEFAULT_BUCKETS_MS,
+    ):
+        return self._family(Histogram, name, help, labelnames, bounds=bounds)
+
+    def gauge_callback(self, name: str, help: str, fn: Callable[[], float]) -> None:
+        self._callbacks[name] = (help, fn)
+
+    def _collect(self) -> _Collected:
+        if self._multiproc_dir:
+            return self._collect_multiprocess(self._multiproc_dir)
+        collected: _Collected = {}
+        for family in list(self._families.values()):
+            series: Dict[Tuple[str, ...], Any] = {}
+            for values, child in family.children():
+                if isinstance(child, Histogram):
+                    series[values] = (dict(zip(child.bounds, child.counts)), child.sum)
+                else:
+                    series[values] = child.value
+            collected[family.name] = (_KINDS[family.kind], family.labelnames, series)
+        return collected
+
+    @staticmethod
+    def _collect_multiprocess(directory: str) -> _Collected:
+        collected: _Collected = {}
+        for key, value in aggregate(directory, _mode_of).items():
+            name, kind, _, labelnames, values, field = json.loads(key)
+            series = collected.setdefault(name, (kind, tuple(labelnames), {}))[2]
+            values = tuple(values)
+            if kind != "histogram":
+                series[values] = value
+                continue
+            buckets, total = series.get(values, ({}, 0.0))
+            if field == "sum":
+                total = value
+            else:
+                buckets[float(field)] = value
+            series[values] = (buckets, total)
+        return collected
+
+    def samples(self) -> Iterator[Tuple[str, str, str, Dict[str, str], float]]:
+        # (family, kind, sample name, labels, value) for every series
+        for name, (kind, labelnames, series) in self._collect().items():
+            for values, state in series.items():
+                labels = dict(zip(labelnames, values))
+                if kind != "histogram":
+                    yield name, kind, name, labels, state
+                    continue
+                buckets, total = state
+                cumulative = 0.0
+                for bound in sorted(buckets):
+                    cumulative += buckets[bound]
+                    le = "+Inf" if bound == math.inf else _format_value(bound)
+                    yield name, kind, f"{name}_bucket", {**labels, "le": le}, cumulative
+                yield name, kind, f"{name}_sum", labels, total
+                yield name, kind, f"{name}_count", labels, cumulative
+        for name, (_, fn) in list(self._callbacks.items()):
+            yield name, "gauge", name, {}, float(fn())
+
+    def render_text(self) -> str:
+        # Prometheus text exposition format, version 0.0.4
+        helps = {name: f.help for name, f in self._families.items()}
+        helps.update({name: help for name, (help, _) in self._callbacks.items()})
+        lines = []
+        current = None
+        for family, kind, sample, labels, value in self.samples():
+            if family != current:
+                current = family
+                if helps.get(family):
+                    lines.append(f"# HELP {family} {_escape(helps[family], quote=False)}")
+                lines.append(f"# TYPE {family} {kind}")
+            lines.append(f"{sample}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+_multiprocess_registries: "weakref.WeakSet[MetricsRegistry]" = weakref.WeakSet()
+
+
+def _reopen_slabs_after_fork() -> None:
+    for registry in list(_multiprocess_registries):
+        registry._after_fork()
+
+
+os.register_at_fork(after_in_child=_reopen_slabs_after_fork)
+
+
+def _escape(value: str, *, quote: bool = True) -> str:
+    value = value.replace("\\", "\\\\").replace("\n", "\\n")
+    return value.replace('"', '\\"') if quote else value
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(str(v))}"' for k, v in labels.items()) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
 
 
 _METRICS_ENABLED = os.getenv("METRICS_ENABLED", "false").lower() == "true"
@@ -37,11 +391,30 @@ def _should_emit() -> bool:
     return _METRICS_ENABLED
 
 
-_request_count = Counter("http_requests_total")
-_latency_timer = Timer("http_request_latency_ms")
+registry = MetricsRegistry(os.getenv("METRICS_MULTIPROC_DIR") or None)
+
+_request_count = registry.counter("http_requests_total", "HTTP requests handled")
+_latency = registry.histogram("http_request_latency_ms", "HTTP request latency in milliseconds")
+
+# pending + running jobs in the task queue, set by the task worker's poller
+# every worker polls the same queue, so workers agree; max rather than sum
+_queue_depth = registry.gauge(
+    "jobs_queue_depth", "Pending and running task queue jobs", multiprocess_mode="max"
+)
 
-## UNUSED: never read, looks realistic (people add it then forget)
-_queue_depth = Counter("jobs_queue_depth")
+# LoadSheddingMiddleware's adaptive limiter; each worker has its own, so they sum
+_shed_limit = registry.gauge("load_shed_concurrency_limit", "Adaptive limit on requests in flight")
+_shed_in_flight = registry.gauge("load_shed_in_flight", "Requests admitted and not yet finished")
+_shed_queue_depth = registry.gauge("load_shed_queue_depth", "Requests waiting for a slot")
+_shed_rejected = registry.counter(
+    "load_shed_rejected_total", "Requests shed with 503", labelnames=("reason",)
+)
+
+registry.gauge_callback(
+    "cache_coalesced_waiters_total",
+    "Cache misses served by waiting on another caller's load",
+    lambda: cache_stats()["coalesced_waiters"],
+)
 
 
 def record_request() -> None:
@@ -53,23 +426,46 @@ def record_request() -> None:
 def record_latency_ms(ms: float) -> None:
     if not _should_emit():
         return
-    _latency_timer.duration_ms = ms
+    _latency.observe(ms)
+
+
+def set_queue_depth(depth: int) -> None:
+    _queue_depth.set(depth)
+
+
+def set_load_shed_state(limit: int, in_flight: int, queued: int) -> None:
+    _shed_limit.set(limit)
+    _shed_in_flight.set(in_flight)
+    _shed_queue_depth.set(queued)
+
+
+def record_shed(reason: str) -> None:
+    _shed_rejected.labels(reason).inc()
 
 
 def snapshot_metrics() -> Optional[Dict[str, float]]:
     if not _should_emit():
         return None
     return {
-        _request_count.name: float(_request_count.value),
-        _latency_timer.name: float(_latency_timer.duration_ms),
+        f"{sample}{_format_labels(labels)}": float(value)
+        for _, _, sample, labels, value in registry.samples()
+        if not sample.endswith("_bucket")
     }
 
 
+def render_metrics() -> Optional[str]:
+    if not _should_emit():
+        return None
+    return registry.render_text()
+
+
 def add_tags(tags: dict = {}):  # INTENTIONALLY BAD
     tags["t"] = time.time()
     return tags
 
 
-# UNUSED: context manager exists but no one uses it
 def timed_request(name: str = "http") -> Timer:
-    return Timer(name=name)
+    histogram = registry.histogram(
+        f"{name}_request_latency_ms", f"{name} request latency in milliseconds"
+    )
+    return Timer(name=name, histogram=histogram)
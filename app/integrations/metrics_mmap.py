@@ -0,0 +1,158 @@
+from __future__ import annotations
+
+import fcntl
+import json
+import mmap
+import os
+import re
+import struct
+import threading
+from typing import Dict
+
+# Slab layout: an 8-byte header (bytes used, magic), then entries of
+# [u32 key length][utf-8 key, padded to 8 bytes][f64 value]. Values are
+# 8-byte aligned, so a reader in another process never sees a torn double.
+_HEADER = struct.Struct("<II")
+_KEY_LEN = struct.Struct("<I")
+_VALUE = struct.Struct("<d")
+_MAGIC = 0x534B4D31
+# fixed size, never remapped; the file is sparse, so untouched pages cost no disk
+SLAB_SIZE = 4 * 1024 * 1024
+
+_SLAB_NAME = re.compile(r"^metrics_(\d+)\.db$")
+ARCHIVE_NAME = "metrics_archive.json"
+
+
+def slab_path(directory: str, pid: int) -> str:
+    return os.path.join(directory, f"metrics_{pid}.db")
+
+
+class Slab:
+    # One process's metric values in a memory-mapped file. Only the owning
+    # process writes: updates go through a float64 view of the map, one slot
+    # add with no lock, like the in-process metrics. A lock is only taken to
+    # append a new series, and `used` is bumped after the entry is complete
+    # so a reader never parses half of one. Series keep `slots` and their
+    # slot index and update the view directly.
+
+    def __init__(self, path: str, size: int = SLAB_SIZE) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        self._offsets: Dict[str, int] = {}
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT | os.O_TRUNC, 0o644)
+        os.ftruncate(self._fd, size)
+        self._mm = mmap.mmap(self._fd, size)
+        self.slots = memoryview(self._mm).cast("d")
+        self._used = _HEADER.size
+        _HEADER.pack_into(self._mm, 0, self._used, _MAGIC)
+
+    def slot(self, key: str) -> int:
+        index = self._offsets.get(key)
+        if index is not None:
+            return index
+        with self._lock:
+            index = self._offsets.get(key)
+            if index is not None:
+                return index
+            encoded = key.encode()
+            entry = _KEY_LEN.size + len(encoded)
+            entry += -entry % 8
+            if self._used + entry + _VALUE.size > len(self._mm):
+                raise ValueError(f"metrics slab {self.path} is full")
+            start = self._used
+            _KEY_LEN.pack_into(self._mm, start, len(encoded))
+            self._mm[start + _KEY_LEN.size : start + _KEY_LEN.size + len(encoded)] = encoded
+            off = start + entry
+            _VALUE.pack_into(self._mm, off, 0.0)
+            self._used = off + _VALUE.size
+            _HEADER.pack_into(self._mm, 0, self._used, _MAGIC)
+            self._offsets[key] = off // _VALUE.size
+            return off // _VALUE.size
+
+    def close(self) -> None:
+        self.slots.release()
+        self._mm.close()
+        os.close(self._fd)
+
+
+def read_slab(path: str) -> Dict[str, float]:
+    with open(path, "rb") as f:
+        data = f.read()
+    if len(data) < _HEADER.size:
+        return {}
+    used, magic = _HEADER.unpack_from(data, 0)
+    if magic != _MAGIC:
+        return {}
+    used = min(used, len(data))
+    values: Dict[str, float] = {}
+    pos = _HEADER.size
+    while pos + _KEY_LEN.size <= used:
+        (length,) = _KEY_LEN.unpack_from(data, pos)
+        entry = _KEY_LEN.size + length
+        entry += -entry % 8
+        if pos + entry + _VALUE.size > used:
+            break
+        key = data[pos + _KEY_LEN.size : pos + _KEY_LEN.size + length].decode()
+        values[key] = _VALUE.unpack_from(data, pos + entry)[0]
+        pos += entry + _VALUE.size
+    return values
+
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _merge(into: Dict[str, float], values: Dict[str, float], mode_of) -> None:
+    for key, value in values.items():
+        if key in into and mode_of(key) == "max":
+            into[key] = max(into[key], value)
+        else:
+            into[key] = into.get(key, 0.0) + value
+
+
+def aggregate(directory: str, mode_of) -> Dict[str, float]:
+    # Combines every process's slab; mode_of(key) is "counter" (summed, and
+    # kept after the process exits), "sum" or "max" (gauges: live processes
+    # only). Slabs of dead processes are folded into the archive file and
+    # deleted. The directory lock keeps two scrapes from folding the same
+    # slab twice.
+    archive_path = os.path.join(directory, ARCHIVE_NAME)
+    live: list[Dict[str, float]] = []
+    with open(os.path.join(directory, ".lock"), "a") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            with open(archive_path) as f:
+                archive: Dict[str, float] = json.load(f)
+        except FileNotFoundError:
+            archive = {}
+        folded = False
+        for name in sorted(os.listdir(directory)):
+            match = _SLAB_NAME.match(name)
+            if match is None:
+                continue
+            path = os.path.join(directory, name)
+            try:
+                values = read_slab(path)
+            except FileNotFoundError:
+                continue
+            if _alive(int(match.group(1))):
+                live.append(values)
+                continue
+            _merge(archive, {k: v for k, v in values.items() if mode_of(k) == "counter"}, mode_of)
+            os.remove(path)
+            folded = True
+        if folded:
+            tmp = f"{archive_path}.{os.getpid()}.tmp"
+            with open(tmp, "w") as f:
+                json.dump(archive, f)
+            os.replace(tmp, archive_path)
+    totals = dict(archive)
+    for values in live:
+        _merge(totals, values, mode_of)
+    return totals
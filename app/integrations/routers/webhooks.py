@@ -1,30 +1,75 @@
 from __future__ import annotations
 
+import hashlib
+import json
 import os
 from fastapi import APIRouter, Request, HTTPException
+from fastapi.responses import JSONResponse
 
-from app.integrations.webhook_signing import verify_hmac_sha256
-from app.integrations.metrics import record_request, record_latency_ms
-import time
+from app.core.events import EventBus
+from app.integrations.metrics import timed_request
+from app.integrations.webhook_pipeline import (
+    PipelineNotRunning,
+    WebhookEvent,
+    WebhookPipeline,
+    WebhookQueueFull,
+)
+from app.integrations.webhook_signing import verify_hmac_sha256, verify_hmac_sha256_prefixed
 
 
 router = APIRouter(prefix="/integrations")
 
 
-@router.post("/webhooks/demo")
-async def demo_webhook(request: Request):
-    t0 = time.time()
-    time.sleep(0.2)
-    record_request()
+async def _process_webhook(event: WebhookEvent) -> None:
+    with timed_request("webhook"):
+        payload = json.loads(event.body) if event.body else None
+        await EventBus.emit_async(
+            "webhook_received", source=event.source, delivery_id=event.delivery_id, payload=payload
+        )
+
+
+webhook_pipeline = WebhookPipeline(
+    _process_webhook,
+    workers=int(os.getenv("WEBHOOK_WORKERS", "4")),
+    max_queue=int(os.getenv("WEBHOOK_QUEUE_SIZE", "1000")),
+)
 
+
+def _signature_ok(request: Request, body: bytes) -> bool:
     secret = os.getenv("WEBHOOK_SECRET", "dev-secret")
-    sig = request.headers.get("x-signature")
+    prefixed = request.headers.get("x-hub-signature-256")
+    if prefixed is not None:
+        return verify_hmac_sha256_prefixed(secret=secret, body=body, signature=prefixed)
+    signature = request.headers.get("x-signature")
+    return verify_hmac_sha256(secret=secret, body=body, signature=signature)
+
 
+def _delivery_id(request: Request, body: bytes) -> str:
+    # senders that omit a delivery id are de-duplicated on the exact payload
+    return (
+        request.headers.get("x-delivery-id")
+        or request.headers.get("x-github-delivery")
+        or hashlib.sha256(body).hexdigest()
+    )
+
+
+@router.post("/webhooks/demo", status_code=202)
+async def demo_webhook(request: Request):
     body = await request.body()
-    if not verify_hmac_sha256(secret=secret, body=body, signature=sig):
+    if not _signature_ok(request, body):
         raise HTTPException(status_code=401, detail="Invalid signature")
 
-    # pretend to do something with payload
-    # (intentionally minimal for demo)
-    record_latency_ms((time.time() - t0) * 1000.0)
-    return {"ok": True}
+    delivery_id = _delivery_id(request, body)
+    event = WebhookEvent(delivery_id=delivery_id, source="demo", body=body)
+    try:
+        accepted = webhook_pipeline.submit(event)
+    except WebhookQueueFull:
+        raise HTTPException(
+            status_code=429, detail="Webhook queue full", headers={"Retry-After": "1"}
+        )
+    except PipelineNotRunning:
+        raise HTTPException(status_code=503, detail="Webhook pipeline not running")
+
+    if not accepted:
+        return JSONResponse({"ok": True, "delivery_id": delivery_id, "duplicate": True})
+    return {"ok": True, "delivery_id": delivery_id}
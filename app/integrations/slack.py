@@ -43,10 +43,11 @@ async def send_slack_message(text: str, *, extra: Optional[Dict[str, Any]] = Non
     if not cfg:
         return False
 
-    async with get_httpx_client() as client:
-        payload = _build_payload(text, cfg, extra=extra)
-        await request_json(client, "POST", cfg.webhook_url, json=payload)
-        return True
+    client = get_httpx_client()
+    payload = _build_payload(text, cfg, extra=extra)
+    # incoming webhooks answer a plain-text "ok", not JSON
+    await request_json(client, "POST", cfg.webhook_url, json=payload, decode=False)
+    return True
 
 
 # DEAD (currently unused): richer blocks builder (common in real repos), not used by send_slack_message
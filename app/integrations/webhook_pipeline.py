@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class WebhookEvent:
+    delivery_id: str
+    source: str
+    body: bytes
+    received_at: float = field(default_factory=time.time)
+
+
+class WebhookQueueFull(Exception):
+    pass
+
+
+class PipelineNotRunning(Exception):
+    pass
+
+
+class DeliveryDeduper:
+    # Remembers delivery ids for `ttl_s` so provider redeliveries are dropped.
+    # Bounded: past `max_ids` the oldest ids are forgotten first.
+
+    def __init__(self, *, ttl_s: float = 3600.0, max_ids: int = 100_000) -> None:
+        self._ttl_s = ttl_s
+        self._max_ids = max_ids
+        self._seen: OrderedDict[str, float] = OrderedDict()
+
+    def claim(self, delivery_id: str) -> bool:
+        now = time.monotonic()
+        while self._seen:
+            oldest, expires_at = next(iter(self._seen.items()))
+            if expires_at > now and len(self._seen) < self._max_ids:
+                break
+            del self._seen[oldest]
+        if delivery_id in self._seen:
+            return False
+        self._seen[delivery_id] = now + self._ttl_s
+        return True
+
+    def release(self, delivery_id: str) -> None:
+        self._seen.pop(delivery_id, None)
+
+
+class WebhookPipeline:
+    # Accept fast, process later: submit() only enqueues, and a fixed pool of
+    # worker tasks drains the bounded queue. A full queue is the caller's signal
+    # to push back (HTTP 429) instead of buffering without limit.
+
+    def __init__(
+        self,
+        handler: Callable[[WebhookEvent], Awaitable[None]],
+        *,
+        workers: int = 4,
+        max_queue: int = 1000,
+        deduper: Optional[DeliveryDeduper] = None,
+    ) -> None:
+        self._handler = handler
+        self._workers = workers
+        self._max_queue = max_queue
+        self._deduper = deduper or DeliveryDeduper()
+        self._queue: Optional[asyncio.Queue[WebhookEvent]] = None
+        self._tasks: list[asyncio.Task] = []
+        self.stats: Dict[str, int] = {
+            "accepted": 0,
+            "duplicates": 0,
+            "rejected": 0,
+            "processed": 0,
+            "failed": 0,
+        }
+
+    @property
+    def running(self) -> bool:
+        return self._queue is not None
+
+    def depth(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def start(self) -> None:
+        if self._queue is not None:
+            return
+        self._queue = asyncio.Queue(maxsize=self._max_queue)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self._workers)]
+
+    async def stop(self, drain_timeout: float = 5.0) -> None:
+        if self._queue is None:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), drain_timeout)
+        except asyncio.TimeoutError:
+            logger.warning("webhook queue stopped with %d events pending", self.depth())
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._queue, self._tasks = None, []
+
+    def submit(self, event: WebhookEvent) -> bool:
+        # False means a duplicate delivery; raises WebhookQueueFull / PipelineNotRunning
+        if self._queue is None:
+            raise PipelineNotRunning()
+        if not self._deduper.claim(event.delivery_id):
+            self.stats["duplicates"] += 1
+            return False
+        try:
+            self._queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # not accepted, so a redelivery must not be treated as a duplicate
+            self._deduper.release(event.delivery_id)
+            self.stats["rejected"] += 1
+            raise WebhookQueueFull()
+        self.stats["accepted"] += 1
+        return True
+
+    async def _worker(self) -> None:
+        assert self._queue is not None
+        queue = self._queue
+        while True:
+            # one event per get() so a burst spreads over every worker; nothing
+            # sits drained-but-unprocessed in a worker when it is cancelled
+            event = await queue.get()
+            try:
+                await self._handler(event)
+                self.stats["processed"] += 1
+            except Exception:
+                self.stats["failed"] += 1
+                logger.exception("webhook %s failed", event.delivery_id)
+            finally:
+                queue.task_done()
@@ -26,7 +26,6 @@ def verify_hmac_sha256(
     return _safe_str_eq(expected, signature)
 
 
-# DEAD (currently unused): alternative signature format, not referenced anywhere
 def verify_hmac_sha256_prefixed(
     *,
     secret: str,
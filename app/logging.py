@@ -1,8 +1,65 @@
+import atexit
+import json
 import logging
 import math  # UNUSED (demo)
+import queue
+from logging.handlers import QueueHandler, QueueListener
+
+ACCESS_LOGGER = "app.access"
+ACCESS_LOG_QUEUE_SIZE = 10_000
+
+_access_listener: QueueListener | None = None
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        entry.update(getattr(record, "fields", {}))
+        return json.dumps(entry, default=str)
+
+
+class _DroppingQueueHandler(QueueHandler):
+    # Formatting happens on the listener thread, not here; and a full queue
+    # drops the record rather than blocking the request that logged it.
+
+    def __init__(self, log_queue: queue.Queue) -> None:
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def configure_access_log() -> logging.Logger:
+    # idempotent: create_app() may run several times in one process
+    global _access_listener
+    access = logging.getLogger(ACCESS_LOGGER)
+    if _access_listener is None:
+        log_queue: queue.Queue = queue.Queue(maxsize=ACCESS_LOG_QUEUE_SIZE)
+        sink = logging.StreamHandler()
+        sink.setFormatter(JsonFormatter())
+        _access_listener = QueueListener(log_queue, sink, respect_handler_level=True)
+        _access_listener.start()
+        atexit.register(_access_listener.stop)
+        access.addHandler(_DroppingQueueHandler(log_queue))
+        access.setLevel(logging.INFO)
+        access.propagate = False
+    return access
 
 
 def configure_logging():
     logging.basicConfig(
         level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
     )
+    configure_access_log()
@@ -1,4 +1,5 @@
 from fastapi import FastAPI
+from app.config import get_settings
 from app.logging import configure_logging
 from app.api.routers import api_router
 from app.db.session import init_db
@@ -7,9 +8,21 @@ from app.services.export_service import run_export  # uses dynamic dispatch
 from app.api.handlers import dispatch  # uses string-based handler map
 from app.core.registry import get_handler  # uses __init_subclass__ registry
 from app.services.report_service import search  # active; v1/v2 are dead
-from app.core.middleware import RequestLoggingMiddleware
+from app.core.load_shedding import AdaptiveConcurrencyLimiter
+from app.core.middleware import (
+    CorrelationIdMiddleware,
+    LoadSheddingMiddleware,
+    RateLimitMiddleware,
+    RequestLoggingMiddleware,
+)
+from app.core.rate_limit import InMemoryRateLimitStore, RedisRateLimitStore
+from app.core.tracing import tracer
 from app.core.auth import hash_api_key
+from app.core.cache import RedisCache, configure_cache
 from app.core.pagination import PageParams
+from app.services.audit_service import audit_writer
+from app.services.notification_service import notification_scheduler
+from app.services.tasks import TASK_PRIORITY_LOW, enqueue, task_worker
 
 # UNUSED: not used anywhere in runtime
 APP_DISPLAY_NAME = "Skylos Demo API"  # UNUSED
@@ -17,13 +30,47 @@ APP_DISPLAY_NAME = "Skylos Demo API"  # UNUSED
 
 def create_app() -> FastAPI:
     configure_logging()
+    settings = get_settings()
+    if settings.redis_url:
+        configure_cache(RedisCache(settings.redis_url))
 
     app = FastAPI(
         title="Skylos Demo API",
         version="0.1.1",
     )
 
-    app.add_middleware(RequestLoggingMiddleware)
+    if settings.load_shedding:
+        # innermost: rate-limited clients never take a slot or a queue place
+        app.add_middleware(
+            LoadSheddingMiddleware,
+            limiter=AdaptiveConcurrencyLimiter(
+                initial_limit=settings.load_shed_initial_limit,
+                max_limit=settings.load_shed_max_limit,
+                latency_target_s=settings.load_shed_latency_target_ms / 1000,
+                max_queue=settings.load_shed_max_queue,
+            ),
+        )
+    if settings.rate_limit_requests:
+        if settings.rate_limit_redis_url:
+            store = RedisRateLimitStore(settings.rate_limit_redis_url)
+        else:
+            store = InMemoryRateLimitStore(max_keys=settings.rate_limit_max_clients)
+        # inside the access log, so rejected requests are still logged
+        app.add_middleware(
+            RateLimitMiddleware,
+            max_requests=settings.rate_limit_requests,
+            window_seconds=settings.rate_limit_window_s,
+            key_by=[k.strip() for k in settings.rate_limit_key_by.split(",") if k.strip()],
+            store=store,
+        )
+    app.add_middleware(
+        RequestLoggingMiddleware,
+        sample_rate=settings.access_log_sample_rate,
+        slow_ms=settings.access_log_slow_ms,
+    )
+    # added last so it runs first: the access log already sees the correlation id
+    app.add_middleware(CorrelationIdMiddleware)
+    tracer.configure(enabled=settings.tracing_enabled, max_spans=settings.trace_buffer_size)
     app.state.api_key_hasher = hash_api_key
     app.state.default_page_params = PageParams
 
@@ -34,6 +81,23 @@ def create_app() -> FastAPI:
     @app.on_event("startup")
     def _startup() -> None:
         init_db()
+        audit_writer.start()
+        if settings.task_workers:
+            task_worker.start()
+        notification_scheduler.start()
+        enqueue(
+            "purge_soft_deletes",
+            {"days": 30},
+            priority=TASK_PRIORITY_LOW,
+            interval_s=24 * 3600,
+            unique_key="purge_soft_deletes",
+        )
+
+    @app.on_event("shutdown")
+    def _shutdown() -> None:
+        notification_scheduler.stop()
+        task_worker.stop()
+        audit_writer.stop()
 
     return app
 
@@ -13,6 +13,17 @@ class NoteOut(BaseModel):
     body: str
 
 
+class NoteImportError(BaseModel):
+    index: int
+    error: str
+
+
+class NoteImportResult(BaseModel):
+    imported: int = 0
+    failed: int = 0
+    errors: list[NoteImportError] = Field(default_factory=list)
+
+
 class NoteUpdate(BaseModel):
     title: str = Field(min_length=1, max_length=200)
     body: str = Field(min_length=1, max_length=10_000)
@@ -0,0 +1,14 @@
+# app/schemas/notifications.py
+from datetime import datetime
+
+from pydantic import BaseModel, Field
+
+from app.services.notification_service import NotificationChannel
+
+
+class NotificationScheduleIn(BaseModel):
+    channel: NotificationChannel
+    recipient: str = Field(min_length=1, max_length=200)
+    message: str = Field(min_length=1, max_length=10_000)
+    # omitted: send as soon as possible
+    send_at: datetime | None = None
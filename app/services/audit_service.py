@@ -1,11 +1,24 @@
 from __future__ import annotations
 
-from dataclasses import dataclass, field
-from datetime import datetime
-from typing import Any
+import logging
+import threading
+import zlib
+from collections import deque
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Iterable, Iterator, Mapping
 
+from sqlalchemy import Connection, Engine, RowMapping, insert, select
 
-AUDIT_RETENTION_DAYS = 90  # UNUSED (demo)
+from app.config import get_settings
+from app.core.events import EventBus
+from app.db.models import AuditLog
+from app.db.session import engine
+from app.services.export_service import stream_csv
+
+logger = logging.getLogger(__name__)
+
+AUDIT_RETENTION_DAYS = 90
 
 
 @dataclass
@@ -17,8 +30,108 @@ class AuditEntry:
     timestamp: str = field(default_factory=lambda: datetime.utcnow().isoformat())
 
 
-# NOTE: swap to DB-backed via AuditLog model later
-_audit_store: list[AuditEntry] = []
+class AuditWriter:
+    # Write-behind buffer for audit_log. log_action() only appends to a bounded
+    # ring; a background thread flushes it in batches once `batch_size` entries
+    # are waiting or every `flush_interval_s`. If the database falls so far
+    # behind that the ring fills, the oldest entries are dropped and counted.
+
+    def __init__(
+        self,
+        engine: Engine,
+        *,
+        capacity: int = 100_000,
+        batch_size: int = 500,
+        flush_interval_s: float = 1.0,
+    ) -> None:
+        self._engine = engine
+        self._buffer: deque[AuditEntry] = deque(maxlen=capacity)
+        self._batch_size = batch_size
+        self._flush_interval_s = flush_interval_s
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self.dropped = 0
+        self.written = 0
+
+    def append(self, entry: AuditEntry) -> None:
+        with self._lock:
+            if len(self._buffer) == self._buffer.maxlen:
+                self.dropped += 1
+            self._buffer.append(entry)
+            full_batch = len(self._buffer) >= self._batch_size
+        if full_batch:
+            self._wakeup.set()
+
+    def pending(self) -> int:
+        return len(self._buffer)
+
+    def flush(self) -> int:
+        # writes everything buffered so far; safe to call from any thread
+        written = 0
+        with self._flush_lock:
+            while True:
+                with self._lock:
+                    n = min(len(self._buffer), self._batch_size)
+                    batch = [self._buffer.popleft() for _ in range(n)]
+                if not batch:
+                    return written
+                try:
+                    with self._engine.begin() as conn:
+                        conn.execute(insert(AuditLog.__table__), [asdict(e) for e in batch])
+                except Exception:
+                    # put the batch back in order and let the next tick retry;
+                    # entries appended meanwhile may leave no room for all of
+                    # it, and then its oldest entries are the ones dropped
+                    with self._lock:
+                        room = self._buffer.maxlen - len(self._buffer)
+                        if room < len(batch):
+                            self.dropped += len(batch) - room
+                            batch = batch[len(batch) - room :] if room else []
+                        self._buffer.extendleft(reversed(batch))
+                    raise
+                written += len(batch)
+                self.written += len(batch)
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        # drains the buffer before returning
+        if self._thread is not None:
+            self._stop.set()
+            self._wakeup.set()
+            self._thread.join(timeout)
+            self._thread = None
+        try:
+            self.flush()
+        except Exception:
+            # runs from the shutdown hook; the entries are lost either way
+            logger.exception("final audit flush failed; %d entries lost", self.pending())
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._wakeup.wait(self._flush_interval_s)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("audit flush failed; %d entries pending", self.pending())
+
+
+_settings = get_settings()
+audit_writer = AuditWriter(
+    engine,
+    capacity=_settings.audit_buffer_size,
+    batch_size=_settings.audit_batch_size,
+    flush_interval_s=_settings.audit_flush_interval_s,
+)
 
 
 def log_action(
@@ -33,22 +146,43 @@ def log_action(
         entity_id=entity_id,
         actor=actor,
     )
-    _audit_store.append(entry)
-    print(f"[audit] {actor} {action} {entity_type}#{entity_id}")
+    audit_writer.append(entry)
     return entry
 
 
-def query_audit_log(  # UNUSED (demo)
+def query_audit_log(
     entity_type: str = "",
     entity_id: int | None = None,
     limit: int = 50,
 ) -> list[AuditEntry]:
-    results = _audit_store
+    # flush first so callers see their own writes; served by ix_audit_log_entity
+    audit_writer.flush()
+    table = AuditLog.__table__
+    stmt = select(
+        table.c.action, table.c.entity_type, table.c.entity_id, table.c.actor, table.c.timestamp
+    )
     if entity_type:
-        results = [e for e in results if e.entity_type == entity_type]
+        stmt = stmt.where(table.c.entity_type == entity_type)
     if entity_id is not None:
-        results = [e for e in results if e.entity_id == entity_id]
-    return results[-limit:]
+        stmt = stmt.where(table.c.entity_id == entity_id)
+    stmt = stmt.order_by(table.c.timestamp.desc(), table.c.id.desc()).limit(limit)
+    with engine.connect() as conn:
+        rows = conn.execute(stmt).mappings().all()
+    return [AuditEntry(**row) for row in reversed(rows)]
+
+
+@EventBus.on("note_created")
+def _audit_note_created(
+    note_id: int | None = None, note_ids: Iterable[int] = (), **kwargs: Any
+) -> None:
+    # single creates carry note_id, imports a chunk's note_ids
+    for created in [note_id] if note_id is not None else note_ids:
+        log_action("create", "note", created)
+
+
+@EventBus.on("note_updated")
+def _audit_note_updated(note_id: int, **kwargs: Any) -> None:
+    log_action("update", "note", note_id)
 
 
 def _redact_sensitive_fields(  # UNUSED (demo)
@@ -59,10 +193,44 @@ def _redact_sensitive_fields(  # UNUSED (demo)
     return {k: "***" if k in sensitive_keys else v for k, v in entry.items()}
 
 
-# TODO: wire into /admin/audit/export once admin auth is ready
-def export_audit_csv(entries: list[AuditEntry]) -> str:  # UNUSED (demo)
-    header = "action,entity_type,entity_id,actor,timestamp"
-    lines = [header]
-    for e in entries:
-        lines.append(f"{e.action},{e.entity_type},{e.entity_id},{e.actor},{e.timestamp}")
-    return "\n".join(lines)
+AUDIT_EXPORT_FIELDS = ("action", "entity_type", "entity_id", "actor", "timestamp")
+
+
+def iter_audit_log(
+    conn: Connection, since: str | None = None, batch_size: int = 1000
+) -> Iterator[RowMapping]:
+    # server-side cursor in timestamp order, which the timestamp index serves without a sort
+    table = AuditLog.__table__
+    stmt = (
+        select(*(table.c[f] for f in AUDIT_EXPORT_FIELDS))
+        .order_by(table.c.timestamp, table.c.id)
+        .execution_options(yield_per=batch_size)
+    )
+    if since is not None:
+        stmt = stmt.where(table.c.timestamp >= since)
+    yield from conn.execute(stmt).mappings()
+
+
+def export_audit_csv(
+    entries: Iterable[Mapping[str, Any]], *, compress: bool = False
+) -> Iterator[bytes]:
+    chunks = (piece.encode() for piece in stream_csv(entries, AUDIT_EXPORT_FIELDS))
+    if not compress:
+        yield from chunks
+        return
+    # wbits=31: a gzip container rather than a raw zlib stream
+    gz = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        out = gz.compress(chunk)
+        if out:
+            yield out
+    yield gz.flush()
+
+
+def stream_audit_export(
+    days: int = AUDIT_RETENTION_DAYS, *, compress: bool = False, batch_size: int = 1000
+) -> Iterator[bytes]:
+    audit_writer.flush()
+    since = (datetime.utcnow() - timedelta(days=days)).isoformat()
+    with engine.connect() as conn:
+        yield from export_audit_csv(iter_audit_log(conn, since, batch_size), compress=compress)
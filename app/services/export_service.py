@@ -1,3 +1,20 @@
+import csv
+import io
+import json
+from typing import Any, Iterable, Iterator, Mapping, Sequence
+from xml.sax.saxutils import escape
+
+# flush to the client in ~64 KiB pieces rather than one ASGI message per row
+STREAM_CHUNK_BYTES = 64 * 1024
+
+EXPORT_MEDIA_TYPES = {
+    "csv": "text/csv",
+    "json": "application/json",
+    "ndjson": "application/x-ndjson",
+    "xml": "application/xml",
+}
+
+
 def export_csv(data: list) -> str:
     return "\n".join(",".join(str(v) for v in row) for row in data)
 
@@ -19,3 +36,62 @@ def run_export(data: list, fmt: str) -> str:
     if handler is None:
         raise ValueError(f"Unknown export format: {fmt}")
     return handler(data)
+
+
+def stream_csv(rows: Iterable[Mapping[str, Any]], fields: Sequence[str]) -> Iterator[str]:
+    buf = io.StringIO()
+    writer = csv.writer(buf, lineterminator="\n")
+    writer.writerow(fields)
+    for row in rows:
+        writer.writerow([row[f] for f in fields])
+        if buf.tell() >= STREAM_CHUNK_BYTES:
+            yield buf.getvalue()
+            buf.seek(0)
+            buf.truncate()
+    yield buf.getvalue()
+
+
+def stream_ndjson(rows: Iterable[Mapping[str, Any]], fields: Sequence[str]) -> Iterator[str]:
+    for row in rows:
+        yield json.dumps({f: row[f] for f in fields}) + "\n"
+
+
+def stream_json(rows: Iterable[Mapping[str, Any]], fields: Sequence[str]) -> Iterator[str]:
+    yield "["
+    sep = ""
+    for row in rows:
+        yield sep + json.dumps({f: row[f] for f in fields})
+        sep = ","
+    yield "]"
+
+
+def stream_xml(rows: Iterable[Mapping[str, Any]], fields: Sequence[str]) -> Iterator[str]:
+    yield "<data>"
+    for row in rows:
+        yield "<item>" + "".join(f"<{f}>{escape(str(row[f]))}</{f}>" for f in fields) + "</item>"
+    yield "</data>"
+
+
+def _rechunk(pieces: Iterator[str]) -> Iterator[bytes]:
+    parts: list[str] = []
+    size = 0
+    for piece in pieces:
+        parts.append(piece)
+        size += len(piece)
+        if size >= STREAM_CHUNK_BYTES:
+            yield "".join(parts).encode()
+            parts, size = [], 0
+    if parts:
+        yield "".join(parts).encode()
+
+
+def stream_export(
+    rows: Iterable[Mapping[str, Any]], fmt: str, fields: Sequence[str]
+) -> Iterator[bytes]:
+    import sys
+
+    # resolved eagerly so an unknown format fails before any bytes are sent
+    handler = getattr(sys.modules[__name__], f"stream_{fmt}", None)
+    if handler is None:
+        raise ValueError(f"Unknown export format: {fmt}")
+    return _rechunk(handler(rows, fields))
@@ -1,27 +1,123 @@
 # app/services/notes_services.py
+from typing import Any, Iterator
+
+from pydantic import ValidationError
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
+from app.core.pagination import CursorParams, PageParams
 from app.db import crud
-from app.schemas.notes import NoteCreate
+from app.schemas.notes import NoteCreate, NoteImportError, NoteImportResult, NoteUpdate
 from app.core.decorators import retry, log_execution
 from app.core.events import EventBus
+from app.core.tracing import traced
+from app.services.export_service import stream_export
 
 
+@traced(cat="service")
 @retry(max_attempts=2, delay=0.05)
 @log_execution
 def create_note(db: Session, payload: NoteCreate):
     result = crud.create_note(db, payload)
-    EventBus.emit("note_created", title=payload.title)
+    EventBus.emit("note_created", note_id=result.id, title=payload.title)
     return result
 
 
-def list_notes(db: Session):
-    return crud.list_notes(db)
+@traced(cat="service")
+@retry(max_attempts=2, delay=0.05)
+@log_execution
+async def create_note_async(db: AsyncSession, payload: NoteCreate):
+    result = await crud.create_note_async(db, payload)
+    EventBus.emit("note_created", note_id=result.id, title=payload.title)
+    return result
+
+
+NOTE_EXPORT_FIELDS = ("id", "title", "body")
+
+# only the first few errors are echoed back; `failed` still counts all of them
+MAX_IMPORT_ERRORS = 100
+
+
+class NoteImporter:
+    def __init__(self, db: Session, chunk_size: int):
+        self._db = db
+        self._chunk_size = chunk_size
+        self._pending: list[tuple[int, NoteCreate]] = []
+        self.result = NoteImportResult()
+
+    def add(self, index: int, item: Any) -> bool:
+        # returns True once a full chunk is waiting for flush()
+        try:
+            self._pending.append((index, NoteCreate.model_validate(item)))
+        except ValidationError as exc:
+            self.fail(index, exc.errors()[0]["msg"])
+        return len(self._pending) >= self._chunk_size
+
+    def fail(self, index: int, error: str) -> None:
+        self.result.failed += 1
+        if len(self.result.errors) < MAX_IMPORT_ERRORS:
+            self.result.errors.append(NoteImportError(index=index, error=error))
+
+    def flush(self) -> None:
+        chunk, self._pending = self._pending, []
+        if not chunk:
+            return
+        try:
+            ids = crud.bulk_create_notes(self._db, [payload for _, payload in chunk])
+        except SQLAlchemyError as exc:
+            self._db.rollback()
+            for index, _ in chunk:
+                self.fail(index, type(exc).__name__)
+            return
+        self.result.imported += len(ids)
+        EventBus.emit("note_created", title=f"{len(ids)} imported notes", note_ids=ids)
+
+
+@traced(cat="service")
+def update_note(db: Session, note_id: int, payload: NoteUpdate):
+    note = crud.update_note(db, note_id, payload)
+    if note is not None:
+        EventBus.emit("note_updated", note_id=note_id, title=payload.title)
+    return note
+
+
+@traced(cat="service")
+async def update_note_async(db: AsyncSession, note_id: int, payload: NoteUpdate):
+    note = await crud.update_note_async(db, note_id, payload)
+    if note is not None:
+        EventBus.emit("note_updated", note_id=note_id, title=payload.title)
+    return note
+
+
+@traced(cat="service")
+def list_notes(db: Session, params: PageParams | CursorParams):
+    if isinstance(params, CursorParams):
+        return crud.list_notes_after(db, params)
+    return crud.list_notes(db, params)
+
+
+@traced(cat="service")
+async def list_notes_async(db: AsyncSession, params: PageParams | CursorParams):
+    if isinstance(params, CursorParams):
+        return await crud.list_notes_after_async(db, params)
+    return await crud.list_notes_async(db, params)
+
+
+def export_notes(db: Session, fmt: str, batch_size: int = 1000) -> Iterator[bytes]:
+    return stream_export(crud.iter_notes(db, batch_size), fmt, NOTE_EXPORT_FIELDS)
+
+
+@traced(cat="service")
+def search_notes(db: Session, q: str, limit: int = 50):
+    q = q.strip()
+    return crud.search_notes(db, q, limit=limit)
 
 
-def search_notes(db: Session, q: str):
+@traced(cat="service")
+async def search_notes_async(db: AsyncSession, q: str, limit: int = 50):
     q = q.strip()
-    return crud.search_notes(db, q)
+    return await crud.search_notes_async(db, q, limit=limit)
 
 
 def normalize_and_score_query(q: str, *, mode: str = "default") -> int:
@@ -1,10 +1,28 @@
 from __future__ import annotations
 
-import sys
-from dataclasses import dataclass, field
-from datetime import datetime
+import asyncio
+import functools
+import heapq
+import logging
+import threading
+import time
+from concurrent.futures import Future
+from concurrent.futures import wait as wait_futures
+from dataclasses import dataclass, field, fields
+from datetime import datetime, timezone
 from enum import Enum
-from typing import Any
+from typing import Any, Awaitable, Callable
+
+import httpx
+from sqlalchemy import Engine, bindparam, func, insert, or_, select, tuple_, update
+
+from app.core.rate_limit import TokenBucket
+from app.db.models import ScheduledNotification
+from app.db.session import engine
+from app.services.notification_templates import templates
+from app.integrations.slack import send_slack_message
+
+logger = logging.getLogger(__name__)
 
 
 class NotificationChannel(Enum):
@@ -13,7 +31,43 @@ class NotificationChannel(Enum):
     SMS = "sms"
 
 
-MAX_BATCH_SIZE = 500  # UNUSED (demo)
+MAX_BATCH_SIZE = 500
+
+# sends of one bulk call that fail with these are retried with backoff
+TRANSIENT_ERRORS: tuple[type[BaseException], ...] = (
+    ConnectionError,
+    TimeoutError,
+    httpx.TransportError,
+)
+
+
+@dataclass(frozen=True)
+class ChannelPolicy:
+    concurrency: int
+    rate_per_s: float
+    burst: int
+    # >1: messages to the same recipient go out in one provider call
+    batch_size: int = 1
+    max_attempts: int = 3
+    backoff_s: float = 0.5
+
+
+CHANNEL_POLICIES: dict[NotificationChannel, ChannelPolicy] = {
+    NotificationChannel.EMAIL: ChannelPolicy(concurrency=10, rate_per_s=50.0, burst=50),
+    # incoming webhooks allow about one post per second per channel
+    NotificationChannel.SLACK: ChannelPolicy(concurrency=2, rate_per_s=1.0, burst=5, batch_size=20),
+    NotificationChannel.SMS: ChannelPolicy(concurrency=5, rate_per_s=10.0, burst=10),
+}
+
+
+@dataclass
+class NotificationResult:
+    index: int
+    channel: str
+    recipient: str
+    status: str = "pending"  # sent | failed | invalid
+    attempts: int = 0
+    error: str | None = None
 
 
 def _dispatch_email(recipient: str, message: str) -> None:
@@ -28,54 +82,466 @@ def _dispatch_sms(recipient: str, message: str) -> None:
     print(f"[sms] {recipient}: {message}")
 
 
-def send_notification(channel: NotificationChannel, recipient: str, message: str) -> None:
-    dispatcher = getattr(sys.modules[__name__], f"_dispatch_{channel.value}", None)
+async def _dispatch_slack_batch(recipient: str, messages: list[str]) -> None:
+    # one webhook post per batch; without a configured webhook fall back to
+    # the per-message dispatcher
+    if not await send_slack_message("\n".join(messages), extra={"channel": f"#{recipient}"}):
+        for message in messages:
+            _dispatch_slack(recipient, message)
+
+
+_DISPATCHERS: dict[NotificationChannel, Callable[[str, str], None]] = {
+    NotificationChannel.EMAIL: _dispatch_email,
+    NotificationChannel.SLACK: _dispatch_slack,
+    NotificationChannel.SMS: _dispatch_sms,
+}
+
+_BATCH_DISPATCHERS: dict[NotificationChannel, Callable[[str, list[str]], Awaitable[None]]] = {
+    NotificationChannel.SLACK: _dispatch_slack_batch,
+}
+
+# provider rate limits are per process, not per bulk call
+_buckets: dict[NotificationChannel, TokenBucket] = {
+    channel: TokenBucket(policy.rate_per_s, policy.burst)
+    for channel, policy in CHANNEL_POLICIES.items()
+}
+
+
+# UNUSED (demo): bulk sends go through _send_batch
+def send_notification(  # UNUSED (demo)
+    channel: NotificationChannel, recipient: str, message: str
+) -> None:
+    dispatcher = _DISPATCHERS.get(channel)
     if dispatcher is None:
         raise ValueError(f"No dispatcher for channel: {channel.value}")
     dispatcher(recipient, message)
 
 
-def send_bulk_notifications(notifications: list[dict[str, Any]]) -> int:  # UNUSED (demo)
-    sent = 0
-    for n in notifications[:MAX_BATCH_SIZE]:
+def _is_transient(exc: BaseException) -> bool:
+    # request_json wraps exhausted transport errors in RuntimeError
+    return isinstance(exc, TRANSIENT_ERRORS) or isinstance(exc.__cause__, TRANSIENT_ERRORS)
+
+
+async def _send_batch(
+    channel: NotificationChannel,
+    recipient: str,
+    batch: list[tuple[int, str]],
+    results: list[NotificationResult],
+    semaphore: asyncio.Semaphore,
+) -> None:
+    policy = CHANNEL_POLICIES[channel]
+    messages = [message for _, message in batch]
+    for attempt in range(1, policy.max_attempts + 1):
         try:
-            send_notification(
-                NotificationChannel(n["channel"]),
-                n["recipient"],
-                n["message"],
-            )
-            sent += 1
-        except Exception:
-            pass
-    return sent
+            async with semaphore:
+                await _buckets[channel].acquire()
+                if channel in _BATCH_DISPATCHERS:
+                    await _BATCH_DISPATCHERS[channel](recipient, messages)
+                else:
+                    # providers are blocking clients; keep them off the loop
+                    await asyncio.to_thread(_DISPATCHERS[channel], recipient, messages[0])
+            status, error = "sent", None
+        except Exception as exc:
+            status, error = "failed", repr(exc)
+            if _is_transient(exc) and attempt < policy.max_attempts:
+                logger.warning(
+                    "%s to %s failed (attempt %d): %r", channel.value, recipient, attempt, exc
+                )
+                await asyncio.sleep(policy.backoff_s * 2 ** (attempt - 1))
+                continue
+        for index, _ in batch:
+            result = results[index]
+            result.status, result.error, result.attempts = status, error, attempt
+        return
+
+
+def _render_bulk(notifications: list[dict[str, Any]]) -> dict[int, str | Exception]:
+    # items with a "template" are rendered per template: one lookup, then
+    # render_many over all of its contexts
+    by_template: dict[str, list[int]] = {}
+    for index, n in enumerate(notifications):
+        if "template" in n:
+            by_template.setdefault(n["template"], []).append(index)
+    rendered: dict[int, str | Exception] = {}
+    for name, indexes in by_template.items():
+        contexts = [notifications[i].get("context") or {} for i in indexes]
+        try:
+            messages: list[str | Exception] = list(templates.render_many(name, contexts))
+        except KeyError as exc:
+            messages = [exc] * len(indexes)
+        rendered.update(zip(indexes, messages))
+    return rendered
+
+
+async def dispatch_notifications(notifications: list[dict[str, Any]]) -> list[NotificationResult]:
+    results: list[NotificationResult] = []
+    rendered = _render_bulk(notifications)
+    grouped: dict[tuple[NotificationChannel, str], list[tuple[int, str]]] = {}
+    for index, n in enumerate(notifications):
+        recipient = str(n.get("recipient", ""))
+        result = NotificationResult(index, str(n.get("channel", "")), recipient)
+        results.append(result)
+        try:
+            channel = NotificationChannel(n["channel"])
+            message = rendered[index] if "template" in n else n["message"]
+            if isinstance(message, Exception):
+                raise message
+        except (KeyError, ValueError) as exc:
+            result.status, result.error = "invalid", repr(exc)
+            continue
+        grouped.setdefault((channel, recipient), []).append((index, message))
+
+    semaphores = {
+        channel: asyncio.Semaphore(policy.concurrency)
+        for channel, policy in CHANNEL_POLICIES.items()
+    }
+    sends = []
+    for (channel, recipient), items in grouped.items():
+        size = CHANNEL_POLICIES[channel].batch_size
+        for start in range(0, len(items), size):
+            batch = items[start : start + size]
+            sends.append(_send_batch(channel, recipient, batch, results, semaphores[channel]))
+    await asyncio.gather(*sends)
+    return results
+
+
+async def send_bulk_notifications(
+    notifications: list[dict[str, Any]],
+) -> list[NotificationResult]:
+    if len(notifications) > MAX_BATCH_SIZE:
+        raise ValueError(f"at most {MAX_BATCH_SIZE} notifications per call")
+    return await dispatch_notifications(notifications)
 
 
 def _render_template(template_name: str, context: dict[str, Any]) -> str:  # UNUSED (demo)
-    template = f"<{template_name}>"
-    for key, value in context.items():
-        template = template.replace(f"{{{{{key}}}}}", str(value))
-    return template
+    return templates.render(template_name, context)
 
 
 @dataclass
-class NotificationLog:  # UNUSED (demo)
+class NotificationLog:
+    id: int | None = None
     channel: str = ""
     recipient: str = ""
     message: str = ""
-    sent_at: str = field(default_factory=lambda: datetime.utcnow().isoformat())
-    status: str = "pending"
+    send_at: float = field(default_factory=time.time)
+    # scheduled -> sending -> sent | failed, or scheduled -> cancelled
+    status: str = "scheduled"
+    sent_at: float | None = None
+    attempts: int = 0
+    error: str | None = None
+
+
+class NotificationScheduler:
+    # Pending notifications live in notification_log, and its (status, send_at,
+    # id) index is the durable priority queue: O(log n) inserts and a range scan
+    # for what is due. Only rows due within `horizon_s` are pulled into an
+    # in-memory heap, so memory stays flat with millions pending and the timer
+    # thread can sleep exactly until the next one is due. Rows due before the
+    # load watermark are pushed straight onto the heap by schedule(); rows
+    # written by other processes are picked up by the next refill.
+    # Every worker process runs a scheduler. A claimed row holds a `lease_s`
+    # lease; rows whose lease lapsed (their sender died) are taken back by
+    # whichever scheduler refills next, so delivery is at-least-once.
+
+    def __init__(
+        self,
+        engine: Engine,
+        *,
+        horizon_s: float = 60.0,
+        max_loaded: int = 10_000,
+        refill_interval_s: float = 1.0,
+        lease_s: float = 300.0,
+    ) -> None:
+        self._engine = engine
+        self._lease_s = lease_s
+        self._horizon_s = horizon_s
+        self._max_loaded = max_loaded
+        self._refill_interval_s = refill_interval_s
+        self._heap: list[tuple[float, int]] = []
+        # every scheduled row ordered at or before (send_at, id) is on the heap
+        self._watermark: tuple[float, int] = (0.0, 0)
+        self._window_loaded = False
+        self._next_refill = 0.0
+        self._lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._inflight: set[Future] = set()
+        self.stats = {"fired": 0, "sent": 0, "failed": 0, "max_lateness_ms": 0.0}
+
+    def schedule(
+        self, channel: NotificationChannel, recipient: str, message: str, send_at: float
+    ) -> NotificationLog:
+        (row_id,) = self.schedule_many([(channel, recipient, message, send_at)])
+        return NotificationLog(row_id, channel.value, recipient, message, send_at)
+
+    def schedule_many(
+        self, items: list[tuple[NotificationChannel, str, str, float]]
+    ) -> list[int]:
+        table = ScheduledNotification.__table__
+        rows = [
+            {
+                "channel": channel.value,
+                "recipient": recipient,
+                "message": message,
+                "send_at": send_at,
+                "status": "scheduled",
+                "attempts": 0,
+            }
+            for channel, recipient, message, send_at in items
+        ]
+        if not rows:
+            return []
+        with self._engine.begin() as conn:
+            ids = conn.execute(
+                insert(table).returning(table.c.id, sort_by_parameter_order=True), rows
+            ).scalars().all()
+        with self._lock:
+            pushed = False
+            for row, row_id in zip(rows, ids):
+                if (row["send_at"], row_id) <= self._watermark:
+                    heapq.heappush(self._heap, (row["send_at"], row_id))
+                    pushed = True
+        if pushed:
+            self.wakeup.set()
+        return ids
+
+    def cancel(self, notification_id: int) -> bool:
+        # a cancelled row left on the heap is skipped when its claim finds nothing
+        table = ScheduledNotification.__table__
+        with self._engine.begin() as conn:
+            result = conn.execute(
+                update(table)
+                .where(table.c.id == notification_id, table.c.status == "scheduled")
+                .values(status="cancelled")
+            )
+        return result.rowcount == 1
+
+    def get(self, notification_id: int) -> NotificationLog | None:
+        table = ScheduledNotification.__table__
+        columns = [table.c[f.name] for f in fields(NotificationLog)]
+        with self._engine.connect() as conn:
+            row = conn.execute(select(*columns).where(table.c.id == notification_id)).first()
+        return NotificationLog(**row._mapping) if row is not None else None
+
+    def pending(self) -> int:
+        table = ScheduledNotification.__table__
+        with self._engine.connect() as conn:
+            return conn.execute(
+                select(func.count()).where(table.c.status == "scheduled")
+            ).scalar_one()
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._loop = asyncio.new_event_loop()
+        threading.Thread(
+            target=self._loop.run_forever, name="notification-sender", daemon=True
+        ).start()
+        self._thread = threading.Thread(
+            target=self._run, name="notification-scheduler", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        if self._thread is None:
+            return
+        self._stop.set()
+        self.wakeup.set()
+        self._thread.join(timeout)
+        wait_futures(list(self._inflight), timeout)
+        assert self._loop is not None
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread, self._loop = None, None
+        with self._lock:
+            self._heap, self._watermark, self._window_loaded = [], (0.0, 0), False
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self.wakeup.clear()
+            try:
+                wait = self._tick()
+            except Exception:
+                logger.exception("notification scheduler tick failed")
+                wait = self._refill_interval_s
+            self.wakeup.wait(wait)
 
+    def _tick(self) -> float:
+        now = time.time()
+        if now >= self._next_refill or (
+            not self._window_loaded and len(self._heap) < self._max_loaded // 2
+        ):
+            self._reclaim(now)
+            self._refill(now)
+            self._next_refill = now + self._refill_interval_s
+        due: list[int] = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now and len(due) < MAX_BATCH_SIZE:
+                due.append(heapq.heappop(self._heap)[1])
+            next_due = self._heap[0][0] if self._heap else None
+        if due:
+            self._fire(due, now)
+            if len(due) == MAX_BATCH_SIZE:
+                return 0.0
+        wait = self._next_refill - time.time()
+        if next_due is not None:
+            wait = min(wait, next_due - time.time())
+        return max(wait, 0.0)
 
-def schedule_notification(  # UNUSED (demo)
+    def _reclaim(self, now: float) -> None:
+        # rows with no lease at all were claimed before leases existed
+        table = ScheduledNotification.__table__
+        with self._engine.begin() as conn:
+            rows = conn.execute(
+                update(table)
+                .where(
+                    table.c.status == "sending",
+                    or_(table.c.locked_until.is_(None), table.c.locked_until < now),
+                )
+                .values(status="scheduled", locked_until=None)
+                .returning(table.c.send_at, table.c.id)
+            ).all()
+        if rows:
+            logger.warning("reclaimed %d notifications whose send lease lapsed", len(rows))
+            with self._lock:
+                for send_at, row_id in rows:
+                    heapq.heappush(self._heap, (send_at, row_id))
+
+    def _refill(self, now: float) -> None:
+        # held across the query so a concurrent schedule() sees either the old
+        # watermark (and its row is loaded here) or the new one (and pushes it)
+        table = ScheduledNotification.__table__
+        with self._lock:
+            room = self._max_loaded - len(self._heap)
+            if room <= 0:
+                return
+            until = now + self._horizon_s
+            with self._engine.connect() as conn:
+                rows = conn.execute(
+                    select(table.c.send_at, table.c.id)
+                    .where(
+                        table.c.status == "scheduled",
+                        tuple_(table.c.send_at, table.c.id) > tuple_(*self._watermark),
+                        table.c.send_at < until,
+                    )
+                    .order_by(table.c.send_at, table.c.id)
+                    .limit(room)
+                ).all()
+            for send_at, row_id in rows:
+                heapq.heappush(self._heap, (send_at, row_id))
+            self._window_loaded = len(rows) < room
+            if self._window_loaded:
+                self._watermark = max(self._watermark, (until, 0))
+            elif rows:
+                self._watermark = (rows[-1].send_at, rows[-1].id)
+
+    def _fire(self, ids: list[int], now: float) -> None:
+        table = ScheduledNotification.__table__
+        with self._engine.begin() as conn:
+            rows = conn.execute(
+                update(table)
+                # `status || ''` keeps SQLite on the primary key; a plain status
+                # match lets it walk every scheduled row of the due index instead
+                .where(table.c.id.in_(ids), table.c.status.concat("") == "scheduled")
+                .values(status="sending", locked_until=now + self._lease_s)
+                .returning(
+                    table.c.id,
+                    table.c.channel,
+                    table.c.recipient,
+                    table.c.message,
+                    table.c.send_at,
+                )
+            ).all()
+        if not rows:
+            return
+        lateness_ms = max(now - row.send_at for row in rows) * 1000.0
+        self.stats["fired"] += len(rows)
+        self.stats["max_lateness_ms"] = max(self.stats["max_lateness_ms"], lateness_ms)
+        assert self._loop is not None
+        future = asyncio.run_coroutine_threadsafe(self._deliver(rows), self._loop)
+        self._inflight.add(future)
+        future.add_done_callback(self._inflight.discard)
+        future.add_done_callback(functools.partial(self._delivery_done, rows))
+
+    def _delivery_done(self, rows: list, future: Future) -> None:
+        # per-notification errors are recorded by _record(); this is the whole
+        # batch blowing up, which would otherwise leave it in `sending` until
+        # the lease lapses and then send it all again
+        if future.cancelled() or future.exception() is None:
+            return
+        exc = future.exception()
+        logger.error("notification delivery failed", exc_info=exc)
+        table = ScheduledNotification.__table__
+        try:
+            with self._engine.begin() as conn:
+                conn.execute(
+                    update(table)
+                    .where(table.c.id.in_([r.id for r in rows]), table.c.status == "sending")
+                    .values(status="failed", locked_until=None, error=repr(exc))
+                )
+        except Exception:
+            logger.exception("could not mark %d notifications failed", len(rows))
+            return
+        self.stats["failed"] += len(rows)
+
+    async def _deliver(self, rows: list) -> None:
+        results = await send_bulk_notifications(
+            [{"channel": r.channel, "recipient": r.recipient, "message": r.message} for r in rows]
+        )
+        await asyncio.to_thread(self._record, rows, results)
+
+    def _record(self, rows: list, results: list[NotificationResult]) -> None:
+        table = ScheduledNotification.__table__
+        sent_at = time.time()
+        params = [
+            {
+                "row_id": row.id,
+                "new_status": "sent" if result.status == "sent" else "failed",
+                "new_sent_at": sent_at if result.status == "sent" else None,
+                "new_attempts": result.attempts,
+                "new_error": result.error,
+            }
+            for row, result in zip(rows, results)
+        ]
+        with self._engine.begin() as conn:
+            conn.execute(
+                update(table)
+                .where(table.c.id == bindparam("row_id"))
+                .values(
+                    locked_until=None,
+                    status=bindparam("new_status"),
+                    sent_at=bindparam("new_sent_at"),
+                    attempts=bindparam("new_attempts"),
+                    error=bindparam("new_error"),
+                ),
+                params,
+            )
+        sent = sum(p["new_status"] == "sent" for p in params)
+        self.stats["sent"] += sent
+        self.stats["failed"] += len(params) - sent
+
+
+notification_scheduler = NotificationScheduler(engine)
+
+
+def _as_timestamp(send_at: str | datetime | float) -> float:
+    if isinstance(send_at, (int, float)):
+        return float(send_at)
+    if isinstance(send_at, str):
+        send_at = datetime.fromisoformat(send_at)
+    if send_at.tzinfo is None:
+        # naive times are UTC, as produced by datetime.utcnow()
+        send_at = send_at.replace(tzinfo=timezone.utc)
+    return send_at.timestamp()
+
+
+def schedule_notification(
     channel: NotificationChannel,
     recipient: str,
     message: str,
-    send_at: str = "",
-) -> dict[str, Any]:
-    return {
-        "channel": channel.value,
-        "recipient": recipient,
-        "message": message,
-        "send_at": send_at or datetime.utcnow().isoformat(),
-        "status": "scheduled",
-    }
+    send_at: str | datetime | float = "",
+) -> NotificationLog:
+    when = _as_timestamp(send_at) if send_at else time.time()
+    return notification_scheduler.schedule(channel, recipient, message, when)
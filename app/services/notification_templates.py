@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Iterable
+
+# {{key}}; the key is taken verbatim, whitespace included, as the old
+# str.replace renderer did
+_PLACEHOLDER = re.compile(r"\{\{(.*?)\}\}")
+
+
+class CompiledTemplate:
+    # The source split once into literal and placeholder segments. Rendering
+    # copies the segment list, fills the placeholder slots and joins, so a send
+    # costs one pass over the output instead of one pass per context key.
+    # Placeholders missing from the context are left as written.
+
+    __slots__ = ("_segments", "_slots")
+
+    def __init__(self, source: str) -> None:
+        segments: list[str] = []
+        slots: list[tuple[int, str]] = []
+        pos = 0
+        for match in _PLACEHOLDER.finditer(source):
+            if match.start() > pos:
+                segments.append(source[pos : match.start()])
+            slots.append((len(segments), match.group(1)))
+            segments.append(match.group(0))
+            pos = match.end()
+        if pos < len(source):
+            segments.append(source[pos:])
+        self._segments = segments
+        self._slots = tuple(slots)
+
+    @property
+    def keys(self) -> tuple[str, ...]:
+        return tuple(key for _, key in self._slots)
+
+    def render(self, context: dict[str, Any]) -> str:
+        out = self._segments.copy()
+        for i, key in self._slots:
+            if key in context:
+                out[i] = str(context[key])
+        return "".join(out)
+
+
+class TemplateRegistry:
+    # Template sources by name, plus an LRU of compiled templates so only the
+    # `max_compiled` most recently used stay in memory. Re-registering a name
+    # drops its compiled copy.
+
+    def __init__(self, *, max_compiled: int = 256) -> None:
+        self._max_compiled = max_compiled
+        self._sources: dict[str, str] = {}
+        self._compiled: OrderedDict[str, CompiledTemplate] = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def register(self, name: str, source: str) -> None:
+        with self._lock:
+            self._sources[name] = source
+            self._compiled.pop(name, None)
+
+    def get(self, name: str) -> CompiledTemplate:
+        with self._lock:
+            compiled = self._compiled.get(name)
+            if compiled is not None:
+                self._compiled.move_to_end(name)
+                self.stats["hits"] += 1
+                return compiled
+            if name not in self._sources:
+                raise KeyError(f"No template registered: {name}")
+            self.stats["misses"] += 1
+            compiled = self._compiled[name] = CompiledTemplate(self._sources[name])
+            if len(self._compiled) > self._max_compiled:
+                self._compiled.popitem(last=False)
+                self.stats["evictions"] += 1
+            return compiled
+
+    def render(self, name: str, context: dict[str, Any]) -> str:
+        return self.get(name).render(context)
+
+    def render_many(self, name: str, contexts: Iterable[dict[str, Any]]) -> list[str]:
+        render = self.get(name).render
+        return [render(context) for context in contexts]
+
+
+templates = TemplateRegistry()
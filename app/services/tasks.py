@@ -1,11 +1,29 @@
 from __future__ import annotations
 
+import json
+import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
 from typing import Any, Callable
 
+from sqlalchemy import Engine, and_, func, insert, or_, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+
+from app.config import get_settings
+from app.db.models import TASK_UNFINISHED, TaskJob
+from app.db.session import engine
+from app.integrations.metrics import set_queue_depth
+
+logger = logging.getLogger(__name__)
+
 _task_registry: dict[str, Callable] = {}
 
-TASK_PRIORITY_HIGH = 10  # UNUSED (demo)
-TASK_PRIORITY_LOW = 1  # UNUSED (demo)
+TASK_PRIORITY_HIGH = 10
+TASK_PRIORITY_NORMAL = 5
+TASK_PRIORITY_LOW = 1
 
 
 def task(name: str):
@@ -23,6 +41,268 @@ def run_task(name: str, **kwargs: Any) -> Any:
     return handler(**kwargs)
 
 
+# dialects with ON CONFLICT ... DO NOTHING and partial unique indexes
+_INSERT_DIALECTS = {"sqlite": sqlite.insert, "postgresql": postgresql.insert}
+
+
+class TaskQueue:
+    # Durable job queue in the app database (table task_queue), so pending jobs
+    # survive restarts. Claimed jobs hold a lease; if a worker dies mid-job the
+    # lease lapses and another worker picks the job up again.
+
+    def __init__(self, engine: Engine, *, lease_s: float = 300.0, base_backoff_s: float = 1.0):
+        self._engine = engine
+        self._lease_s = lease_s
+        self._base_backoff_s = base_backoff_s
+        self.wakeup = threading.Event()
+
+    def enqueue(
+        self,
+        name: str,
+        kwargs: dict[str, Any] | None = None,
+        *,
+        priority: int = TASK_PRIORITY_NORMAL,
+        run_at: datetime | float | None = None,
+        max_attempts: int = 3,
+        interval_s: float | None = None,
+        unique_key: str | None = None,
+    ) -> int | None:
+        # unique_key: returns None instead of queueing a second unfinished copy
+        if name not in _task_registry:
+            raise KeyError(f"No task registered: {name}")
+        if isinstance(run_at, datetime):
+            run_at = run_at.timestamp()
+        table = TaskJob.__table__
+        stmt = insert(table)
+        if unique_key is not None:
+            # one INSERT against the partial unique index on unfinished jobs:
+            # concurrent enqueues (every worker process at startup) cannot both
+            # succeed, and nothing upgrades a read lock to a write lock
+            stmt = _INSERT_DIALECTS[self._engine.dialect.name](table).on_conflict_do_nothing(
+                index_elements=[table.c.unique_key],
+                index_where=TASK_UNFINISHED,
+            )
+        with self._engine.begin() as conn:
+            job_id = conn.execute(
+                stmt.returning(table.c.id),
+                {
+                    "name": name,
+                    "kwargs": json.dumps(kwargs or {}),
+                    "priority": priority,
+                    "status": "pending",
+                    "run_at": run_at if run_at is not None else time.time(),
+                    "attempts": 0,
+                    "max_attempts": max_attempts,
+                    "interval_s": interval_s,
+                    "unique_key": unique_key,
+                },
+            ).scalar_one_or_none()
+        if job_id is None:
+            return None  # already queued
+        self.wakeup.set()
+        return job_id
+
+    def _claimable(self, now: float):
+        table = TaskJob.__table__
+        return or_(
+            and_(table.c.status == "pending", table.c.run_at <= now),
+            and_(table.c.status == "running", table.c.locked_until < now),
+        )
+
+    def claim(self, limit: int) -> list[tuple[int, str, dict, int]]:
+        # highest priority first, then oldest run_at; the predicate is repeated
+        # on the UPDATE so two workers can never both take the same row
+        now = time.time()
+        table = TaskJob.__table__
+        ready = (
+            select(table.c.id)
+            .where(self._claimable(now))
+            .order_by(table.c.priority.desc(), table.c.run_at, table.c.id)
+            .limit(limit)
+        )
+        stmt = (
+            update(table)
+            .where(table.c.id.in_(ready.scalar_subquery()), self._claimable(now))
+            .values(
+                status="running",
+                locked_until=now + self._lease_s,
+                attempts=table.c.attempts + 1,
+            )
+            .returning(
+                table.c.id,
+                table.c.name,
+                table.c.kwargs,
+                table.c.attempts,
+                table.c.priority,
+                table.c.run_at,
+            )
+        )
+        with self._engine.begin() as conn:
+            rows = conn.execute(stmt).all()
+        # RETURNING comes back in table order, not the subquery's
+        rows.sort(key=lambda r: (-r.priority, r.run_at, r.id))
+        return [(r.id, r.name, json.loads(r.kwargs), r.attempts) for r in rows]
+
+    def _owned(self, job_id: int, attempts: int):
+        # the claim's attempt number fences it: once a lapsed lease lets another
+        # worker re-claim the job, attempts moved on and this claim owns nothing
+        table = TaskJob.__table__
+        return and_(
+            table.c.id == job_id, table.c.status == "running", table.c.attempts == attempts
+        )
+
+    def complete(self, job_id: int, attempts: int) -> bool:
+        table = TaskJob.__table__
+        now = time.time()
+        with self._engine.begin() as conn:
+            row = conn.execute(
+                select(table.c.interval_s).where(self._owned(job_id, attempts))
+            ).first()
+            if row is None:
+                logger.warning("task #%d attempt %d no longer owns the job", job_id, attempts)
+                return False
+            if row.interval_s:
+                values: dict[str, Any] = {
+                    "status": "pending",
+                    "run_at": now + row.interval_s,
+                    "attempts": 0,
+                    "last_error": None,
+                }
+            else:
+                values = {"status": "done"}
+            conn.execute(
+                update(table)
+                .where(self._owned(job_id, attempts))
+                .values(locked_until=None, **values)
+            )
+        return True
+
+    def fail(self, job_id: int, attempts: int, error: str) -> bool:
+        table = TaskJob.__table__
+        now = time.time()
+        with self._engine.begin() as conn:
+            row = conn.execute(
+                select(table.c.max_attempts, table.c.interval_s).where(
+                    self._owned(job_id, attempts)
+                )
+            ).first()
+            if row is None:
+                logger.warning("task #%d attempt %d no longer owns the job", job_id, attempts)
+                return False
+            if attempts < row.max_attempts:
+                # exponential backoff with full jitter
+                delay = random.uniform(0, self._base_backoff_s * 2 ** (attempts - 1))
+                values: dict[str, Any] = {"status": "pending", "run_at": now + delay}
+            elif row.interval_s:
+                # a recurring job gives up on this run only; it is due again
+                # next interval, with last_error kept for inspection
+                values = {"status": "pending", "run_at": now + row.interval_s, "attempts": 0}
+            else:
+                values = {"status": "failed"}
+            conn.execute(
+                update(table)
+                .where(self._owned(job_id, attempts))
+                .values(locked_until=None, last_error=error[:2000], **values)
+            )
+        return True
+
+    def depth(self) -> int:
+        table = TaskJob.__table__
+        with self._engine.connect() as conn:
+            return conn.execute(
+                select(func.count()).where(table.c.status.in_(("pending", "running")))
+            ).scalar_one()
+
+    def next_run_at(self) -> float | None:
+        table = TaskJob.__table__
+        with self._engine.connect() as conn:
+            return conn.execute(
+                select(func.min(table.c.run_at)).where(table.c.status == "pending")
+            ).scalar_one()
+
+
+class TaskWorker:
+    # Polls the queue from one thread and runs handlers on a thread pool. Task
+    # handlers are plain sync functions that mostly wait on I/O, so threads are
+    # enough; enqueue() in this process wakes the poller immediately.
+
+    def __init__(self, queue: TaskQueue, *, concurrency: int = 4, poll_interval_s: float = 1.0):
+        self._queue = queue
+        self._concurrency = concurrency
+        self._poll_interval_s = poll_interval_s
+        self._free = threading.Semaphore(concurrency)
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._pool: ThreadPoolExecutor | None = None
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._pool = ThreadPoolExecutor(self._concurrency, thread_name_prefix="task-worker")
+        self._thread = threading.Thread(target=self._poll, name="task-poller", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._queue.wakeup.set()
+        self._thread.join(timeout)
+        assert self._pool is not None
+        self._pool.shutdown(wait=True)
+        self._thread, self._pool = None, None
+
+    def _poll(self) -> None:
+        while not self._stop.is_set():
+            self._queue.wakeup.clear()
+            try:
+                self._dispatch_ready()
+                set_queue_depth(self._queue.depth())
+                wait = self._poll_interval_s
+                next_run = self._queue.next_run_at()
+                if next_run is not None:
+                    wait = min(wait, max(next_run - time.time(), 0.0))
+            except Exception:
+                logger.exception("task queue poll failed")
+                wait = self._poll_interval_s
+            self._queue.wakeup.wait(wait)
+
+    def _dispatch_ready(self) -> None:
+        free = 0
+        while self._free.acquire(blocking=False):
+            free += 1
+        if not free:
+            return
+        jobs = self._queue.claim(free)
+        for _ in range(free - len(jobs)):
+            self._free.release()
+        assert self._pool is not None
+        for job in jobs:
+            self._pool.submit(self._run, *job)
+
+    def _run(self, job_id: int, name: str, kwargs: dict, attempts: int) -> None:
+        try:
+            run_task(name, **kwargs)
+        except Exception as exc:
+            logger.warning("task %s #%d failed (attempt %d): %r", name, job_id, attempts, exc)
+            self._queue.fail(job_id, attempts, repr(exc))
+        else:
+            self._queue.complete(job_id, attempts)
+        finally:
+            self._free.release()
+            # a slot opened up; look for more work without waiting out the poll
+            self._queue.wakeup.set()
+
+
+task_queue = TaskQueue(engine)
+task_worker = TaskWorker(task_queue, concurrency=get_settings().task_workers)
+
+
+def enqueue(name: str, kwargs: dict[str, Any] | None = None, **options: Any) -> int | None:
+    return task_queue.enqueue(name, kwargs, **options)
+
+
 @task("send_welcome_email")
 def send_welcome_email(email: str = "", **kwargs: Any) -> None:
     print(f"[task] Sending welcome email to {email}")
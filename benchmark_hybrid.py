@@ -35,26 +35,20 @@ EXPECTED_UNUSED = {
         ("app/utils/formatters.py", "format_money"),
         ("app/services/payment_services.py", "process"),
         ("app/services/payment_services.py", "run_payment"),
-        ("app/core/errors.py", "not_found"),
         ("app/integrations/http_client.py", "request_text"),
-        ("app/integrations/webhook_signing.py", "verify_hmac_sha256_prefixed"),
         ("app/integrations/slack.py", "build_finding_blocks"),
         ("app/integrations/github.py", "find_issue_by_title"),
-        ("app/integrations/metrics.py", "timed_request"),
-        ("app/integrations/metrics.py", "snapshot_metrics"),
         ("app/integrations/metrics.py", "add_tags"),
         ("app/services/report_service.py", "_build_header"),
         ("app/services/report_service.py", "_build_footer"),
         ("app/services/report_service.py", "generate_report_v1"),
         ("app/services/report_service.py", "_search_v2"),
         # --- new enterprise patterns ---
-        ("app/core/middleware.py", "generate_correlation_id"),
         ("app/core/decorators.py", "validate_input"),
         ("app/core/decorators.py", "deprecate"),
         ("app/services/tasks.py", "generate_daily_report"),
         ("app/services/tasks.py", "sync_external_contacts"),
         ("app/services/tasks.py", "cleanup_expired_sessions"),
-        ("app/core/cache.py", "invalidate_cache_for"),
         ("app/core/feature_flags.py", "get_all_flags"),
         ("app/core/feature_flags.py", "_evaluate_flag_with_context"),
         ("app/core/events.py", "on_note_deleted_cleanup"),
@@ -65,65 +59,44 @@ EXPECTED_UNUSED = {
         ("app/core/auth.py", "check_ip_allowlist"),
         ("app/core/plugins.py", "list_plugins"),
         ("app/core/plugins.py", "unload_plugin"),
-        ("tests/conftest.py", "mock_redis"),
         ("tests/conftest.py", "admin_user"),
         ("tests/factories.py", "random_email"),
         ("tests/helpers.py", "assert_paginated_response"),
         ("tests/helpers.py", "wait_for_event"),
         ("tests/helpers.py", "mock_external_service"),
         ("tests/test_notes.py", "test_create_note_with_tags"),
-        ("tests/test_notes.py", "test_bulk_import_notes"),
         ("tests/test_notes.py", "_seed_notes"),
-        ("app/services/notification_service.py", "send_bulk_notifications"),
-        ("app/services/notification_service.py", "schedule_notification"),
         ("app/services/notification_service.py", "_render_template"),
-        ("app/services/audit_service.py", "query_audit_log"),
         ("app/services/audit_service.py", "_redact_sensitive_fields"),
-        ("app/services/audit_service.py", "export_audit_csv"),
         ("app/config.py", "_parse_cors_origins"),
-        ("app/db/crud.py", "bulk_create_notes"),
         ("app/db/crud.py", "_build_search_query"),
-        ("app/db/session.py", "get_engine_info"),
         ("app/db/session.py", "_reset_sequences"),
+        ("app/services/notification_service.py", "send_notification"),
     ],
     "variables": [
         ("app/main.py", "APP_DISPLAY_NAME"),
         ("app/db/crud.py", "DEFAULT_PAGE_SIZE"),
         ("app/utils/ids.py", "DEFAULT_REQUEST_ID"),
         ("app/integrations/http_client.py", "DEFAULT_HEADERS"),
-        ("app/integrations/metrics.py", "_queue_depth"),
-        ("app/services/tasks.py", "TASK_PRIORITY_HIGH"),
-        ("app/services/tasks.py", "TASK_PRIORITY_LOW"),
         ("app/core/feature_flags.py", "FLAG_ADMIN_ENDPOINT"),
         ("app/core/events.py", "EVENT_NOTE_ARCHIVED"),
         ("app/core/auth.py", "ROLE_VIEWER"),
         ("app/core/auth.py", "TOKEN_ALGORITHM"),
         ("tests/conftest.py", "TEST_TIMEOUT"),
         ("tests/helpers.py", "SLOW_TEST_THRESHOLD"),
-        ("app/services/notification_service.py", "MAX_BATCH_SIZE"),
-        ("app/services/audit_service.py", "AUDIT_RETENTION_DAYS"),
-        ("app/config.py", "MAX_UPLOAD_SIZE"),
-        ("app/db/session.py", "DB_POOL_SIZE"),
     ],
     "classes": [
         ("app/core/errors.py", "DemoError"),
         ("app/db/models.py", "Tag"),
         ("app/schemas/notes.py", "NoteInternal"),
         ("app/services/payment_services.py", "PayPal"),
-        ("app/core/middleware.py", "CorrelationIdMiddleware"),
-        ("app/core/middleware.py", "RateLimitMiddleware"),
         ("app/core/base.py", "MongoNoteRepository"),
         ("app/core/base.py", "PagerDutyNotifier"),
-        ("app/core/cache.py", "RedisCache"),
         ("app/core/exceptions.py", "AuthenticationError"),
         ("app/core/exceptions.py", "AuthorizationError"),
-        ("app/core/exceptions.py", "RateLimitError"),
         ("app/core/exceptions.py", "ExternalServiceError"),
-        ("app/core/pagination.py", "CursorParams"),
-        ("app/core/pagination.py", "CursorResult"),
         ("tests/factories.py", "UserFactory"),
         ("tests/factories.py", "TagFactory"),
-        ("app/services/notification_service.py", "NotificationLog"),
         ("app/db/models.py", "Comment"),
         ("app/db/models.py", "Attachment"),
         ("app/schemas/notes.py", "NotePatch"),
@@ -235,13 +208,40 @@ ACTUALLY_USED = [
     ("app/db/crud.py", "update_note"),
     ("app/db/crud.py", "delete_note"),
     ("app/db/crud.py", "get_note_by_id"),
-    ("app/services/notification_service.py", "send_notification"),
     ("app/services/notification_service.py", "NotificationChannel"),
     ("app/services/notification_service.py", "_dispatch_email"),
     ("app/services/notification_service.py", "_dispatch_slack"),
     ("app/services/notification_service.py", "_dispatch_sms"),
     ("app/services/audit_service.py", "log_action"),
     ("app/services/audit_service.py", "AuditEntry"),
+    ("app/core/pagination.py", "CursorParams"),
+    ("app/core/pagination.py", "CursorResult"),
+    ("app/db/crud.py", "bulk_create_notes"),
+    ("tests/test_notes.py", "test_bulk_import_notes"),
+    ("app/config.py", "MAX_UPLOAD_SIZE"),
+    ("app/core/cache.py", "invalidate_cache_for"),
+    ("app/core/errors.py", "not_found"),
+    ("app/core/cache.py", "RedisCache"),
+    ("tests/conftest.py", "mock_redis"),
+    ("app/db/session.py", "DB_POOL_SIZE"),
+    ("app/db/session.py", "get_engine_info"),
+    ("app/integrations/webhook_signing.py", "verify_hmac_sha256_prefixed"),
+    ("app/services/tasks.py", "TASK_PRIORITY_HIGH"),
+    ("app/services/tasks.py", "TASK_PRIORITY_LOW"),
+    ("app/integrations/metrics.py", "_queue_depth"),
+    ("app/services/audit_service.py", "export_audit_csv"),
+    ("app/services/audit_service.py", "AUDIT_RETENTION_DAYS"),
+    ("app/services/audit_service.py", "query_audit_log"),
+    ("app/services/notification_service.py", "MAX_BATCH_SIZE"),
+    ("app/services/notification_service.py", "send_bulk_notifications"),
+    ("app/services/notification_service.py", "NotificationLog"),
+    ("app/services/notification_service.py", "schedule_notification"),
+    ("app/integrations/metrics.py", "snapshot_metrics"),
+    ("app/integrations/metrics.py", "timed_request"),
+    ("app/core/middleware.py", "CorrelationIdMiddleware"),
+    ("app/core/middleware.py", "generate_correlation_id"),
+    ("app/core/middleware.py", "RateLimitMiddleware"),
+    ("app/core/exceptions.py", "RateLimitError"),
 ]
 
 
@@ -685,7 +685,7 @@ def compare_results(confidence=DEFAULT_CONFIDENCE):
 
     print("\n## Dynamic Dispatch FP Traps (should NOT be flagged)\n")
     print(
-        "These are used via getattr(), globals(), or __init_subclass__ — static can't see the references.\n"
+        "These are used via getattr(), globals(), dict tables or __init_subclass__ — static can't see the references.\n"
     )
     print("| Item | Mechanism | Static | Hybrid | High-Conf | Vulture |")
     print("|------|-----------|--------|--------|-----------|---------|")
@@ -701,9 +701,9 @@ def compare_results(confidence=DEFAULT_CONFIDENCE):
         "send_welcome_email": "@task registry",
         "on_note_created_log": "@on() event",
         "on_note_created_notify": "@on() event",
-        "_dispatch_email": "getattr()",
-        "_dispatch_slack": "getattr()",
-        "_dispatch_sms": "getattr()",
+        "_dispatch_email": "dict table",
+        "_dispatch_slack": "dict table",
+        "_dispatch_sms": "dict table",
     }
     for file, name in DYNAMIC_FALSE_POSITIVES:
         key = (file, name)
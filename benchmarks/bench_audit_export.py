@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""Audit CSV export: the old build-one-string exporter vs the streaming one.
+
+Each mode runs in its own subprocess so peak RSS (ru_maxrss) is per mode.
+
+    python benchmarks/bench_audit_export.py --rows 1000000
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+MODES = ("old", "stream", "stream-gzip")
+
+
+def _seed(url: str, n: int) -> None:
+    from sqlalchemy import create_engine, insert
+
+    from app.db.models import AuditLog, Base
+
+    engine = create_engine(url)
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        for start in range(0, n, 50_000):
+            conn.execute(
+                insert(AuditLog.__table__),
+                [
+                    {
+                        "action": "update",
+                        "entity_type": "note",
+                        "entity_id": i,
+                        "actor": f"user-{i % 97}",
+                        "timestamp": f"2099-01-01T00:00:{i % 60:02d}.{i:06d}",
+                    }
+                    for i in range(start, min(start + 50_000, n))
+                ],
+            )
+    engine.dispose()
+
+
+def _child(mode: str) -> None:
+    # DATABASE_URL is set by the parent, before the app modules build their engine
+    from sqlalchemy import select
+
+    from app.db.models import AuditLog
+    from app.db.session import engine
+    from app.services.audit_service import stream_audit_export
+
+    t0 = time.perf_counter()
+    if mode == "old":
+        # the pre-streaming export_audit_csv: every entry in memory, one big str
+        with engine.connect() as conn:
+            entries = conn.execute(select(AuditLog)).all()
+        lines = ["action,entity_type,entity_id,actor,timestamp"]
+        for e in entries:
+            lines.append(f"{e.action},{e.entity_type},{e.entity_id},{e.actor},{e.timestamp}")
+        size = len("\n".join(lines).encode())
+    else:
+        size = sum(len(c) for c in stream_audit_export(compress=mode == "stream-gzip"))
+    elapsed = time.perf_counter() - t0
+    peak_kib = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(json.dumps({"elapsed": elapsed, "bytes": size, "peak_mib": peak_kib / 1024}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the audit CSV export")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--child", choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        _child(args.child)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f"sqlite:///{tmp}/audit.db"
+        _seed(url, args.rows)
+        env = {**os.environ, "DATABASE_URL": url, "TASK_WORKERS": "0"}
+
+        print(f"{args.rows:,} audit rows")
+        print(f"{'mode':<12} {'rows/s':>12} {'MB out':>10} {'peak RSS MiB':>14}")
+        print("-" * 51)
+        for mode in MODES:
+            out = subprocess.run(
+                [sys.executable, __file__, "--child", mode],
+                env=env,
+                check=True,
+                capture_output=True,
+                text=True,
+            ).stdout
+            r = json.loads(out.strip().splitlines()[-1])
+            print(
+                f"{mode:<12} {args.rows / r['elapsed']:>12,.0f} "
+                f"{r['bytes'] / 2**20:>10.1f} {r['peak_mib']:>14.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
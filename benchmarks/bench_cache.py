@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""Hit rate and throughput of the cached GET /notes page renderer.
+
+Synthetic read-heavy workload: Zipf-distributed page reads with a small share
+of writes that invalidate the "notes" namespace through EventBus.
+
+    python benchmarks/bench_cache.py --ops 20000 --write-ratio 0.01
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+_tmp = tempfile.TemporaryDirectory()
+os.environ["DATABASE_URL"] = f"sqlite:///{_tmp.name}/bench.db"
+
+from sqlalchemy import text  # noqa: E402
+
+from app.api.routers.notes import _render_note_page  # noqa: E402
+from app.core.cache import _default_cache  # noqa: E402
+from app.core.events import EventBus  # noqa: E402
+from app.db.session import AsyncSessionLocal, engine, init_db  # noqa: E402
+from app.schemas.notes import NoteCreate  # noqa: E402
+from app.services.notes_services import create_note_async  # noqa: E402
+
+
+def _seed(n: int) -> None:
+    rows = [{"title": f"Note {i}", "body": f"Body {i}"} for i in range(n)]
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO notes (title, body) VALUES (:title, :body)"), rows)
+
+
+def _workload(ops: int, pages: int, write_ratio: float, seed: int) -> list[int | None]:
+    rng = random.Random(seed)
+    weights = [1 / (p**1.1) for p in range(1, pages + 1)]
+    reads = rng.choices(range(1, pages + 1), weights=weights, k=ops)
+    return [None if rng.random() < write_ratio else page for page in reads]
+
+
+async def _run(render, plan: list[int | None]) -> float:
+    async with AsyncSessionLocal() as db:
+        t0 = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            for page in plan:
+                if page is None:
+                    await create_note_async(db, NoteCreate(title="Write", body="Invalidate"))
+                else:
+                    await render(db, page=page, size=20, cursor=None)
+            EventBus.drain()
+        elapsed = time.perf_counter() - t0
+    return len(plan) / elapsed
+
+
+def run(render, plan: list[int | None]) -> float:
+    return asyncio.run(_run(render, plan))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark @cached on GET /notes")
+    parser.add_argument("--notes", type=int, default=50_000)
+    parser.add_argument("--ops", type=int, default=20_000)
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--write-ratio", type=float, default=0.01)
+    args = parser.parse_args()
+
+    init_db()
+    _seed(args.notes)
+    plan = _workload(args.ops, args.pages, args.write_ratio, seed=42)
+
+    uncached = run(_render_note_page.__wrapped__, plan)
+    before = _default_cache.stats()
+    cached = run(_render_note_page, plan)
+    after = _default_cache.stats()
+
+    hits = after["hits"] - before["hits"]
+    misses = after["misses"] - before["misses"]
+    print(f"{args.ops:,} ops, {args.write_ratio:.0%} writes, Zipf over {args.pages} pages")
+    print(f"{'path':<10} {'ops/s':>10} {'hit rate':>10}")
+    print("-" * 32)
+    print(f"{'uncached':<10} {uncached:>10,.0f} {'-':>10}")
+    print(f"{'cached':<10} {cached:>10,.0f} {hits / max(hits + misses, 1):>10.1%}")
+    print(f"\ncache: {after['entries']} entries, {after['bytes']:,} bytes")
+
+
+if __name__ == "__main__":
+    main()
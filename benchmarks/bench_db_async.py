@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""Load test: sync (threadpool) vs async (aiosqlite) note routes.
+
+Both route sets are mounted on one app and driven in-process through httpx's
+ASGI transport, so the numbers isolate the server side: the sync handlers run
+in Starlette's threadpool, the async ones stay on the event loop.
+
+    python benchmarks/bench_db_async.py --requests 5000 --concurrency 100
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+_tmp = tempfile.TemporaryDirectory()
+os.environ["DATABASE_URL"] = f"sqlite:///{_tmp.name}/bench.db"
+
+import httpx  # noqa: E402
+from fastapi import Depends, FastAPI, Response  # noqa: E402
+from pydantic import TypeAdapter  # noqa: E402
+from sqlalchemy import text  # noqa: E402
+from sqlalchemy.ext.asyncio import AsyncSession  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+
+from app.api.deps import get_async_db, get_db  # noqa: E402
+from app.core.pagination import CursorParams  # noqa: E402
+from app.db import crud  # noqa: E402
+from app.db.session import engine, init_db  # noqa: E402
+from app.schemas.notes import NoteOut  # noqa: E402
+
+_NOTES = TypeAdapter(list[NoteOut])
+WORDS = ["alpha", "bravo", "charlie", "delta", "echo", "foxtrot", "golf", "hotel"]
+
+
+def _dump(notes) -> Response:
+    body = _NOTES.dump_json(_NOTES.validate_python(notes, from_attributes=True))
+    return Response(content=body, media_type="application/json")
+
+
+def build_app() -> FastAPI:
+    # uncached mirrors of GET /notes and /notes/search, one per DB layer
+    app = FastAPI()
+
+    @app.get("/sync/notes")
+    def sync_list(db: Session = Depends(get_db)):
+        return _dump(crud.list_notes_after(db, CursorParams(limit=20)).items)
+
+    @app.get("/sync/search")
+    def sync_search(q: str, db: Session = Depends(get_db)):
+        return _dump(crud.search_notes(db, q, limit=20))
+
+    @app.get("/async/notes")
+    async def async_list(db: AsyncSession = Depends(get_async_db)):
+        return _dump((await crud.list_notes_after_async(db, CursorParams(limit=20))).items)
+
+    @app.get("/async/search")
+    async def async_search(q: str, db: AsyncSession = Depends(get_async_db)):
+        return _dump(await crud.search_notes_async(db, q, limit=20))
+
+    return app
+
+
+def _seed(n: int) -> None:
+    rows = [
+        {"title": f"{WORDS[i % 8]} {i}", "body": f"{WORDS[(i * 3) % 8]} body {i}"}
+        for i in range(n)
+    ]
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO notes (title, body) VALUES (:title, :body)"), rows)
+    init_db()
+
+
+async def _load(app: FastAPI, prefix: str, requests: int, concurrency: int):
+    paths = [
+        f"{prefix}/notes" if i % 2 else f"{prefix}/search?q={WORDS[i % 8]}"
+        for i in range(requests)
+    ]
+    latencies: list[float] = []
+    sem = asyncio.Semaphore(concurrency)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+
+        async def one(path: str) -> None:
+            async with sem:
+                t0 = time.perf_counter()
+                resp = await client.get(path)
+                latencies.append((time.perf_counter() - t0) * 1000.0)
+                resp.raise_for_status()
+
+        t0 = time.perf_counter()
+        await asyncio.gather(*(one(p) for p in paths))
+        elapsed = time.perf_counter() - t0
+    latencies.sort()
+    p99 = latencies[max(int(len(latencies) * 0.99) - 1, 0)]
+    return requests / elapsed, statistics.median(latencies), p99
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark sync vs async note routes")
+    parser.add_argument("--notes", type=int, default=20_000)
+    parser.add_argument("--requests", type=int, default=5_000)
+    parser.add_argument("--concurrency", type=int, default=100)
+    args = parser.parse_args()
+
+    init_db()
+    _seed(args.notes)
+    app = build_app()
+
+    print(f"{args.requests:,} requests, concurrency {args.concurrency}, {args.notes:,} notes")
+    print(f"{'routes':<8} {'req/s':>10} {'p50 ms':>10} {'p99 ms':>10}")
+    print("-" * 41)
+    for prefix in ("/sync", "/async"):
+        rps, p50, p99 = asyncio.run(_load(app, prefix, args.requests, args.concurrency))
+        print(f"{prefix[1:]:<8} {rps:>10,.0f} {p50:>10.2f} {p99:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
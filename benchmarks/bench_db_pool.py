@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""Concurrent writers and readers on SQLite: default engine vs build_engine().
+
+Each writer thread commits small transactions while reader threads page
+through notes; "locked" counts operations that failed with database is locked.
+
+    python benchmarks/bench_db_pool.py --writers 8 --readers 4 --seconds 5
+"""
+import argparse
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from sqlalchemy import create_engine, text  # noqa: E402
+from sqlalchemy.exc import OperationalError  # noqa: E402
+
+from app.config import Settings  # noqa: E402
+from app.db.models import Base  # noqa: E402
+from app.db.session import build_engine, pool_stats  # noqa: E402
+
+
+def _worker(engine, stop: threading.Event, counts: dict, key: str, write: bool) -> None:
+    while not stop.is_set():
+        try:
+            with engine.begin() as conn:
+                if write:
+                    conn.execute(
+                        text("INSERT INTO notes (title, body) VALUES (:t, :b)"),
+                        [{"t": "w", "b": "x" * 200} for _ in range(10)],
+                    )
+                else:
+                    conn.execute(text("SELECT id, title FROM notes ORDER BY id DESC LIMIT 50")).all()
+            counts[key] += 10 if write else 1
+        except OperationalError:
+            counts["locked"] += 1
+
+
+def run(engine, writers: int, readers: int, seconds: float) -> dict:
+    Base.metadata.create_all(engine)
+    counts = {"writes": 0, "reads": 0, "locked": 0}
+    stop = threading.Event()
+    threads = [
+        threading.Thread(target=_worker, args=(engine, stop, counts, "writes", True))
+        for _ in range(writers)
+    ] + [
+        threading.Thread(target=_worker, args=(engine, stop, counts, "reads", False))
+        for _ in range(readers)
+    ]
+    for t in threads:
+        t.start()
+    time.sleep(seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+    counts["pool"] = pool_stats(engine.pool)
+    engine.dispose()
+    return {k: v / seconds if k != "pool" else v for k, v in counts.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark SQLite engine settings")
+    parser.add_argument("--writers", type=int, default=8)
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        default = create_engine(
+            f"sqlite:///{tmp}/default.db", connect_args={"check_same_thread": False}
+        )
+        tuned = build_engine(f"sqlite:///{tmp}/tuned.db", Settings())
+        results = [
+            ("default", run(default, args.writers, args.readers, args.seconds)),
+            ("tuned", run(tuned, args.writers, args.readers, args.seconds)),
+        ]
+
+    print(f"{args.writers} writers, {args.readers} readers, {args.seconds:.0f}s each")
+    print(f"{'engine':<8} {'rows/s':>10} {'reads/s':>10} {'locked/s':>10} {'pool waits':>11}")
+    print("-" * 53)
+    for name, r in results:
+        print(
+            f"{name:<8} {r['writes']:>10,.0f} {r['reads']:>10,.0f} {r['locked']:>10,.1f} "
+            f"{r['pool'].get('waits', '-'):>11}"
+        )
+
+
+if __name__ == "__main__":
+    main()
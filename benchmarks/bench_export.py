@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""Notes export: in-memory run_export vs the streaming export path.
+
+Reports throughput and tracemalloc peak for each format.
+
+    python benchmarks/bench_export.py --notes 200000 --formats csv,ndjson
+"""
+import argparse
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from sqlalchemy import create_engine, select, text  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from app.db.models import Base, Note  # noqa: E402
+from app.services.export_service import run_export  # noqa: E402
+from app.services.notes_services import export_notes  # noqa: E402
+
+
+def _seed(engine, n: int) -> None:
+    rows = [{"title": f"Note {i}", "body": f"Body of note {i} " * 8} for i in range(n)]
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO notes (title, body) VALUES (:title, :body)"), rows)
+
+
+def old_path(db, fmt: str) -> int:
+    notes = db.execute(select(Note).order_by(Note.id)).scalars().all()
+    if fmt == "csv":
+        data = [(n.id, n.title, n.body) for n in notes]
+    else:
+        data = [{"id": n.id, "title": n.title, "body": n.body} for n in notes]
+    return len(run_export(data, fmt).encode())
+
+
+def new_path(db, fmt: str) -> int:
+    return sum(len(chunk) for chunk in export_notes(db, fmt))
+
+
+def _measure(Session, fn, fmt: str) -> tuple[float, float, int]:
+    with Session() as db:
+        t0 = time.perf_counter()
+        size = fn(db, fmt)
+        elapsed = time.perf_counter() - t0
+    with Session() as db:
+        tracemalloc.start()
+        fn(db, fmt)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return elapsed, peak / 2**20, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark GET /notes/export")
+    parser.add_argument("--notes", type=int, default=200_000)
+    parser.add_argument("--formats", default="csv,json,xml")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{tmp}/bench.db")
+        Base.metadata.create_all(engine)
+        _seed(engine, args.notes)
+        Session = sessionmaker(bind=engine)
+
+        print(f"{args.notes:,} notes")
+        print(f"{'format':<8} {'path':<10} {'rows/s':>12} {'MB/s':>8} {'peak MiB':>10}")
+        print("-" * 52)
+        for fmt in args.formats.split(","):
+            for name, fn in (("in-memory", old_path), ("streaming", new_path)):
+                elapsed, peak, size = _measure(Session, fn, fmt)
+                print(
+                    f"{fmt:<8} {name:<10} {args.notes / elapsed:>12,.0f} "
+                    f"{size / 2**20 / elapsed:>8.1f} {peak:>10.1f}"
+                )
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
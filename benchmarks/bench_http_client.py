@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""Outbound call throughput: a fresh AsyncClient per call vs the shared registry client.
+
+Runs against a local keep-alive stub server, so the gap is connection setup
+and pool churn rather than network latency.
+
+    python benchmarks/bench_http_client.py --calls 2000 --concurrency 20
+"""
+import argparse
+import asyncio
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import httpx  # noqa: E402
+
+from app.integrations.http_client import (  # noqa: E402
+    _DEFAULT_TIMEOUT,
+    close_httpx_clients,
+    get_httpx_client,
+    request_json,
+)
+
+BODY = b'{"ok": true}'
+
+
+class _Stub(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(BODY)))
+        self.end_headers()
+        self.wfile.write(BODY)
+
+    def log_message(self, *args):
+        pass
+
+
+async def _fresh(base_url: str) -> None:
+    # the old get_httpx_client() shape: a new pool per call, closed on exit
+    async with httpx.AsyncClient(base_url=base_url, timeout=_DEFAULT_TIMEOUT) as client:
+        await request_json(client, "GET", "/ping")
+
+
+async def _shared(base_url: str) -> None:
+    await request_json(get_httpx_client(base_url=base_url), "GET", "/ping")
+
+
+async def _drive(call, base_url: str, calls: int, concurrency: int) -> float:
+    sem = asyncio.Semaphore(concurrency)
+
+    async def one() -> None:
+        async with sem:
+            await call(base_url)
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(calls)))
+    elapsed = time.perf_counter() - t0
+    await close_httpx_clients()
+    return calls / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the shared httpx client registry")
+    parser.add_argument("--calls", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Stub)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    print(f"{args.calls:,} calls, concurrency {args.concurrency}")
+    print(f"{'client':<22} {'calls/s':>10}")
+    print("-" * 33)
+    for name, call in (("fresh client per call", _fresh), ("shared registry", _shared)):
+        rate = asyncio.run(_drive(call, base_url, args.calls, args.concurrency))
+        print(f"{name:<22} {rate:>10,.0f}")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""Bulk import throughput into SQLite: per-row ORM inserts vs NoteImporter chunks.
+
+    python benchmarks/bench_import.py --notes 200000 --chunk-size 1000
+"""
+import argparse
+import contextlib
+import io
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from sqlalchemy import create_engine  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from app.core.events import EventBus  # noqa: E402
+from app.db.models import Base, Note  # noqa: E402
+from app.db.search import init_search_index  # noqa: E402
+from app.services.notes_services import NoteImporter  # noqa: E402
+
+TARGET_PER_S = 50_000
+
+
+def _payloads(n: int) -> list[dict]:
+    return [{"title": f"Imported {i}", "body": f"Body text for imported note {i}"} for i in range(n)]
+
+
+def _fresh_session(tmp: str, name: str):
+    engine = create_engine(f"sqlite:///{tmp}/{name}.db")
+    Base.metadata.create_all(engine)
+    init_search_index(engine)
+    return sessionmaker(bind=engine)()
+
+
+def bench_per_row(tmp: str, items: list[dict]) -> float:
+    # the old bulk_create_notes shape: add_all + one refresh per row
+    db = _fresh_session(tmp, "per_row")
+    t0 = time.perf_counter()
+    notes = [Note(**item) for item in items]
+    db.add_all(notes)
+    db.commit()
+    for note in notes:
+        db.refresh(note)
+    elapsed = time.perf_counter() - t0
+    db.close()
+    return len(items) / elapsed
+
+
+def bench_importer(tmp: str, items: list[dict], chunk_size: int) -> float:
+    db = _fresh_session(tmp, "importer")
+    importer = NoteImporter(db, chunk_size)
+    t0 = time.perf_counter()
+    # the event listeners print one line per chunk
+    with contextlib.redirect_stdout(io.StringIO()):
+        for index, item in enumerate(items):
+            if importer.add(index, item):
+                importer.flush()
+        importer.flush()
+        EventBus.drain()
+    elapsed = time.perf_counter() - t0
+    assert importer.result.imported == len(items), importer.result
+    db.close()
+    return len(items) / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark POST /notes/import insert path")
+    parser.add_argument("--notes", type=int, default=200_000)
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--per-row-notes", type=int, default=20_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        per_row = bench_per_row(tmp, _payloads(args.per_row_notes))
+        chunked = bench_importer(tmp, _payloads(args.notes), args.chunk_size)
+
+    print(f"{'path':<28} {'notes/s':>12}")
+    print("-" * 41)
+    print(f"{'add_all + refresh per row':<28} {per_row:>12,.0f}")
+    print(f"{f'NoteImporter chunk={args.chunk_size}':<28} {chunked:>12,.0f}")
+    status = "OK" if chunked >= TARGET_PER_S else "BELOW TARGET"
+    print(f"\ntarget {TARGET_PER_S:,} notes/s: {status}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""Per-update cost of the metrics hot path, in nanoseconds.
+
+    python benchmarks/bench_metrics.py --number 2000000
+
+The mmap cases are the multi-process (METRICS_MULTIPROC_DIR) storage.
+"""
+import argparse
+import sys
+import tempfile
+import threading
+import timeit
+from dataclasses import dataclass
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.integrations import metrics  # noqa: E402
+
+
+@dataclass
+class OldCounter:
+    # the pre-registry Counter
+    name: str
+    value: int = 0
+
+    def inc(self, n: int = 1) -> None:
+        self.value += n
+
+
+class LockedCounter:
+    # what a lock per increment would cost
+    def __init__(self) -> None:
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, n: int = 1) -> None:
+        with self._lock:
+            self.value += n
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark metric updates")
+    parser.add_argument("--number", type=int, default=2_000_000)
+    args = parser.parse_args()
+    metrics._METRICS_ENABLED = True
+
+    registry = metrics.MetricsRegistry()
+    counter = registry.counter("c_total")
+    child = registry.counter("l_total", labelnames=("status",)).labels("200")
+    labeled = registry.counter("l2_total", labelnames=("status",))
+    histogram = registry.histogram("h_ms")
+    gauge = registry.gauge("g")
+    old, locked = OldCounter("old"), LockedCounter()
+    shared = metrics.MetricsRegistry(tempfile.mkdtemp(prefix="metrics-bench-"))
+    mmap_counter = shared.counter("c_total")
+    mmap_histogram = shared.histogram("h_ms")
+
+    cases = [
+        ("old dataclass Counter.inc", lambda: old.inc()),
+        ("Counter.inc", counter.inc),
+        ("Counter.inc, locked", locked.inc),
+        ("labeled child .inc", child.inc),
+        ("labels('200').inc", lambda: labeled.labels("200").inc()),
+        ("Gauge.set", lambda: gauge.set(3)),
+        ("Histogram.observe", lambda: histogram.observe(12.5)),
+        ("mmap Counter.inc", mmap_counter.inc),
+        ("mmap Histogram.observe", lambda: mmap_histogram.observe(12.5)),
+        ("record_request()", metrics.record_request),
+        ("record_latency_ms()", lambda: metrics.record_latency_ms(12.5)),
+    ]
+    baseline = min(timeit.repeat(lambda: None, number=args.number, repeat=3)) / args.number
+
+    print(f"{args.number:,} calls each; call overhead ({baseline * 1e9:.0f}ns) subtracted")
+    print(f"{'operation':<28} {'ns/op':>8}")
+    print("-" * 37)
+    for name, fn in cases:
+        per_op = min(timeit.repeat(fn, number=args.number, repeat=3)) / args.number
+        print(f"{name:<28} {(per_op - baseline) * 1e9:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
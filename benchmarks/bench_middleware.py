@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""Request logging middleware overhead: none vs the old BaseHTTPMiddleware
+print logger vs the pure-ASGI RequestLoggingMiddleware.
+
+Drives a trivial JSON route in-process through httpx's ASGI transport, so
+the numbers are framework + middleware cost only. Log output goes to
+/dev/null.
+
+    python benchmarks/bench_middleware.py --requests 20000 --concurrency 50
+"""
+import argparse
+import asyncio
+import contextlib
+import logging
+import os
+import queue
+import sys
+import time
+from logging.handlers import QueueListener
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import httpx  # noqa: E402
+from fastapi import FastAPI  # noqa: E402
+from starlette.middleware.base import BaseHTTPMiddleware  # noqa: E402
+
+from app.core.middleware import RequestLoggingMiddleware  # noqa: E402
+from app.logging import JsonFormatter, _DroppingQueueHandler  # noqa: E402
+
+
+class OldRequestLoggingMiddleware(BaseHTTPMiddleware):
+    # the middleware this replaced
+    async def dispatch(self, request, call_next):
+        start = time.time()
+        response = await call_next(request)
+        duration_ms = (time.time() - start) * 1000
+        print(
+            f"[http] {request.method} {request.url.path} {response.status_code} {duration_ms:.0f}ms"
+        )
+        return response
+
+
+def _access_logger(devnull) -> tuple[logging.Logger, QueueListener]:
+    log_queue: queue.Queue = queue.Queue(maxsize=10_000)
+    sink = logging.StreamHandler(devnull)
+    sink.setFormatter(JsonFormatter())
+    listener = QueueListener(log_queue, sink)
+    listener.start()
+    logger = logging.getLogger("bench.access")
+    logger.addHandler(_DroppingQueueHandler(log_queue))
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    return logger, listener
+
+
+def _app(mode: str, logger: logging.Logger) -> FastAPI:
+    app = FastAPI()
+    if mode == "old":
+        app.add_middleware(OldRequestLoggingMiddleware)
+    elif mode == "asgi":
+        app.add_middleware(RequestLoggingMiddleware, logger=logger)
+    elif mode == "asgi-10%":
+        app.add_middleware(RequestLoggingMiddleware, logger=logger, sample_rate=0.1)
+
+    @app.get("/ping")
+    async def ping():
+        return {"ok": True}
+
+    return app
+
+
+async def _drive(app: FastAPI, requests: int, concurrency: int) -> float:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        per_worker = requests // concurrency
+
+        async def worker() -> None:
+            for _ in range(per_worker):
+                await client.get("/ping")
+
+        t0 = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return per_worker * concurrency / (time.perf_counter() - t0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark request logging middleware")
+    parser.add_argument("--requests", type=int, default=20_000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        logger, listener = _access_logger(devnull)
+        results = []
+        for mode in ("none", "old", "asgi", "asgi-10%"):
+            rate = asyncio.run(_drive(_app(mode, logger), args.requests, args.concurrency))
+            results.append((mode, rate))
+        listener.stop()
+
+    print(f"{args.requests:,} requests, concurrency {args.concurrency}")
+    print(f"{'middleware':<10} {'req/s':>10} {'vs none':>8}")
+    print("-" * 30)
+    for mode, rate in results:
+        print(f"{mode:<10} {rate:>10,.0f} {rate / results[0][1]:>7.0%}")
+
+
+if __name__ == "__main__":
+    main()
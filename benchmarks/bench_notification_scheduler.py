@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""Scheduled notifications with a large backlog pending in notification_log.
+
+Seeds --pending notifications due far in the future, then measures insert
+latency at that size and how late near-term notifications actually fire.
+
+    python benchmarks/bench_notification_scheduler.py --pending 1000000 --due 2000
+"""
+import argparse
+import resource
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.config import Settings  # noqa: E402
+from app.core.rate_limit import TokenBucket  # noqa: E402
+from app.db.models import Base  # noqa: E402
+from app.db.session import build_engine  # noqa: E402
+from app.services import notification_service as ns  # noqa: E402
+
+EMAIL = ns.NotificationChannel.EMAIL
+
+
+def _pct(values: list[float], q: float) -> float:
+    return statistics.quantiles(values, n=100)[q - 1] if len(values) > 1 else values[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the notification scheduler")
+    parser.add_argument("--pending", type=int, default=1_000_000)
+    parser.add_argument("--due", type=int, default=2_000)
+    parser.add_argument("--spread-s", type=float, default=2.0)
+    args = parser.parse_args()
+
+    fired: dict[str, float] = {}
+    ns._DISPATCHERS[EMAIL] = lambda recipient, message: fired.setdefault(message, time.time())
+    ns._buckets[EMAIL] = TokenBucket(1_000_000, 1_000_000)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = build_engine(f"sqlite:///{tmp}/sched.db", Settings())
+        Base.metadata.create_all(engine)
+        scheduler = ns.NotificationScheduler(engine)
+
+        far = time.time() + 30 * 86400
+        t0 = time.perf_counter()
+        for start in range(0, args.pending, 50_000):
+            scheduler.schedule_many(
+                [
+                    (EMAIL, f"u{i}@x", "later", far + i)
+                    for i in range(start, min(start + 50_000, args.pending))
+                ]
+            )
+        seed_s = time.perf_counter() - t0
+        # fold the seed into the main file; a steady-state WAL is small
+        with engine.connect() as conn:
+            conn.exec_driver_sql("PRAGMA wal_checkpoint(TRUNCATE)")
+
+        scheduler.start()
+        inserts: list[float] = []
+        send_at: dict[str, float] = {}
+        base = time.time() + 0.5
+        for i in range(args.due):
+            when = base + args.spread_s * i / args.due
+            t0 = time.perf_counter()
+            scheduler.schedule(EMAIL, "a@x", f"due-{i}", when)
+            inserts.append((time.perf_counter() - t0) * 1000.0)
+            send_at[f"due-{i}"] = when
+        deadline = base + args.spread_s + 10
+        while len(fired) < args.due and time.time() < deadline:
+            time.sleep(0.05)
+        scheduler.stop()
+        engine.dispose()
+
+    late = [(fired[m] - t) * 1000.0 for m, t in send_at.items() if m in fired]
+    print(f"{args.pending:,} pending, {args.due:,} due over {args.spread_s:.0f}s")
+    print(f"bulk seed:     {args.pending / seed_s:,.0f} rows/s")
+    print(f"schedule():    p50 {_pct(inserts, 50):.2f}ms  p99 {_pct(inserts, 99):.2f}ms")
+    print(
+        f"fire lateness: p50 {_pct(late, 50):.1f}ms  p99 {_pct(late, 99):.1f}ms  "
+        f"max {max(late):.1f}ms  ({len(late)}/{args.due} fired)"
+    )
+    peak_mib = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"peak RSS:      {peak_mib:.0f} MiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""Bulk notifications: the old serial loop vs dispatch_notifications().
+
+Providers are simulated with a fixed per-call latency; the Slack webhook is
+served by an in-process mock so batching shows up as fewer posts.
+
+    python benchmarks/bench_notifications.py --items 500 --latency-ms 20
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import httpx  # noqa: E402
+
+from app.core.rate_limit import TokenBucket  # noqa: E402
+from app.integrations import slack  # noqa: E402
+from app.services import notification_service as ns  # noqa: E402
+
+CHANNELS = ("email", "slack", "sms")
+
+
+def _notifications(n: int) -> list[dict]:
+    return [
+        {"channel": CHANNELS[i % 3], "recipient": f"r{i % 10}", "message": f"msg {i}"}
+        for i in range(n)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark bulk notification dispatch")
+    parser.add_argument("--items", type=int, default=500)
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    args = parser.parse_args()
+    latency = args.latency_ms / 1000.0
+    calls = {"provider": 0, "slack_posts": 0}
+
+    def provider(recipient: str, message: str) -> None:
+        calls["provider"] += 1
+        time.sleep(latency)
+
+    async def slack_post(request: httpx.Request) -> httpx.Response:
+        calls["slack_posts"] += 1
+        await asyncio.sleep(latency)
+        return httpx.Response(200, json={"ok": True})
+
+    for channel in ns.NotificationChannel:
+        ns._DISPATCHERS[channel] = provider
+        # measure dispatch, not the production provider limits
+        ns._buckets[channel] = TokenBucket(1_000_000, 1_000_000)
+    notifications = _notifications(args.items)
+
+    t0 = time.perf_counter()
+    for n in notifications:
+        ns.send_notification(ns.NotificationChannel(n["channel"]), n["recipient"], n["message"])
+    serial_s = time.perf_counter() - t0
+    serial_calls = calls["provider"]
+
+    calls["provider"] = 0
+    os.environ["SLACK_WEBHOOK_URL"] = "http://slack.bench/hook"
+
+    async def run() -> list:
+        client = httpx.AsyncClient(transport=httpx.MockTransport(slack_post))
+        slack.get_httpx_client = lambda: client
+        try:
+            return await ns.dispatch_notifications(notifications)
+        finally:
+            await client.aclose()
+
+    t0 = time.perf_counter()
+    results = asyncio.run(run())
+    bulk_s = time.perf_counter() - t0
+    sent = sum(r.status == "sent" for r in results)
+
+    print(f"{args.items} notifications, {args.latency_ms:.0f}ms per provider call")
+    print(f"{'mode':<8} {'seconds':>8} {'msg/s':>10} {'provider calls':>15}")
+    print("-" * 44)
+    print(f"{'serial':<8} {serial_s:>8.2f} {args.items / serial_s:>10,.0f} {serial_calls:>15}")
+    bulk_calls = calls["provider"] + calls["slack_posts"]
+    print(f"{'bulk':<8} {bulk_s:>8.2f} {args.items / bulk_s:>10,.0f} {bulk_calls:>15}")
+    print(f"sent {sent}/{args.items}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""Rate limiter with 1M distinct clients: the old per-IP timestamp lists vs GCRA.
+
+Every other request comes from one hot client, the rest sweep through
+`--clients` distinct ones. Each mode runs in its own subprocess so peak RSS
+(ru_maxrss) is per mode.
+
+    python benchmarks/bench_rate_limit.py --clients 1000000 --max-requests 100
+"""
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+MODES = ("old", "gcra", "gcra-lru")
+
+
+def _child(mode: str, clients: int, max_requests: int) -> None:
+    from app.core.rate_limit import InMemoryRateLimitStore, RateLimit
+
+    window = 60.0
+    keys = [f"10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}" for i in range(clients)]
+    base_kib = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    if mode == "old":
+        # the pre-GCRA RateLimitMiddleware.dispatch body
+        counters: dict[str, list[float]] = {}
+
+        def hit(ip: str) -> bool:
+            now = time.time()
+            hits = counters.setdefault(ip, [])
+            hits[:] = [t for t in hits if now - t < window]
+            if len(hits) >= max_requests:
+                return False
+            hits.append(now)
+            return True
+
+        size = counters.__len__
+    else:
+        # "gcra" has room for every client; "gcra-lru" keeps a tenth of them
+        store = InMemoryRateLimitStore(max_keys=clients + 1 if mode == "gcra" else clients // 10)
+        limit = RateLimit(max_requests, window)
+
+        def hit(ip: str) -> bool:
+            return store.check(ip, limit) == 0.0
+
+        size = store.__len__
+
+    denied = 0
+    t0 = time.perf_counter()
+    for key in keys:
+        denied += not hit("hot")
+        denied += not hit(key)
+    elapsed = time.perf_counter() - t0
+    peak_kib = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(
+        json.dumps(
+            {
+                "elapsed": elapsed,
+                "requests": 2 * clients,
+                "denied": denied,
+                "tracked": size(),
+                "state_mib": (peak_kib - base_kib) / 1024,
+            }
+        )
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the rate limiter")
+    parser.add_argument("--clients", type=int, default=1_000_000)
+    parser.add_argument("--max-requests", type=int, default=100)
+    parser.add_argument("--child", choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        _child(args.child, args.clients, args.max_requests)
+        return
+
+    print(f"{args.clients:,} clients + one hot client, {args.max_requests} requests / 60s")
+    print(f"{'mode':<9} {'ns/req':>8} {'denied':>10} {'tracked':>10} {'state MiB':>10}")
+    print("-" * 51)
+    for mode in MODES:
+        out = subprocess.run(
+            [
+                sys.executable,
+                __file__,
+                "--child",
+                mode,
+                "--clients",
+                str(args.clients),
+                "--max-requests",
+                str(args.max_requests),
+            ],
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout
+        r = json.loads(out.strip().splitlines()[-1])
+        print(
+            f"{mode:<9} {r['elapsed'] / r['requests'] * 1e9:>8.0f} {r['denied']:>10,} "
+            f"{r['tracked']:>10,} {r['state_mib']:>10.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""Search latency: LIKE scan vs FTS5 vs the in-process inverted index.
+
+    python benchmarks/bench_search.py --sizes 10000,100000,1000000
+"""
+import argparse
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from sqlalchemy import create_engine, text  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from app.db.models import Base  # noqa: E402
+from app.db.search import Fts5SearchIndex, InvertedSearchIndex  # noqa: E402
+
+VOCAB = [f"w{i:05d}" for i in range(20_000)]
+QUERIES = ["w00042", "w01234 w00007", "w1999", "w00500 w00501", "w123"]
+
+
+def _seed(engine, n: int) -> None:
+    rng = random.Random(n)
+    with engine.begin() as conn:
+        batch = []
+        for i in range(n):
+            title = " ".join(rng.choices(VOCAB, k=4))
+            body = " ".join(rng.choices(VOCAB, k=40))
+            batch.append({"title": title, "body": body})
+            if len(batch) == 10_000:
+                conn.execute(text("INSERT INTO notes (title, body) VALUES (:title, :body)"), batch)
+                batch.clear()
+        if batch:
+            conn.execute(text("INSERT INTO notes (title, body) VALUES (:title, :body)"), batch)
+
+
+def _like_scan(db, q: str, limit: int) -> list[int]:
+    rows = db.execute(
+        text(
+            "SELECT id FROM notes WHERE title LIKE :q OR body LIKE :q ORDER BY id DESC LIMIT :limit"
+        ),
+        {"q": f"%{q}%", "limit": limit},
+    )
+    return [r[0] for r in rows]
+
+
+def _time(fn, rounds: int) -> tuple[float, float]:
+    samples = []
+    for _ in range(rounds):
+        for q in QUERIES:
+            t0 = time.perf_counter()
+            fn(q)
+            samples.append((time.perf_counter() - t0) * 1000.0)
+    samples.sort()
+    return statistics.median(samples), samples[int(len(samples) * 0.99) - 1]
+
+
+def run(n: int, rounds: int, with_python: bool) -> list[tuple[str, float, float]]:
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{tmp}/bench.db")
+        Base.metadata.create_all(engine)
+        _seed(engine, n)
+        Session = sessionmaker(bind=engine)
+
+        results = []
+        with Session() as db:
+            results.append(("LIKE scan", *_time(lambda q: _like_scan(db, q, 50), rounds)))
+
+            fts = Fts5SearchIndex()
+            t0 = time.perf_counter()
+            with engine.begin() as conn:
+                fts.rebuild(conn)
+            print(f"  fts5 build: {time.perf_counter() - t0:.1f}s")
+            results.append(("FTS5", *_time(lambda q: fts.search(db, q, 50), rounds)))
+
+            if with_python:
+                inv = InvertedSearchIndex()
+                t0 = time.perf_counter()
+                with engine.connect() as conn:
+                    inv.rebuild(conn)
+                print(f"  inverted build: {time.perf_counter() - t0:.1f}s")
+                results.append(("inverted index", *_time(lambda q: inv.search(db, q, 50), rounds)))
+        engine.dispose()
+        return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark /notes/search backends")
+    parser.add_argument("--sizes", default="10000,100000,1000000")
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument(
+        "--skip-python", action="store_true", help="skip the in-process inverted index"
+    )
+    args = parser.parse_args()
+
+    print(f"{'notes':>10}  {'backend':<16} {'p50 ms':>10} {'p99 ms':>10}")
+    print("-" * 50)
+    for n in (int(s) for s in args.sizes.split(",")):
+        print(f"seeding {n:,} notes...")
+        for name, p50, p99 in run(n, args.rounds, not args.skip_python):
+            print(f"{n:>10,}  {name:<16} {p50:>10.2f} {p99:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""Per-span cost of the tracer, disabled and enabled.
+
+Times `with tracer.span(...)` and a @traced function against an untraced
+call; the difference is what tracing adds to each crud/service/emit call.
+
+    python benchmarks/bench_tracing.py --spans 1000000
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.core.tracing import traced, tracer  # noqa: E402
+
+
+def _plain(x):
+    return x
+
+
+@traced(cat="bench")
+def _traced(x):
+    return x
+
+
+def _loop_span(n: int) -> float:
+    span = tracer.span
+    t0 = time.perf_counter()
+    for i in range(n):
+        with span("bench.span", cat="bench", i=i):
+            pass
+    return time.perf_counter() - t0
+
+
+def _loop_call(fn, n: int) -> float:
+    t0 = time.perf_counter()
+    for i in range(n):
+        fn(i)
+    return time.perf_counter() - t0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark tracing overhead")
+    parser.add_argument("--spans", type=int, default=1_000_000)
+    args = parser.parse_args()
+    n = args.spans
+
+    baseline = _loop_call(_plain, n)
+    rows = []
+    for enabled in (False, True):
+        tracer.configure(enabled=enabled, max_spans=10_000)
+        rows.append(("span()", enabled, _loop_span(n)))
+        rows.append(("@traced", enabled, _loop_call(_traced, n) - baseline))
+    tracer.configure(enabled=False)
+
+    print(f"{n:,} spans; untraced call {baseline / n * 1e9:.0f} ns")
+    print(f"{'form':<8} {'tracing':<8} {'ns/span':>8}")
+    print("-" * 26)
+    for form, enabled, elapsed in rows:
+        print(f"{form:<8} {'on' if enabled else 'off':<8} {elapsed / n * 1e9:>8.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -18,19 +18,58 @@ def db_session():
 
 
 @pytest.fixture
-def mock_redis():  # UNUSED (demo)
+def mock_redis():
+    class FakePipeline:
+        def __init__(self, redis):
+            self._redis = redis
+            self._ops: list = []
+
+        def __getattr__(self, name):
+            def queue(*args, **kwargs):
+                self._ops.append((name, args, kwargs))
+                return self
+
+            return queue
+
+        def execute(self):
+            self._redis.round_trips += 1
+            ops, self._ops = self._ops, []
+            return [getattr(self._redis, name)(*a, **kw) for name, a, kw in ops]
+
     class FakeRedis:
         def __init__(self):
             self._data: dict = {}
+            self.ttls: dict = {}
+            self.round_trips = 0
 
         def get(self, key):
             return self._data.get(key)
 
+        def mget(self, keys):
+            self.round_trips += 1
+            return [self._data.get(k) for k in keys]
+
         def set(self, key, value, ex=None):
             self._data[key] = value
+            self.ttls[key] = ex
+
+        def delete(self, *keys):
+            return sum(self._data.pop(k, None) is not None for k in keys)
+
+        def sadd(self, key, *members):
+            self._data.setdefault(key, set()).update(members)
+
+        def srem(self, key, *members):
+            self._data.get(key, set()).difference_update(members)
+
+        def smembers(self, key):
+            return set(self._data.get(key, set()))
+
+        def expire(self, key, seconds):
+            self.ttls[key] = seconds
 
-        def delete(self, key):
-            self._data.pop(key, None)
+        def pipeline(self, transaction=True):
+            return FakePipeline(self)
 
     return FakeRedis()
 
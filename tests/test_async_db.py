@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+import asyncio
+import uuid
+
+from app.core.decorators import retry
+from app.core.pagination import CursorParams, PageParams
+from app.db import crud
+from app.db.session import AsyncSessionLocal, init_db
+from app.schemas.notes import NoteCreate, NoteUpdate
+
+
+def test_async_crud_round_trip():
+    init_db()
+    old, new = f"aold{uuid.uuid4().hex[:10]}", f"anew{uuid.uuid4().hex[:10]}"
+
+    async def run():
+        async with AsyncSessionLocal() as db:
+            note = await crud.create_note_async(db, NoteCreate(title=old, body="body"))
+            assert (await crud.get_note_by_id_async(db, note.id)).title == old
+            assert [n.id for n in await crud.search_notes_async(db, old)] == [note.id]
+
+            page = await crud.list_notes_async(db, PageParams(page=1, size=1))
+            assert page.items[0].id == note.id
+            keyset = await crud.list_notes_after_async(db, CursorParams(limit=1))
+            assert keyset.items[0].id == note.id and keyset.has_more == (page.total > 1)
+
+            await crud.update_note_async(db, note.id, NoteUpdate(title=new, body="body"))
+            assert await crud.search_notes_async(db, old) == []
+            assert [n.id for n in await crud.search_notes_async(db, new)] == [note.id]
+
+            assert await crud.delete_note_async(db, note.id)
+            assert not await crud.delete_note_async(db, note.id)
+            assert await crud.search_notes_async(db, new) == []
+
+    asyncio.run(run())
+
+
+def test_retry_awaits_coroutines():
+    attempts = []
+
+    @retry(max_attempts=3, delay=0)
+    async def flaky():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise RuntimeError("boom")
+        return "ok"
+
+    assert asyncio.run(flaky()) == "ok"
+    assert len(attempts) == 3
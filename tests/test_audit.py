@@ -0,0 +1,185 @@
+from __future__ import annotations
+
+import csv
+import gzip
+import io
+import time
+
+import pytest
+from sqlalchemy import create_engine, func, inspect, select, text
+
+from app.core.events import EventBus
+from app.db.models import AuditLog, Base
+from app.db.session import upgrade_schema
+from app.services import audit_service
+from app.services.audit_service import (
+    AUDIT_EXPORT_FIELDS,
+    AuditEntry,
+    AuditWriter,
+    export_audit_csv,
+    query_audit_log,
+)
+from tests.helpers import create_test_note
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/audit.db")
+    Base.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+def _count(engine) -> int:
+    with engine.connect() as conn:
+        return conn.execute(select(func.count()).select_from(AuditLog)).scalar_one()
+
+
+def test_writer_flushes_on_batch_size(engine):
+    writer = AuditWriter(engine, batch_size=10, flush_interval_s=60)
+    writer.start()
+    try:
+        for i in range(10):
+            writer.append(AuditEntry("create", "note", i))
+        deadline = time.time() + 5
+        while _count(engine) < 10:
+            assert time.time() < deadline
+            time.sleep(0.01)
+    finally:
+        writer.stop()
+
+
+def test_stop_drains_buffer(engine):
+    writer = AuditWriter(engine, batch_size=1000, flush_interval_s=60)
+    writer.start()
+    for i in range(25):
+        writer.append(AuditEntry("update", "note", i, actor="alice"))
+    writer.stop()
+    assert _count(engine) == 25 and writer.pending() == 0
+
+
+def test_full_ring_drops_oldest(engine):
+    writer = AuditWriter(engine, capacity=3)
+    for i in range(5):
+        writer.append(AuditEntry("create", "note", i))
+    assert writer.dropped == 2
+    writer.flush()
+    with engine.connect() as conn:
+        ids = conn.execute(select(AuditLog.entity_id).order_by(AuditLog.id)).scalars().all()
+    assert ids == [2, 3, 4]
+
+
+def test_failed_flush_keeps_entries(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/empty.db")  # no audit_log table yet
+    writer = AuditWriter(engine)
+    writer.append(AuditEntry("create", "note", 1))
+    with pytest.raises(Exception):
+        writer.flush()
+    assert writer.pending() == 1
+    Base.metadata.create_all(engine)
+    assert writer.flush() == 1
+
+
+def test_requeue_into_a_refilled_ring_counts_what_it_drops(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/empty.db")
+    writer = AuditWriter(engine, capacity=4, batch_size=3)
+    for i in range(3):
+        writer.append(AuditEntry("create", "note", i))
+    real_begin = engine.begin
+
+    def begin_while_busy():
+        # entries keep arriving while the failing batch is out of the ring
+        for i in range(3, 6):
+            writer.append(AuditEntry("create", "note", i))
+        return real_begin()
+
+    engine.begin = begin_while_busy
+    with pytest.raises(Exception):
+        writer.flush()
+    assert (writer.pending(), writer.dropped) == (4, 2)
+    assert [e.entity_id for e in writer._buffer] == [2, 3, 4, 5]
+
+
+def test_stop_logs_a_failed_final_flush(tmp_path, caplog):
+    writer = AuditWriter(create_engine(f"sqlite:///{tmp_path}/empty.db"))
+    writer.append(AuditEntry("create", "note", 1))
+    writer.stop()
+    assert "final audit flush failed" in caplog.text
+
+
+def test_upgrade_schema_adds_actor_to_a_pre_existing_audit_log(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/old.db")
+    with engine.begin() as conn:
+        conn.execute(
+            text(
+                "CREATE TABLE audit_log (id INTEGER PRIMARY KEY, action VARCHAR(100) NOT NULL, "
+                "entity_type VARCHAR(50) NOT NULL, entity_id INTEGER NOT NULL, "
+                "timestamp VARCHAR(50) NOT NULL)"
+            )
+        )
+        conn.execute(
+            text(
+                "INSERT INTO audit_log (action, entity_type, entity_id, timestamp) "
+                "VALUES ('create', 'note', 1, '2024-01-01')"
+            )
+        )
+    Base.metadata.create_all(engine)
+    upgrade_schema(engine)
+    upgrade_schema(engine)  # idempotent
+
+    writer = AuditWriter(engine)
+    writer.append(AuditEntry("update", "note", 1, actor="alice"))
+    assert writer.flush() == 1
+    with engine.connect() as conn:
+        actors = conn.execute(select(AuditLog.actor).order_by(AuditLog.id)).scalars().all()
+        indexes = {i["name"] for i in inspect(conn).get_indexes("audit_log")}
+    assert actors == ["system", "alice"]
+    assert "ix_audit_log_entity" in indexes
+    engine.dispose()
+
+
+def test_note_writes_are_audited_and_queryable(test_client, api_key_header):
+    note_id = create_test_note(test_client, title="Audited", body="b")["id"]
+    test_client.put(
+        f"/notes/{note_id}", json={"title": "Audited 2", "body": "b"}, headers=api_key_header
+    )
+    assert EventBus.drain(2)
+
+    entries = query_audit_log("note", note_id)
+    assert [(e.action, e.entity_id) for e in entries] == [("create", note_id), ("update", note_id)]
+    assert audit_service.audit_writer.pending() == 0
+
+
+def test_export_escapes_and_compresses():
+    rows = [
+        {
+            "action": "update",
+            "entity_type": "note",
+            "entity_id": 1,
+            "actor": 'eve, "the" admin\nline2',
+            "timestamp": "2024-01-01T00:00:00",
+        }
+    ]
+    plain = b"".join(export_audit_csv(rows))
+    parsed = list(csv.reader(io.StringIO(plain.decode())))
+    assert parsed[0] == list(AUDIT_EXPORT_FIELDS)
+    assert parsed[1][3] == 'eve, "the" admin\nline2'
+
+    assert gzip.decompress(b"".join(export_audit_csv(rows, compress=True))) == plain
+
+
+def test_audit_export_endpoint_streams_recent_entries(test_client, api_key_header):
+    note_id = create_test_note(test_client, title="Exported", body="b")["id"]
+    assert EventBus.drain(2)
+
+    resp = test_client.get("/admin/audit/export?days=1&gzip=true", headers=api_key_header)
+    assert resp.status_code == 200
+    assert resp.headers["content-type"] == "application/gzip"
+    rows = list(csv.DictReader(io.StringIO(gzip.decompress(resp.content).decode())))
+    assert {"action": "create", "entity_id": str(note_id)}.items() <= rows[-1].items()
+
+    assert test_client.get("/admin/audit/export").status_code == 401
+    listed = test_client.get(
+        f"/admin/audit?entity_type=note&entity_id={note_id}", headers=api_key_header
+    ).json()
+    assert [e["action"] for e in listed] == ["create"]
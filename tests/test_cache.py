@@ -0,0 +1,303 @@
+from __future__ import annotations
+
+import asyncio
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+import pytest
+
+from app.core import cache as cache_module
+from app.core.cache import (
+    CacheBackend,
+    InMemoryCache,
+    RedisCache,
+    TieredCache,
+    _default_cache,
+    _Stamped,
+    cache_stats,
+    cached,
+    configure_cache,
+    invalidate_cache_for,
+)
+from tests.helpers import assert_json_response, create_test_note
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_lru_eviction_keeps_recently_read_keys():
+    cache = InMemoryCache(max_entries=2)
+    cache.set("a:1", 1)
+    cache.set("a:2", 2)
+    assert cache.get("a:1") == 1
+    cache.set("a:3", 3)
+    assert cache.get("a:2") is None
+    assert cache.get("a:1") == 1
+    assert cache.stats()["evictions"] == 1
+
+
+def test_max_bytes_bound():
+    cache = InMemoryCache(max_bytes=10)
+    cache.set("b:1", b"x" * 6)
+    cache.set("b:2", b"y" * 6)
+    assert cache.get("b:1") is None
+    assert cache.stats()["bytes"] == 6
+
+
+def test_cold_keys_are_swept_without_being_read():
+    clock = FakeClock()
+    cache = InMemoryCache(default_ttl=10, clock=clock)
+    for i in range(5):
+        cache.set(f"cold:{i}", i)
+    clock.now = 11
+    cache.set("warm:1", "fresh")
+    stats = cache.stats()
+    assert stats["entries"] == 1
+    assert stats["expirations"] == 5
+
+
+def test_overwritten_key_keeps_its_new_deadline():
+    clock = FakeClock()
+    cache = InMemoryCache(default_ttl=10, clock=clock)
+    cache.set("k:1", "old")
+    clock.now = 5
+    cache.set("k:1", "new")
+    clock.now = 12
+    assert cache.sweep() == 0
+    assert cache.get("k:1") == "new"
+
+
+def test_namespace_limit_and_invalidation():
+    cache = InMemoryCache()
+    cache.set_namespace_limit("notes", 2)
+    for i in range(3):
+        cache.set(f"notes:{i}", i)
+    cache.set("users:1", "u")
+    assert cache.get("notes:0") is None
+    assert cache.delete_namespace("notes") == 2
+    assert cache.get("users:1") == "u"
+    assert cache.stats()["entries"] == 1
+
+
+def test_cached_key_ignores_injected_arguments():
+    calls = []
+
+    @cached("test_ignore", ignore=("db",))
+    def load(db, page: int = 1):
+        calls.append(page)
+        return f"page {page}"
+
+    assert load(object(), page=1) == load(object(), 1) == "page 1"
+    load(object(), page=2)
+    assert calls == [1, 2]
+
+
+def test_cached_rejects_unstable_key_arguments():
+    @cached("test_unstable")
+    def load(db):
+        return "x"
+
+    with pytest.raises(TypeError, match="db"):
+        load(object())
+
+
+def test_cached_supports_async_functions():
+    calls = []
+
+    @cached("test_async", key_args=("note_id",))
+    async def load(note_id: int, trace: object = None):
+        calls.append(note_id)
+        return {"id": note_id}
+
+    async def run():
+        return [await load(1, object()), await load(note_id=1)]
+
+    assert asyncio.run(run()) == [{"id": 1}, {"id": 1}]
+    assert calls == [1]
+
+
+def test_note_pages_are_invalidated_on_write(test_client, api_key_header):
+    first = test_client.get("/notes/?size=1", headers=api_key_header)
+    assert test_client.get("/notes/?size=1", headers=api_key_header).content == first.content
+
+    note = create_test_note(test_client, title="Fresh", body="Body")
+    created = test_client.get("/notes/?size=1", headers=api_key_header).json()
+    assert created[0]["id"] == note["id"]
+
+    resp = test_client.put(
+        f"/notes/{note['id']}", json={"title": "Edited", "body": "Body"}, headers=api_key_header
+    )
+    assert_json_response(resp)
+    updated = test_client.get("/notes/?size=1", headers=api_key_header).json()
+    assert updated[0]["title"] == "Edited"
+
+
+def test_update_missing_note_returns_404(test_client, api_key_header):
+    resp = test_client.put(
+        "/notes/999999999", json={"title": "Nope", "body": "Body"}, headers=api_key_header
+    )
+    assert resp.status_code == 404
+
+
+def test_redis_cache_pipelines_multi_key_ops(mock_redis):
+    cache = RedisCache(client=mock_redis, default_ttl=30)
+    cache.set_many({"notes:a": (b"body", {"X": "1"}), "notes:b": [1, 2]})
+    assert mock_redis.round_trips == 1
+    assert mock_redis.ttls["notes:a"] == 30
+
+    assert cache.get_many(["notes:a", "notes:b", "notes:c"]) == {
+        "notes:a": (b"body", {"X": "1"}),
+        "notes:b": [1, 2],
+    }
+    assert mock_redis.round_trips == 2
+
+    assert cache.delete_namespace("notes") == 2
+    assert cache.get("notes:a") is None
+
+
+def test_tiered_cache_fills_l1_from_l2(mock_redis):
+    l2 = RedisCache(client=mock_redis)
+    l2.set("notes:shared", "from another instance")
+    tiered = TieredCache(InMemoryCache(), l2)
+
+    assert tiered.get("notes:shared") == "from another instance"
+    mock_redis.delete("notes:shared")
+    assert tiered.get("notes:shared") == "from another instance"
+
+    tiered.delete_namespace("notes")
+    assert tiered.get("notes:shared") is None
+
+
+def test_tiered_cache_survives_l2_outage():
+    class DownRedis(CacheBackend):
+        def get(self, key):
+            raise ConnectionError("redis down")
+
+        get_many = set = set_many = delete = delete_namespace = get
+
+    tiered = TieredCache(InMemoryCache(), DownRedis())
+    tiered.set("notes:1", "local")
+    assert tiered.get("notes:1") == "local"
+    assert tiered.delete_namespace("notes") == 1
+
+
+def test_cached_reads_through_configured_backend(mock_redis):
+    calls = []
+
+    @cached("test_tiered")
+    def load(note_id: int):
+        calls.append(note_id)
+        return {"id": note_id}
+
+    configure_cache(RedisCache(client=mock_redis))
+    try:
+        assert load(7) == {"id": 7}
+        _default_cache.delete_namespace("test_tiered")
+        assert load(7) == {"id": 7}
+    finally:
+        configure_cache(None)
+    assert calls == [7]
+
+
+def test_concurrent_misses_share_one_computation():
+    calls = []
+    gate = threading.Event()
+
+    @cached("test_flight_sync")
+    def load(note_id: int):
+        calls.append(note_id)
+        gate.wait(2)
+        return {"id": note_id}
+
+    before = cache_stats()["coalesced_waiters"]
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        futures = [pool.submit(load, 1) for _ in range(8)]
+        while cache_stats()["coalesced_waiters"] - before < 7:
+            time.sleep(0.001)
+        gate.set()
+        results = [f.result() for f in futures]
+
+    assert calls == [1]
+    assert results == [{"id": 1}] * 8
+
+
+def test_async_callers_are_coalesced():
+    calls = []
+
+    @cached("test_flight_async")
+    async def load(note_id: int):
+        calls.append(note_id)
+        await asyncio.sleep(0.01)
+        return note_id * 2
+
+    async def run():
+        return await asyncio.gather(*(load(3) for _ in range(5)))
+
+    assert asyncio.run(run()) == [6] * 5
+    assert calls == [3]
+
+
+def test_stale_value_is_served_while_one_caller_refreshes(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache_module, "time", SimpleNamespace(time=lambda: now[0]))
+    versions = iter(["v1", "v2"])
+    refreshing, release = threading.Event(), threading.Event()
+
+    @cached("test_swr", ttl=10, stale_ttl=10, beta=0)
+    def load():
+        value = next(versions)
+        if value == "v2":
+            refreshing.set()
+            release.wait(2)
+        return value
+
+    assert load() == "v1"
+    now[0] += 15
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        leader = pool.submit(load)
+        refreshing.wait(2)
+        assert load() == "v1"
+        release.set()
+        assert leader.result() == "v2"
+    assert load() == "v2"
+
+
+def test_invalidation_reaches_a_computation_already_running():
+    versions = iter(["old", "new"])
+    computing, release = threading.Event(), threading.Event()
+
+    @cached("test_flight_invalidate", ttl=60)
+    def load():
+        value = next(versions)
+        if value == "old":
+            computing.set()
+            release.wait(2)
+        return value
+
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        leader = pool.submit(load)
+        computing.wait(2)
+        invalidate_cache_for("test_flight_invalidate")
+        # a read after the write does not join the pre-write flight
+        assert load() == "new"
+        release.set()
+        assert leader.result() == "old"
+    assert load() == "new"
+
+
+def test_early_expiration_probability_grows_near_expiry():
+    random.seed(7)
+    entry = _Stamped("v", fresh_until=100.0, delta=5.0)
+    near = sum(entry.needs_refresh(99.0, beta=1.0) for _ in range(1000))
+    far = sum(entry.needs_refresh(0.0, beta=1.0) for _ in range(1000))
+    assert 700 < near < 900
+    assert far == 0
+    assert not entry.needs_refresh(99.9, beta=0)
@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import TimeoutError as PoolTimeout
+
+from app.config import Settings
+from app.db.session import async_engine, build_engine, pool_stats
+
+
+def test_sqlite_pragmas_are_applied(tmp_path):
+    engine = build_engine(f"sqlite:///{tmp_path}/p.db", Settings(sqlite_busy_timeout_ms=1234))
+    with engine.connect() as conn:
+        assert conn.exec_driver_sql("PRAGMA journal_mode").scalar() == "wal"
+        assert conn.exec_driver_sql("PRAGMA synchronous").scalar() == 1
+        assert conn.exec_driver_sql("PRAGMA busy_timeout").scalar() == 1234
+    engine.dispose()
+
+
+def test_async_engine_gets_the_same_pragmas():
+    async def run():
+        async with async_engine.connect() as conn:
+            return (await conn.execute(text("PRAGMA synchronous"))).scalar()
+
+    assert asyncio.run(run()) == 1
+
+
+def test_pool_stats_count_waits(tmp_path):
+    conf = Settings(db_pool_size=1, db_max_overflow=0, db_pool_timeout=0.05)
+    engine = build_engine(f"sqlite:///{tmp_path}/w.db", conf)
+    held = engine.connect()
+    assert pool_stats(engine.pool)["checked_out"] == 1
+    with pytest.raises(PoolTimeout):
+        engine.connect()
+    assert pool_stats(engine.pool)["waits"] == 1
+    held.close()
+    engine.dispose()
+
+
+def test_in_memory_sqlite_keeps_default_pool():
+    engine = build_engine("sqlite://", Settings(db_pool_size=3))
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT 1")).scalar() == 1
+    assert pool_stats(engine.pool)["class"] != "_QueuePool"
+
+
+def test_health_db_reports_pool(test_client, api_key_header):
+    data = test_client.get("/health/db", headers=api_key_header).json()
+    assert data["pool"]["size"] >= 1
+    assert "waits" in data["async_pool"]
@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app.core.events import EventBus, _Dispatcher, _SyncCall
+
+
+@pytest.fixture
+def listen():
+    registered: list[tuple[str, object]] = []
+
+    def register(event_name: str, fn, **options):
+        EventBus.on(event_name, **options)(fn)
+        registered.append((event_name, fn))
+        return fn
+
+    yield register
+    for event_name, fn in registered:
+        EventBus.off(event_name, fn)
+
+
+def test_sync_listeners_run_off_the_emitting_thread(listen):
+    threads = []
+    listen("t_sync", lambda **kw: threads.append((threading.get_ident(), kw["n"])))
+
+    EventBus.emit("t_sync", n=1)
+    assert EventBus.drain(2)
+    assert threads and threads[0][0] != threading.get_ident()
+    assert threads[0][1] == 1
+
+
+def test_failing_listener_is_isolated_and_dead_lettered(listen):
+    seen = []
+
+    def boom(**kwargs):
+        raise ValueError("nope")
+
+    listen("t_fail", boom)
+    listen("t_fail", lambda **kw: seen.append(kw))
+
+    EventBus.emit("t_fail", n=2)
+    assert EventBus.drain(2)
+    assert seen == [{"n": 2}]
+    letter = EventBus.dead_letters()[-1]
+    assert letter.event_name == "t_fail" and "nope" in letter.error and letter.kwargs == {"n": 2}
+
+
+def test_async_listener_timeout(listen):
+    async def slow(**kwargs):
+        await asyncio.sleep(1)
+
+    listen("t_slow", slow, timeout=0.01)
+    EventBus.emit("t_slow")
+    assert EventBus.drain(2)
+    assert "timed out" in EventBus.dead_letters()[-1].error
+
+
+def test_emit_batch_and_latency_histogram(listen):
+    got = []
+    listen("t_batch", lambda **kw: got.append(kw["i"]))
+
+    EventBus.emit_batch("t_batch", [{"i": i} for i in range(50)])
+    assert EventBus.drain(2)
+    assert sorted(got) == list(range(50))
+    hist = EventBus.stats()["latency_ms"]["t_batch"]
+    assert hist["count"] == 50 and sum(hist["buckets"].values()) == 50
+
+
+def test_inline_listener_runs_before_emit_returns(listen):
+    got = []
+    listen("t_inline", lambda **kw: got.append(kw["n"]), inline=True)
+    EventBus.emit("t_inline", n=3)
+    assert got == [3]
+
+    async def nope(**kwargs):
+        pass
+
+    with pytest.raises(TypeError):
+        EventBus.on("t_inline", inline=True)(nope)
+
+
+def test_emit_async_awaits_listeners(listen):
+    got = []
+
+    async def handler(**kwargs):
+        got.append(kwargs["n"])
+
+    listen("t_await", handler)
+    asyncio.run(EventBus.emit_async("t_await", n=4))
+    assert got == [4]
+
+
+def test_full_dispatch_queue_dead_letters(listen, monkeypatch):
+    monkeypatch.setattr(EventBus, "_dispatcher", _Dispatcher(max_pending=0))
+    listen("t_full", lambda **kw: None)
+    EventBus.emit("t_full", n=5)
+    assert EventBus.dead_letters()[-1].error == "dispatch queue full"
+
+
+def test_timed_out_sync_listeners_are_skipped_and_do_not_starve_the_pool(listen, monkeypatch):
+    monkeypatch.setattr(EventBus, "_dispatcher", _Dispatcher(sync_workers=2))
+    gate = threading.Event()
+    calls = []
+    seen = []
+
+    def make_hung(i):
+        def hung(**kwargs):
+            calls.append(i)
+            gate.wait(5)
+
+        return hung
+
+    hung = [listen("t_hung", make_hung(i), timeout=0.05) for i in range(2)]
+    listen("t_ok", lambda **kw: seen.append(kw), timeout=1)
+
+    EventBus.emit("t_hung")
+    assert EventBus.drain(2)
+    # both pool threads are still stuck, yet other listeners get a thread
+    EventBus.emit("t_ok", n=1)
+    assert EventBus.drain(2)
+    assert seen == [{"n": 1}]
+
+    EventBus.emit("t_hung")
+    assert EventBus.drain(2)
+    assert sorted(calls) == [0, 1]
+    assert EventBus.dead_letters()[-1].error == "skipped: a timed-out call is still running"
+
+    gate.set()
+    for _ in range(100):
+        if not any(_SyncCall.is_overdue(fn) for fn in hung):
+            break
+        time.sleep(0.01)
+    EventBus.emit("t_hung")
+    assert EventBus.drain(2)
+    assert len(calls) == 4
@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+import csv
+import io
+import json
+
+from app.services.export_service import stream_export
+from tests.helpers import create_test_note
+
+FIELDS = ("id", "title", "body")
+ROWS = [
+    {"id": 1, "title": 'Quote "me", please', "body": "line one\nline two"},
+    {"id": 2, "title": "<b>xml</b> & co", "body": "plain"},
+]
+
+
+def _collect(fmt: str) -> str:
+    return b"".join(stream_export(iter(ROWS), fmt, FIELDS)).decode()
+
+
+def test_stream_csv_escapes_fields():
+    parsed = list(csv.reader(io.StringIO(_collect("csv"))))
+    assert parsed[0] == list(FIELDS)
+    assert parsed[1] == ["1", 'Quote "me", please', "line one\nline two"]
+
+
+def test_stream_json_and_ndjson_match_rows():
+    assert json.loads(_collect("json")) == ROWS
+    assert [json.loads(line) for line in _collect("ndjson").splitlines()] == ROWS
+
+
+def test_stream_xml_escapes_text():
+    assert "<title>&lt;b&gt;xml&lt;/b&gt; &amp; co</title>" in _collect("xml")
+
+
+def test_export_endpoint_streams_all_notes(test_client, api_key_header):
+    note = create_test_note(test_client, title="Exported", body="Stream me")
+    resp = test_client.get("/notes/export?format=ndjson", headers=api_key_header)
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("application/x-ndjson")
+    exported = [json.loads(line) for line in resp.text.splitlines()]
+    assert note in exported
+
+
+def test_export_endpoint_rejects_unknown_format(test_client, api_key_header):
+    resp = test_client.get("/notes/export?format=yaml", headers=api_key_header)
+    assert resp.status_code == 422
@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+
+import httpx
+import pytest
+
+from app.integrations import http_client
+from app.integrations.http_client import (
+    HttpClientRegistry,
+    HttpRetryPolicy,
+    request_json,
+)
+
+
+def _client(responses: list[httpx.Response], seen: list[httpx.Request]) -> httpx.AsyncClient:
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(request)
+        return responses.pop(0)
+
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler), base_url="http://stub")
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    delays: list[float] = []
+
+    async def fake_sleep(delay: float) -> None:
+        delays.append(delay)
+
+    monkeypatch.setattr(http_client.asyncio, "sleep", fake_sleep)
+    return delays
+
+
+def test_registry_reuses_one_client_per_base_url():
+    registry = HttpClientRegistry()
+
+    async def run():
+        a = registry.get("http://a")
+        assert registry.get("http://a") is a
+        assert registry.get("http://b") is not a
+        await registry.aclose()
+        assert a.is_closed and len(registry) == 0
+        assert registry.get("http://a") is not a
+        await registry.aclose()
+
+    asyncio.run(run())
+
+
+def test_registry_keeps_one_client_per_loop_and_timeout():
+    registry = HttpClientRegistry()
+    other_loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=other_loop.run_forever, daemon=True)
+    thread.start()
+
+    async def on_other_loop():
+        return registry.get("http://a")
+
+    async def run():
+        a = registry.get("http://a")
+        b = asyncio.run_coroutine_threadsafe(on_other_loop(), other_loop).result()
+        assert b is not a
+        # switching back to the first loop reuses its client instead of replacing it
+        assert registry.get("http://a") is a
+        slow = registry.get("http://a", timeout=httpx.Timeout(30.0))
+        assert slow is not a and slow.timeout.read == 30.0
+        assert len(registry) == 3
+        await registry.aclose()
+        assert a.is_closed and b.is_closed and slow.is_closed
+
+    try:
+        asyncio.run(run())
+    finally:
+        other_loop.call_soon_threadsafe(other_loop.stop)
+        thread.join()
+        other_loop.close()
+
+
+def test_clients_of_closed_loops_are_dropped():
+    registry = HttpClientRegistry()
+
+    async def get():
+        return registry.get("http://a")
+
+    first = asyncio.run(get())
+    second = asyncio.run(get())
+    assert second is not first and len(registry) == 1
+    asyncio.run(registry.aclose())
+
+
+def test_retry_honors_retry_after(sleeps):
+    seen: list[httpx.Request] = []
+    client = _client(
+        [httpx.Response(429, headers={"Retry-After": "3"}), httpx.Response(200, json={"ok": 1})],
+        seen,
+    )
+    assert asyncio.run(request_json(client, "GET", "/x")) == {"ok": 1}
+    assert sleeps == [3.0]
+    assert len(seen) == 2
+
+
+def test_retry_backoff_is_jittered_and_capped(sleeps):
+    client = _client([httpx.Response(503) for _ in range(4)], [])
+    policy = HttpRetryPolicy(max_attempts=4, base_backoff_s=1.0, max_backoff_s=2.0)
+    with pytest.raises(RuntimeError):
+        asyncio.run(request_json(client, "GET", "/x", retry=policy))
+    # no sleep after the final attempt
+    assert len(sleeps) == 3
+    assert all(0 <= d <= cap for d, cap in zip(sleeps, (1.0, 2.0, 2.0)))
+
+
+def test_client_errors_are_not_retried(sleeps):
+    seen: list[httpx.Request] = []
+    client = _client([httpx.Response(404)], seen)
+    with pytest.raises(RuntimeError):
+        asyncio.run(request_json(client, "GET", "/missing"))
+    assert len(seen) == 1 and sleeps == []
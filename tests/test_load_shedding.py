@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import asyncio
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from app.core.load_shedding import AdaptiveConcurrencyLimiter, Overloaded
+from app.core.middleware import LoadSheddingMiddleware
+from app.integrations import metrics
+
+
+def test_aimd_cuts_once_per_window_and_grows_while_saturated():
+    async def scenario():
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=10, latency_target_s=0.1)
+        for _ in range(10):
+            await limiter.acquire()
+        for _ in range(10):
+            limiter.release(0.5)
+        # ten slow completions are one window: a single cut
+        assert limiter.limit == 9
+
+        for _ in range(9):
+            await limiter.acquire()
+        limiter.release(0.01)  # saturated and fast: grows
+        assert limiter._limit > 9
+        for _ in range(8):
+            limiter.release(0.01)
+        assert limiter.in_flight == 0
+
+    asyncio.run(scenario())
+
+
+def test_queue_hands_off_slots_and_sheds_when_full_or_late():
+    async def scenario():
+        limiter = AdaptiveConcurrencyLimiter(
+            initial_limit=1, max_queue=1, queue_interval_s=0.05
+        )
+        await limiter.acquire()
+        waiting = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0)
+        assert limiter.queue_depth == 1
+
+        with pytest.raises(Overloaded) as full:
+            await limiter.acquire()
+        assert full.value.reason == "queue_full"
+
+        limiter.release()
+        await waiting
+        assert (limiter.in_flight, limiter.queue_depth) == (1, 0)
+
+        with pytest.raises(Overloaded) as late:
+            await limiter.acquire()
+        assert late.value.reason == "queue_timeout"
+        assert limiter.queue_depth == 0
+        limiter.release()
+        assert limiter.in_flight == 0
+
+    asyncio.run(scenario())
+
+
+def test_standing_queue_gets_the_short_codel_timeout():
+    now = [0.0]
+
+    async def scenario():
+        limiter = AdaptiveConcurrencyLimiter(
+            initial_limit=1, queue_target_s=0.01, queue_interval_s=5.0, clock=lambda: now[0]
+        )
+        await limiter.acquire()
+        burst = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0)
+        now[0] = 6.0  # the queue has not drained for longer than the interval
+        with pytest.raises(Overloaded):
+            await limiter.acquire()
+        assert not burst.done()
+
+        limiter.release()
+        await burst
+        limiter.release()
+
+    asyncio.run(scenario())
+
+
+def test_middleware_sheds_with_503_but_keeps_health_in_priority_lane():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=1, max_queue=0)
+    app = FastAPI()
+    app.add_middleware(LoadSheddingMiddleware, limiter=limiter)
+    release = asyncio.Event()
+
+    @app.get("/slow")
+    async def slow():
+        await release.wait()
+        return {"ok": True}
+
+    @app.get("/health")
+    async def health():
+        return {"ok": True}
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            first = asyncio.create_task(client.get("/slow"))
+            while limiter.in_flight == 0:
+                await asyncio.sleep(0)
+            shed = await client.get("/slow")
+            health = await client.get("/health")
+            release.set()
+            return (await first), shed, health
+
+    first, shed, health = asyncio.run(scenario())
+    assert first.status_code == 200
+    assert shed.status_code == 503
+    assert shed.headers["Retry-After"] == "1"
+    assert shed.json()["reason"] == "queue_full"
+    assert health.status_code == 200
+    assert metrics._shed_limit.value == limiter.limit
+    assert metrics._shed_in_flight.value == 0
@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+import math
+import os
+
+import pytest
+
+from app.integrations import metrics
+from app.integrations.metrics import MetricsRegistry
+from app.integrations.metrics_mmap import ARCHIVE_NAME
+
+
+def test_text_exposition_for_labeled_metrics_and_histograms():
+    registry = MetricsRegistry()
+    responses = registry.counter("responses_total", "Responses", labelnames=("status",))
+    responses.labels("200").inc()
+    responses.labels("200").inc()
+    responses.labels('5"x').inc(3)
+    registry.gauge("depth", "Queue depth").set(7)
+    latency = registry.histogram("latency_ms", "Latency", bounds=(1.0, 10.0, math.inf))
+    for ms in (0.5, 3.0, 3.0, 50.0):
+        latency.observe(ms)
+
+    assert registry.render_text().splitlines() == [
+        "# HELP responses_total Responses",
+        "# TYPE responses_total counter",
+        'responses_total{status="200"} 2',
+        'responses_total{status="5\\"x"} 3',
+        "# HELP depth Queue depth",
+        "# TYPE depth gauge",
+        "depth 7",
+        "# HELP latency_ms Latency",
+        "# TYPE latency_ms histogram",
+        'latency_ms_bucket{le="1"} 1',
+        'latency_ms_bucket{le="10"} 3',
+        'latency_ms_bucket{le="+Inf"} 4',
+        "latency_ms_sum 56.5",
+        "latency_ms_count 4",
+    ]
+
+
+def test_registry_returns_the_same_series_and_rejects_conflicts():
+    registry = MetricsRegistry()
+    counter = registry.counter("hits_total")
+    assert registry.counter("hits_total") is counter
+    with pytest.raises(ValueError):
+        registry.gauge("hits_total")
+    labeled = registry.counter("by_route_total", labelnames=("route",))
+    with pytest.raises(ValueError):
+        labeled.labels("a", "b")
+
+
+def _fork_worker(work) -> tuple[int, int]:
+    # runs work() in a child that then waits, alive, until the returned fd closes
+    ready_r, ready_w = os.pipe()
+    release_r, release_w = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        try:
+            os.close(release_w)
+            work()
+            os.write(ready_w, b"1")
+            os.read(release_r, 1)
+        finally:
+            os._exit(0)
+    os.close(ready_w)
+    os.close(release_r)
+    assert os.read(ready_r, 1) == b"1"
+    os.close(ready_r)
+    return pid, release_w
+
+
+def test_forked_workers_aggregate_through_mmap_slabs(tmp_path):
+    registry = MetricsRegistry(str(tmp_path))
+    requests = registry.counter("requests_total")
+    responses = registry.counter("responses_total", labelnames=("status",))
+    latency = registry.histogram("latency_ms", bounds=(10.0, math.inf))
+    depth = registry.gauge("depth", multiprocess_mode="max")
+    requests.inc()
+
+    def work(n: int):
+        def run():
+            for _ in range(100):
+                requests.inc()
+                responses.labels("200" if n % 2 else "500").inc()
+                latency.observe(5.0 if n % 2 else 50.0)
+            depth.set(n)
+
+        return run
+
+    workers = [_fork_worker(work(n)) for n in range(4)]
+    try:
+        assert requests.value == 1  # children wrote to their own slabs
+        samples = registry.samples()
+        snapshot = {(s, tuple(labels.items())): v for _, _, s, labels, v in samples}
+        assert len(list(tmp_path.glob("metrics_*.db"))) == 5
+    finally:
+        for pid, release in workers:
+            os.write(release, b"1")
+            os.close(release)
+            os.waitpid(pid, 0)
+
+    assert snapshot[("requests_total", ())] == 401
+    assert snapshot[("responses_total", (("status", "200"),))] == 200
+    assert snapshot[("responses_total", (("status", "500"),))] == 200
+    assert snapshot[("latency_ms_bucket", (("le", "10"),))] == 200
+    assert snapshot[("latency_ms_count", ())] == 400
+    assert snapshot[("latency_ms_sum", ())] == 200 * 5.0 + 200 * 50.0
+    assert snapshot[("depth", ())] == 3
+
+    text = registry.render_text()
+    assert "requests_total 401" in text
+    assert 'latency_ms_bucket{le="+Inf"} 400' in text
+    # dead workers' counters live on in the archive; their gauges are gone
+    assert "depth 0" in text
+    assert sorted(p.name for p in tmp_path.glob("metrics_*")) == sorted(
+        [f"metrics_{os.getpid()}.db", ARCHIVE_NAME]
+    )
+    assert "requests_total 401" in registry.render_text()
+
+
+def test_timed_request_observes_into_its_histogram(monkeypatch):
+    monkeypatch.setattr(metrics, "_METRICS_ENABLED", True)
+    with metrics.timed_request("test_timed") as timer:
+        pass
+    histogram = metrics.registry.histogram("test_timed_request_latency_ms")
+    assert histogram.count == 1 and histogram.sum == timer.duration_ms
+
+
+def test_metrics_endpoint(test_client, monkeypatch):
+    assert test_client.get("/metrics").status_code == 404
+
+    monkeypatch.setattr(metrics, "_METRICS_ENABLED", True)
+    test_client.get("/health")
+    resp = test_client.get("/metrics")
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert "# TYPE http_request_latency_ms histogram" in resp.text
+    assert 'http_request_latency_ms_bucket{le="+Inf"}' in resp.text
+
+    snapshot = test_client.get("/metrics", params={"format": "json"}).json()
+    assert snapshot["http_requests_total"] >= 1
+    assert snapshot["http_request_latency_ms_count"] >= 1
+    assert "cache_coalesced_waiters_total" in snapshot
+    assert test_client.get("/metrics", params={"format": "xml"}).status_code == 422
+
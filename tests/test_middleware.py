@@ -0,0 +1,191 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import queue
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from starlette.testclient import TestClient
+
+from app.core.middleware import RateLimitMiddleware, RequestLoggingMiddleware
+from app.core.rate_limit import InMemoryRateLimitStore, RateLimit, RedisRateLimitStore
+from app.integrations import metrics
+from app.logging import JsonFormatter, _DroppingQueueHandler
+
+
+class _ListHandler(logging.Handler):
+    def __init__(self) -> None:
+        super().__init__()
+        self.records: list[logging.LogRecord] = []
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self.records.append(record)
+
+
+@pytest.fixture
+def access_log():
+    logger = logging.getLogger("test.access")
+    handler = _ListHandler()
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    yield logger, handler.records
+    logger.removeHandler(handler)
+
+
+def _app(logger: logging.Logger, **options) -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(RequestLoggingMiddleware, logger=logger, **options)
+
+    @app.get("/ok")
+    def ok():
+        return {"ok": True}
+
+    @app.get("/boom")
+    def boom():
+        raise RuntimeError("boom")
+
+    @app.get("/stream")
+    def stream():
+        return StreamingResponse(iter([b"a", b"b", b"c"]), media_type="text/plain")
+
+    return app
+
+
+def test_logs_structured_fields_and_passes_streams_through(access_log):
+    logger, records = access_log
+    client = TestClient(_app(logger))
+
+    assert client.get("/stream").content == b"abc"
+    assert client.get("/ok").json() == {"ok": True}
+
+    fields = [r.fields for r in records]
+    assert [(f["method"], f["path"], f["status"]) for f in fields] == [
+        ("GET", "/stream", 200),
+        ("GET", "/ok", 200),
+    ]
+    assert all(f["duration_ms"] > 0 for f in fields)
+
+
+def test_sampling_keeps_errors_and_slow_requests(access_log):
+    logger, records = access_log
+    client = TestClient(_app(logger, sample_rate=0.0), raise_server_exceptions=False)
+
+    client.get("/ok")
+    assert client.get("/boom").status_code == 500
+    assert [r.fields["path"] for r in records] == ["/boom"]
+
+    slow = TestClient(_app(logger, sample_rate=0.0, slow_ms=0.0))
+    slow.get("/ok")
+    assert [r.fields["path"] for r in records] == ["/boom", "/ok"]
+
+
+def test_feeds_request_metrics(access_log, monkeypatch):
+    monkeypatch.setattr(metrics, "_METRICS_ENABLED", True)
+    monkeypatch.setattr(metrics, "_request_count", metrics.Counter("http_requests_total"))
+    monkeypatch.setattr(metrics, "_latency", metrics.Histogram("http_request_latency_ms"))
+    client = TestClient(_app(access_log[0]))
+
+    client.get("/ok")
+    client.get("/ok")
+
+    assert metrics._request_count.value == 2
+    assert metrics._latency.count == 2 and metrics._latency.sum > 0
+
+
+def test_queue_handler_drops_instead_of_blocking():
+    handler = _DroppingQueueHandler(queue.Queue(maxsize=1))
+    logger = logging.getLogger("test.dropping")
+    logger.addHandler(handler)
+    logger.propagate = False
+    try:
+        logger.warning("one", extra={"fields": {"n": 1}})
+        logger.warning("two")
+    finally:
+        logger.removeHandler(handler)
+
+    assert handler.dropped == 1
+    record = handler.queue.get_nowait()
+    # unformatted until the listener thread picks it up
+    assert record.msg == "one" and record.fields == {"n": 1}
+    entry = json.loads(JsonFormatter().format(record))
+    assert (entry["msg"], entry["n"], entry["level"]) == ("one", 1, "WARNING")
+
+
+def test_gcra_store_allows_burst_then_spaces_requests_and_evicts_lru():
+    now = [1000.0]
+    store = InMemoryRateLimitStore(max_keys=2, clock=lambda: now[0])
+    limit = RateLimit(3, 30.0)
+
+    assert [store.check("a", limit) for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert store.check("a", limit) == pytest.approx(10.0)
+    now[0] += 10.0
+    assert store.check("a", limit) == 0.0
+    assert store.check("a", limit) == pytest.approx(10.0)
+
+    store.check("b", limit)
+    store.check("a", limit)  # denied, but still counts as recent use
+    store.check("c", limit)
+    assert len(store) == 2 and store.evictions == 1
+    assert store.check("a", limit) > 0  # "b" was evicted, not "a"
+    assert store.check("b", limit) == 0.0
+
+
+def test_rate_limit_middleware_returns_retry_after():
+    app = FastAPI()
+    app.add_middleware(
+        RateLimitMiddleware, max_requests=2, window_seconds=60, key_by=("api_key", "route")
+    )
+
+    @app.get("/ok")
+    def ok():
+        return {"ok": True}
+
+    @app.get("/health")
+    def health():
+        return {"ok": True}
+
+    client = TestClient(app)
+    key_a, key_b = {"X-API-Key": "a"}, {"X-API-Key": "b"}
+    assert [client.get("/ok", headers=key_a).status_code for _ in range(2)] == [200, 200]
+    limited = client.get("/ok", headers=key_a)
+    assert limited.status_code == 429
+    assert limited.headers["Retry-After"] == "30"
+    assert limited.json()["code"] == "RATE_LIMITED"
+    assert client.get("/ok", headers=key_b).status_code == 200
+    assert all(client.get("/health", headers=key_a).status_code == 200 for _ in range(5))
+
+    with pytest.raises(ValueError):
+        RateLimitMiddleware(app, key_by=("user",))
+
+
+def test_route_keys_use_the_route_template_not_the_url():
+    app = FastAPI()
+    app.add_middleware(RateLimitMiddleware, max_requests=1, key_by=("route",))
+
+    @app.get("/notes/{note_id}")
+    def note(note_id: int):
+        return {"id": note_id}
+
+    client = TestClient(app)
+    assert client.get("/notes/1").status_code == 200
+    assert client.get("/notes/2").status_code == 429
+    assert client.get("/nope/1").status_code == 404
+    assert client.get("/nope/2").status_code == 429
+
+
+def test_redis_store_fails_open():
+    redis = pytest.importorskip("redis")
+
+    class DownRedis:
+        def register_script(self, script):
+            async def run(keys, args):
+                raise redis.ConnectionError("down")
+
+            return run
+
+    store = RedisRateLimitStore(client=DownRedis())
+    assert asyncio.run(store.hit("ip", RateLimit(1, 1.0))) == 0.0
@@ -45,7 +45,7 @@ def test_search_notes(test_client, api_key_header):
     assert isinstance(data, list)
 
 
-def test_bulk_import_notes(test_client, api_key_header):  # UNUSED (demo)
+def test_bulk_import_notes(test_client, api_key_header):
     notes = [{"title": f"Import {i}", "body": f"Body {i}"} for i in range(5)]
     resp = test_client.post(
         "/notes/import",
@@ -54,3 +54,47 @@ def test_bulk_import_notes(test_client, api_key_header):  # UNUSED (demo)
     )
     data = assert_json_response(resp, 200)
     assert data.get("imported") == 5
+
+
+def test_bulk_import_ndjson_reports_failures(test_client, api_key_header):
+    lines = [
+        '{"title": "Stream 1", "body": "Body"}',
+        "not json",
+        '{"title": "", "body": "Body"}',
+        '{"title": "Stream 2", "body": "Body"}',
+    ]
+    resp = test_client.post(
+        "/notes/import?chunk_size=1",
+        content="\n".join(lines).encode(),
+        headers={**api_key_header, "Content-Type": "application/x-ndjson"},
+    )
+    data = assert_json_response(resp, 200)
+    assert data["imported"] == 2
+    assert data["failed"] == 2
+    assert [e["index"] for e in data["errors"]] == [1, 2]
+
+
+def test_bulk_import_rejects_non_array(test_client, api_key_header):
+    resp = test_client.post("/notes/import", json={"title": "x"}, headers=api_key_header)
+    assert resp.status_code == 400
+
+
+def test_bulk_import_caps_chunked_bodies(test_client, api_key_header, monkeypatch):
+    monkeypatch.setattr("app.api.routers.notes.MAX_UPLOAD_SIZE", 64)
+
+    def chunks(*parts: bytes):
+        yield from parts  # no Content-Length: sent chunked
+
+    array = test_client.post(
+        "/notes/import",
+        content=chunks(b'[{"title": "a", "body": "b"}', b', {"title": "c", "body": "' + b"x" * 64),
+        headers={**api_key_header, "Content-Type": "application/json"},
+    )
+    assert array.status_code == 413
+
+    line = test_client.post(
+        "/notes/import",
+        content=chunks(b'{"title": "a", "body": "', b"x" * 40, b"x" * 40),
+        headers={**api_key_header, "Content-Type": "application/x-ndjson"},
+    )
+    assert line.status_code == 413
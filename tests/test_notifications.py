@@ -0,0 +1,339 @@
+from __future__ import annotations
+
+import asyncio
+import dataclasses
+import json
+import threading
+import time
+
+import httpx
+import pytest
+from sqlalchemy import create_engine, text
+
+from app.core.rate_limit import TokenBucket
+from app.db.models import Base
+from app.integrations import slack
+from app.services import notification_service as ns
+from app.services.notification_service import (
+    MAX_BATCH_SIZE,
+    NotificationChannel,
+    NotificationScheduler,
+    dispatch_notifications,
+    send_bulk_notifications,
+)
+from app.services.notification_templates import CompiledTemplate, TemplateRegistry
+
+
+@pytest.fixture(autouse=True)
+def fast_policies(monkeypatch):
+    for channel, policy in ns.CHANNEL_POLICIES.items():
+        monkeypatch.setitem(
+            ns.CHANNEL_POLICIES, channel, dataclasses.replace(policy, backoff_s=0)
+        )
+        monkeypatch.setitem(ns._buckets, channel, TokenBucket(1_000_000, 1_000_000))
+    monkeypatch.delenv("SLACK_WEBHOOK_URL", raising=False)
+
+
+def _record(monkeypatch, channel: NotificationChannel, fn) -> None:
+    monkeypatch.setitem(ns._DISPATCHERS, channel, fn)
+
+
+def test_results_are_per_item(monkeypatch):
+    sent: list[tuple[str, str]] = []
+    _record(monkeypatch, NotificationChannel.EMAIL, lambda r, m: sent.append((r, m)))
+    _record(monkeypatch, NotificationChannel.SMS, lambda r, m: sent.append((r, m)))
+
+    results = asyncio.run(
+        dispatch_notifications(
+            [
+                {"channel": "email", "recipient": "a@x", "message": "hi"},
+                {"channel": "pager", "recipient": "b", "message": "hi"},
+                {"channel": "sms", "recipient": "+1", "message": "yo"},
+                {"channel": "email", "recipient": "c@x"},
+            ]
+        )
+    )
+
+    assert [r.status for r in results] == ["sent", "invalid", "sent", "invalid"]
+    assert [r.index for r in results] == [0, 1, 2, 3]
+    assert sorted(sent) == [("+1", "yo"), ("a@x", "hi")]
+
+
+def test_transient_failures_are_retried_and_permanent_ones_are_not(monkeypatch):
+    attempts = {"flaky@x": 0, "bad@x": 0}
+
+    def dispatch(recipient: str, message: str) -> None:
+        attempts[recipient] += 1
+        if recipient == "bad@x":
+            raise ValueError("rejected")
+        if attempts[recipient] < 2:
+            raise ConnectionError("reset")
+
+    _record(monkeypatch, NotificationChannel.EMAIL, dispatch)
+    flaky, bad = asyncio.run(
+        dispatch_notifications(
+            [
+                {"channel": "email", "recipient": "flaky@x", "message": "m"},
+                {"channel": "email", "recipient": "bad@x", "message": "m"},
+            ]
+        )
+    )
+
+    assert (flaky.status, flaky.attempts, flaky.error) == ("sent", 2, None)
+    assert (bad.status, bad.attempts) == ("failed", 1)
+    assert "rejected" in bad.error
+
+
+def test_per_channel_concurrency_is_capped(monkeypatch):
+    cap = ns.CHANNEL_POLICIES[NotificationChannel.SMS].concurrency
+    lock = threading.Lock()
+    state = {"now": 0, "peak": 0}
+
+    def dispatch(recipient: str, message: str) -> None:
+        with lock:
+            state["now"] += 1
+            state["peak"] = max(state["peak"], state["now"])
+        time.sleep(0.01)
+        with lock:
+            state["now"] -= 1
+
+    _record(monkeypatch, NotificationChannel.SMS, dispatch)
+    batch = [{"channel": "sms", "recipient": f"+{i}", "message": "m"} for i in range(cap * 4)]
+    results = asyncio.run(dispatch_notifications(batch))
+
+    assert all(r.status == "sent" for r in results)
+    assert 1 < state["peak"] <= cap
+
+
+def test_slack_messages_are_batched_per_recipient(monkeypatch):
+    posts: list[dict] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        posts.append(json.loads(request.content))
+        return httpx.Response(200, text="ok")  # what Slack webhooks actually answer
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    monkeypatch.setenv("SLACK_WEBHOOK_URL", "http://slack.test/hook")
+    monkeypatch.setattr(slack, "get_httpx_client", lambda: client)
+
+    batch_size = ns.CHANNEL_POLICIES[NotificationChannel.SLACK].batch_size
+    notifications = [
+        {"channel": "slack", "recipient": "ops", "message": f"m{i}"} for i in range(batch_size + 5)
+    ] + [{"channel": "slack", "recipient": "dev", "message": "d"}]
+    results = asyncio.run(dispatch_notifications(notifications))
+
+    assert all(r.status == "sent" and r.attempts == 1 for r in results)
+    assert sorted(len(p["text"].split("\n")) for p in posts) == [1, 5, batch_size]
+    assert {p["channel"] for p in posts} == {"#ops", "#dev"}
+
+
+def test_bulk_send_rejects_oversized_batches():
+    too_many = [{"channel": "email", "recipient": "a", "message": "m"}] * (MAX_BATCH_SIZE + 1)
+    with pytest.raises(ValueError):
+        asyncio.run(send_bulk_notifications(too_many))
+
+
+def test_compiled_template_renders_like_str_replace():
+    source = "Hi {{name}}, {{count}} new {{ spaced }} notes in {{name}}'s {{missing}} feed"
+    context = {"name": "Ada", "count": 3, " spaced ": "shared"}
+    expected = source
+    for key, value in context.items():
+        expected = expected.replace(f"{{{{{key}}}}}", str(value))
+
+    compiled = CompiledTemplate(source)
+    assert compiled.render(context) == expected
+    assert compiled.keys == ("name", "count", " spaced ", "name", "missing")
+    assert CompiledTemplate("no placeholders").render({"x": 1}) == "no placeholders"
+
+
+def test_template_registry_is_an_lru_of_compiled_templates():
+    registry = TemplateRegistry(max_compiled=2)
+    for name in "abc":
+        registry.register(name, f"{name}:{{{{v}}}}")
+
+    assert registry.render("a", {"v": 1}) == "a:1"
+    registry.get("b")
+    registry.get("a")
+    registry.get("c")  # evicts b, the least recently used
+    assert registry.stats == {"hits": 1, "misses": 3, "evictions": 1}
+    registry.get("b")
+    assert registry.stats["misses"] == 4
+
+    registry.register("a", "A={{v}}")
+    assert registry.render_many("a", [{"v": 1}, {"v": 2}]) == ["A=1", "A=2"]
+    with pytest.raises(KeyError):
+        registry.get("nope")
+
+
+def _templated(recipient: str, template: str, **context) -> dict:
+    return {"channel": "email", "recipient": recipient, "template": template, "context": context}
+
+
+def test_bulk_dispatch_renders_templates(monkeypatch):
+    sent: list[tuple[str, str]] = []
+    _record(monkeypatch, NotificationChannel.EMAIL, lambda r, m: sent.append((r, m)))
+    ns.templates.register("test_welcome", "Welcome, {{name}}!")
+
+    results = asyncio.run(
+        dispatch_notifications(
+            [
+                _templated("a@x", "test_welcome", name="Ada"),
+                _templated("b@x", "test_welcome", name="Bo"),
+                _templated("c@x", "test_missing"),
+            ]
+        )
+    )
+
+    assert [r.status for r in results] == ["sent", "sent", "invalid"]
+    assert "test_missing" in results[2].error
+    assert sorted(sent) == [("a@x", "Welcome, Ada!"), ("b@x", "Welcome, Bo!")]
+
+
+def test_token_bucket_refills_at_rate():
+    bucket = TokenBucket(rate_per_s=100.0, burst=2)
+    assert bucket.try_acquire() and bucket.try_acquire()
+    assert not bucket.try_acquire()
+
+    t0 = time.monotonic()
+    asyncio.run(bucket.acquire())
+    assert time.monotonic() - t0 < 0.5
+
+
+@pytest.fixture
+def scheduler(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/notifications.db")
+    Base.metadata.create_all(engine)
+    sched = NotificationScheduler(engine, horizon_s=0.5, refill_interval_s=0.05)
+    yield sched
+    sched.stop()
+    engine.dispose()
+
+
+def _wait_until(predicate, timeout: float = 5.0) -> None:
+    deadline = time.time() + timeout
+    while not predicate():
+        assert time.time() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def test_scheduled_notifications_fire_on_time(monkeypatch, scheduler):
+    fired: dict[str, float] = {}
+    _record(monkeypatch, NotificationChannel.EMAIL, lambda r, m: fired.setdefault(m, time.time()))
+    scheduler.start()
+
+    now = time.time()
+    due = {"overdue": now - 1, "soon": now + 0.2, "later": now + 0.3, "beyond": now + 1.0}
+    logs = {m: scheduler.schedule(NotificationChannel.EMAIL, "a@x", m, t) for m, t in due.items()}
+    _wait_until(lambda: all(scheduler.get(log.id).status == "sent" for log in logs.values()))
+
+    assert sorted(fired, key=fired.get) == ["overdue", "soon", "later", "beyond"]
+    for message in ("soon", "later", "beyond"):
+        assert due[message] <= fired[message] < due[message] + 0.5
+    row = scheduler.get(logs["soon"].id)
+    assert (row.attempts, row.error) == (1, None) and row.sent_at >= due["soon"]
+
+
+def test_cancelled_notifications_are_not_sent(monkeypatch, scheduler):
+    fired: list[str] = []
+    _record(monkeypatch, NotificationChannel.SMS, lambda r, m: fired.append(m))
+    scheduler.start()
+
+    keep = scheduler.schedule(NotificationChannel.SMS, "+1", "keep", time.time() + 0.2)
+    drop = scheduler.schedule(NotificationChannel.SMS, "+1", "drop", time.time() + 0.1)
+    assert scheduler.cancel(drop.id)
+    assert not scheduler.cancel(drop.id)
+    _wait_until(lambda: scheduler.get(keep.id).status == "sent")
+
+    assert fired == ["keep"]
+    assert scheduler.get(drop.id).status == "cancelled"
+
+
+def test_backlog_larger_than_the_heap_drains(monkeypatch, tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/backlog.db")
+    Base.metadata.create_all(engine)
+    sched = NotificationScheduler(engine, max_loaded=4, refill_interval_s=0.05)
+    _record(monkeypatch, NotificationChannel.EMAIL, lambda r, m: None)
+    now = time.time()
+    sched.schedule_many([(NotificationChannel.EMAIL, "a@x", str(i), now - i) for i in range(25)])
+    sched.start()
+    try:
+        _wait_until(lambda: sched.pending() == 0 and sched.stats["sent"] == 25)
+    finally:
+        sched.stop()
+        engine.dispose()
+
+
+def test_failed_sends_are_recorded(monkeypatch, scheduler):
+    def reject(recipient: str, message: str) -> None:
+        raise ValueError("bad number")
+
+    _record(monkeypatch, NotificationChannel.SMS, reject)
+    scheduler.start()
+    log = scheduler.schedule(NotificationChannel.SMS, "+0", "m", time.time())
+    _wait_until(lambda: scheduler.get(log.id).status == "failed")
+
+    row = scheduler.get(log.id)
+    assert row.sent_at is None and "bad number" in row.error
+
+
+def test_rows_left_sending_are_retried_on_start(monkeypatch, scheduler):
+    _record(monkeypatch, NotificationChannel.EMAIL, lambda r, m: None)
+    log = scheduler.schedule(NotificationChannel.EMAIL, "a@x", "m", time.time())
+    with scheduler._engine.begin() as conn:
+        conn.execute(text("UPDATE notification_log SET status = 'sending'"))
+
+    scheduler.start()
+    _wait_until(lambda: scheduler.get(log.id).status == "sent")
+
+
+def test_only_rows_with_a_lapsed_lease_are_reclaimed(monkeypatch, scheduler):
+    _record(monkeypatch, NotificationChannel.EMAIL, lambda r, m: None)
+    now = time.time()
+    lapsed = scheduler.schedule(NotificationChannel.EMAIL, "a@x", "lapsed", now)
+    held = scheduler.schedule(NotificationChannel.EMAIL, "a@x", "held", now)
+    with scheduler._engine.begin() as conn:
+        # another worker is still sending `held`
+        conn.execute(
+            text("UPDATE notification_log SET status = 'sending', locked_until = :t WHERE id = :i"),
+            [{"t": now - 1, "i": lapsed.id}, {"t": now + 60, "i": held.id}],
+        )
+
+    scheduler.start()
+    _wait_until(lambda: scheduler.get(lapsed.id).status == "sent")
+    time.sleep(0.2)  # a few more refills
+    assert scheduler.get(held.id).status == "sending"
+
+
+def test_a_failed_delivery_batch_is_logged_and_marked_failed(monkeypatch, scheduler, caplog):
+    async def broken(notifications):
+        raise RuntimeError("dispatcher bug")
+
+    monkeypatch.setattr(ns, "send_bulk_notifications", broken)
+    scheduler.start()
+    log = scheduler.schedule(NotificationChannel.EMAIL, "a@x", "m", time.time())
+    _wait_until(lambda: scheduler.get(log.id).status == "failed")
+
+    assert "dispatcher bug" in scheduler.get(log.id).error
+    assert "notification delivery failed" in caplog.text
+
+
+def test_schedule_api(test_client, api_key_header):
+    resp = test_client.post(
+        "/notifications/scheduled",
+        json={
+            "channel": "email",
+            "recipient": "a@x",
+            "message": "hello",
+            "send_at": "2999-01-01T00:00:00Z",
+        },
+        headers=api_key_header,
+    )
+    assert resp.status_code == 201
+    body = resp.json()
+    assert body["status"] == "scheduled" and body["send_at"] == 32472144000.0
+
+    url = f"/notifications/scheduled/{body['id']}"
+    assert test_client.get(url, headers=api_key_header).json()["id"] == body["id"]
+    assert test_client.delete(url, headers=api_key_header).status_code == 204
+    assert test_client.delete(url, headers=api_key_header).status_code == 409
+    assert test_client.get(url, headers=api_key_header).json()["status"] == "cancelled"
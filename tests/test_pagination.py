@@ -0,0 +1,37 @@
+from __future__ import annotations
+
+from app.core.pagination import decode_cursor, encode_cursor
+from tests.helpers import assert_json_response, create_test_note
+
+
+def test_cursor_roundtrip():
+    assert decode_cursor(encode_cursor(12345)) == 12345
+
+
+def test_offset_mode_reports_total_and_next_cursor(test_client, api_key_header):
+    for i in range(3):
+        create_test_note(test_client, title=f"Page {i}", body="Body")
+    resp = test_client.get("/notes/?page=1&size=2", headers=api_key_header)
+    data = assert_json_response(resp)
+    assert len(data) == 2
+    assert int(resp.headers["X-Total-Count"]) >= 3
+    assert decode_cursor(resp.headers["X-Next-Cursor"]) == data[-1]["id"]
+
+
+def test_cursor_mode_walks_descending_ids(test_client, api_key_header):
+    for i in range(5):
+        create_test_note(test_client, title=f"Cursor {i}", body="Body")
+    first = test_client.get("/notes/?size=2", headers=api_key_header)
+    cursor = first.headers["X-Next-Cursor"]
+
+    resp = test_client.get(f"/notes/?size=2&cursor={cursor}", headers=api_key_header)
+    page = assert_json_response(resp)
+    ids = [n["id"] for n in assert_json_response(first) + page]
+    assert ids == sorted(ids, reverse=True)
+    assert len(set(ids)) == 4
+    assert "X-Total-Count" not in resp.headers
+
+
+def test_invalid_cursor_is_rejected(test_client, api_key_header):
+    resp = test_client.get("/notes/?cursor=not-a-cursor", headers=api_key_header)
+    assert resp.status_code == 400
@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import uuid
+
+from sqlalchemy import create_engine, text
+
+from app.db import crud
+from app.db.models import Base
+from app.db.search import InvertedSearchIndex
+from app.schemas.notes import NoteCreate, NoteUpdate
+from tests.helpers import assert_json_response, create_test_note
+
+
+def test_search_ranks_title_hits_first(test_client, api_key_header):
+    word = f"kw{uuid.uuid4().hex[:10]}"
+    body_hit = create_test_note(test_client, title="Unrelated", body=f"mentions {word}")
+    title_hit = create_test_note(test_client, title=f"{word} in title", body="Nothing here")
+
+    resp = test_client.get(f"/notes/search?q={word}", headers=api_key_header)
+    ids = [n["id"] for n in assert_json_response(resp)]
+    assert ids == [title_hit["id"], body_hit["id"]]
+
+
+def test_search_last_term_is_prefix(test_client, api_key_header):
+    word = f"pf{uuid.uuid4().hex[:10]}"
+    note = create_test_note(test_client, title="Prefix", body=f"{word}suffix")
+
+    resp = test_client.get(f"/notes/search?q={word}", headers=api_key_header)
+    assert [n["id"] for n in assert_json_response(resp)] == [note["id"]]
+
+
+def test_index_follows_update_and_delete(test_client, db_session):
+    old, new = f"old{uuid.uuid4().hex[:10]}", f"new{uuid.uuid4().hex[:10]}"
+    note = crud.create_note(db_session, NoteCreate(title=old, body="body"))
+    assert [n.id for n in crud.search_notes(db_session, old)] == [note.id]
+
+    crud.update_note(db_session, note.id, NoteUpdate(title=new, body="body"))
+    assert crud.search_notes(db_session, old) == []
+    assert [n.id for n in crud.search_notes(db_session, new)] == [note.id]
+
+    crud.delete_note(db_session, note.id)
+    assert crud.search_notes(db_session, new) == []
+
+
+def test_search_ignores_query_syntax(test_client, api_key_header):
+    resp = test_client.get("/notes/search?q=%22%27%20OR%201%3D1%20--", headers=api_key_header)
+    assert isinstance(assert_json_response(resp), list)
+
+
+def test_inverted_index_fallback():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(
+            text("INSERT INTO notes (id, title, body) VALUES (:id, :title, :body)"),
+            [
+                {"id": 1, "title": "Café menu", "body": "coffee and cake"},
+                {"id": 2, "title": "Groceries", "body": "coffee beans, cafe au lait"},
+            ],
+        )
+    index = InvertedSearchIndex()
+    with engine.connect() as conn:
+        index.rebuild(conn)
+
+    assert index.search(None, "cafe", 10) == [1, 2]
+    assert index.search(None, "coffee cak", 10) == [1]
+
+    index.remove(None, 1)
+    assert index.search(None, "cafe", 10) == [2]
@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.exc import IntegrityError
+
+from app.db.models import Base, TaskJob
+from app.integrations import metrics
+from app.services.tasks import (
+    TASK_PRIORITY_HIGH,
+    TASK_PRIORITY_LOW,
+    TaskQueue,
+    TaskWorker,
+    task,
+)
+
+calls: list[tuple[str, dict]] = []
+
+
+@task("test_record")
+def _record(**kwargs):
+    calls.append(("record", kwargs))
+
+
+@task("test_flaky")
+def _flaky(fail_times: int = 1, **kwargs):
+    calls.append(("flaky", kwargs))
+    if sum(1 for name, _ in calls if name == "flaky") <= fail_times:
+        raise RuntimeError("transient")
+
+
+@pytest.fixture
+def queue(tmp_path):
+    calls.clear()
+    engine = create_engine(f"sqlite:///{tmp_path}/tasks.db")
+    Base.metadata.create_all(engine)
+    yield TaskQueue(engine, base_backoff_s=0)
+    engine.dispose()
+
+
+def _job(queue: TaskQueue, job_id: int) -> TaskJob:
+    with queue._engine.connect() as conn:
+        return conn.execute(select(TaskJob.__table__).where(TaskJob.id == job_id)).one()
+
+
+def _wait_until(predicate, timeout: float = 5.0) -> None:
+    deadline = time.time() + timeout
+    while not predicate():
+        assert time.time() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def test_claim_order_is_priority_then_run_at(queue):
+    low = queue.enqueue("test_record", priority=TASK_PRIORITY_LOW)
+    high = queue.enqueue("test_record", priority=TASK_PRIORITY_HIGH)
+    normal = queue.enqueue("test_record")
+    later = queue.enqueue("test_record", priority=TASK_PRIORITY_HIGH, run_at=time.time() + 60)
+
+    assert [job[0] for job in queue.claim(10)] == [high, normal, low]
+    assert queue.claim(10) == []
+    assert queue.depth() == 4 and _job(queue, later).status == "pending"
+
+
+def test_jobs_survive_restart_and_expired_leases(queue):
+    job_id = queue.enqueue("test_record", {"n": 1})
+    reopened = TaskQueue(queue._engine, lease_s=0)
+    assert [j[0] for j in reopened.claim(1)] == [job_id]
+    # the claimer "crashed": its zero-length lease has lapsed
+    time.sleep(0.01)
+    assert [(j[0], j[3]) for j in reopened.claim(1)] == [(job_id, 2)]
+
+
+def test_unique_key_skips_unfinished_duplicates(queue):
+    assert queue.enqueue("test_record", unique_key="once") is not None
+    assert queue.enqueue("test_record", unique_key="once") is None
+    with pytest.raises(KeyError):
+        queue.enqueue("no_such_task")
+
+
+def test_concurrent_enqueues_of_one_unique_key_queue_it_once(queue):
+    # one engine per "process", all starting at once
+    url = queue._engine.url
+    queues = [TaskQueue(create_engine(url, connect_args={"timeout": 5})) for _ in range(8)]
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        ids = list(pool.map(lambda q: q.enqueue("test_record", unique_key="boot"), queues))
+    assert len([i for i in ids if i is not None]) == 1
+    # the database itself refuses a second unfinished copy
+    with pytest.raises(IntegrityError), queue._engine.begin() as conn:
+        conn.execute(
+            insert(TaskJob),
+            {"name": "test_record", "priority": 5, "run_at": 0.0, "unique_key": "boot"},
+        )
+
+    job_id, _, _, attempts = queue.claim(1)[0]
+    assert queue.enqueue("test_record", unique_key="boot") is None  # still running
+    queue.complete(job_id, attempts)
+    assert queue.enqueue("test_record", unique_key="boot") is not None
+    for q in queues:
+        q._engine.dispose()
+
+
+def test_worker_retries_then_completes(queue):
+    worker = TaskWorker(queue, concurrency=2, poll_interval_s=0.05)
+    worker.start()
+    try:
+        ok = queue.enqueue("test_flaky", {"fail_times": 1})
+        dead = queue.enqueue("test_flaky", {"fail_times": 99}, max_attempts=2)
+        _wait_until(lambda: _job(queue, ok).status == "done")
+        _wait_until(lambda: _job(queue, dead).status == "failed")
+    finally:
+        worker.stop()
+    assert _job(queue, ok).attempts == 2
+    assert "transient" in _job(queue, dead).last_error
+    assert metrics._queue_depth.value == 0
+
+
+def test_interval_jobs_are_rescheduled(queue):
+    job_id = queue.enqueue("test_record", interval_s=3600)
+    (claimed,) = queue.claim(1)
+    assert queue.complete(job_id, claimed[3])
+    job = _job(queue, job_id)
+    assert job.status == "pending" and job.run_at > time.time() + 3500
+    assert claimed[0] == job_id
+
+
+def test_interval_job_that_exhausts_its_attempts_runs_next_interval(queue):
+    job_id = queue.enqueue("test_record", interval_s=3600, max_attempts=1)
+    (claimed,) = queue.claim(1)
+    assert queue.fail(job_id, claimed[3], "boom")
+    job = _job(queue, job_id)
+    assert (job.status, job.attempts, job.last_error) == ("pending", 0, "boom")
+    assert job.run_at > time.time() + 3500
+
+
+def test_a_stale_claim_cannot_finish_a_reclaimed_job(queue):
+    job_id = queue.enqueue("test_record")
+    reopened = TaskQueue(queue._engine, lease_s=0)
+    (stale,) = reopened.claim(1)
+    time.sleep(0.01)
+    (current,) = queue.claim(1)  # the first claimer's lease lapsed
+
+    assert not queue.complete(job_id, stale[3])
+    assert not queue.fail(job_id, stale[3], "late")
+    job = _job(queue, job_id)
+    assert (job.status, job.last_error) == ("running", None)
+    assert queue.complete(job_id, current[3])
+    assert _job(queue, job_id).status == "done"
@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+from fastapi import FastAPI
+from starlette.testclient import TestClient
+
+from app.core.events import EventBus
+from app.core.middleware import CorrelationIdMiddleware
+from app.core.tracing import Tracer, correlation_id, traced, tracer
+
+
+@pytest.fixture
+def tracing():
+    tracer.clear()
+    tracer.configure(enabled=True)
+    yield tracer
+    tracer.configure(enabled=False)
+    tracer.clear()
+
+
+def _events(t: Tracer) -> dict[str, dict]:
+    return {e["name"]: e for e in t.export_chrome()["traceEvents"]}
+
+
+def test_nested_spans_export_as_chrome_trace_events():
+    t = Tracer(enabled=True)
+    token = correlation_id.set("cid-1")
+    try:
+        with t.span("outer", cat="request"):
+            with t.span("inner", cat="db", table="notes"):
+                pass
+    finally:
+        correlation_id.reset(token)
+    with pytest.raises(ValueError):
+        with t.span("failing"):
+            raise ValueError()
+
+    events = _events(t)
+    outer, inner = events["outer"], events["inner"]
+    assert outer["ph"] == inner["ph"] == "X"
+    assert inner["args"]["parent_id"] == outer["args"]["span_id"]
+    assert outer["args"]["parent_id"] is None
+    assert inner["args"]["correlation_id"] == "cid-1"
+    assert inner["args"]["table"] == "notes"
+    assert outer["ts"] <= inner["ts"] and inner["dur"] <= outer["dur"]
+    assert events["failing"]["args"]["error"] == "ValueError"
+    assert "correlation_id" not in events["failing"]["args"]
+
+
+def test_ring_buffer_keeps_newest_spans_and_disabled_records_nothing():
+    t = Tracer(enabled=True, max_spans=3)
+    for i in range(5):
+        with t.span(f"s{i}"):
+            pass
+    assert [e["name"] for e in t.export_chrome()["traceEvents"]] == ["s2", "s3", "s4"]
+
+    t.configure(enabled=False)
+    with t.span("ignored"):
+        pass
+    assert len(t) == 3
+
+
+def test_traced_wraps_sync_and_async_functions(tracing):
+    @traced(cat="db")
+    def load(x):
+        return x * 2
+
+    @traced("custom", cat="service")
+    async def handle(x):
+        return load(x) + 1
+
+    assert asyncio.run(handle(20)) == 41
+    events = _events(tracing)
+    assert events["test_tracing.load"]["args"]["parent_id"] == events["custom"]["args"]["span_id"]
+    assert events["custom"]["cat"] == "service"
+
+    tracing.configure(enabled=False)
+    tracing.clear()
+    assert asyncio.run(handle(1)) == 3
+    assert len(tracing) == 0
+
+
+def test_correlation_id_middleware_binds_id_and_roots_spans(tracing):
+    app = FastAPI()
+    app.add_middleware(CorrelationIdMiddleware)
+
+    @app.get("/work")
+    async def work():
+        EventBus.emit("tracing_test_event")
+        return {"cid": correlation_id.get()}
+
+    client = TestClient(app)
+    resp = client.get("/work", headers={"X-Correlation-ID": "abc-123"})
+    assert resp.json() == {"cid": "abc-123"}
+    assert resp.headers["X-Correlation-ID"] == "abc-123"
+
+    events = _events(tracing)
+    root, emit = events["GET /work"], events["EventBus.emit"]
+    assert emit["args"]["parent_id"] == root["args"]["span_id"]
+    assert emit["args"]["correlation_id"] == "abc-123"
+    assert emit["args"]["event"] == "tracing_test_event"
+
+    generated = client.get("/work")
+    assert generated.headers["X-Correlation-ID"] == generated.json()["cid"]
+    assert correlation_id.get() is None
+
+
+def test_debug_trace_endpoint_dumps_request_spans(test_client, api_key_header, tracing):
+    resp = test_client.post(
+        "/notes", json={"title": "Traced", "body": "spans"}, headers=api_key_header
+    )
+    assert resp.status_code == 200
+    cid = resp.headers["X-Correlation-ID"]
+
+    dump = test_client.get("/debug/trace", headers=api_key_header).json()
+    spans = [e for e in dump["traceEvents"] if e["args"].get("correlation_id") == cid]
+    by_name = {e["name"]: e for e in spans}
+    assert {"POST /notes", "notes_services.create_note_async", "crud.create_note_async"} <= set(
+        by_name
+    )
+    assert (
+        by_name["crud.create_note_async"]["args"]["parent_id"]
+        == by_name["notes_services.create_note_async"]["args"]["span_id"]
+    )
+
+    tracing.configure(enabled=False)
+    assert test_client.get("/debug/trace", headers=api_key_header).status_code == 404
@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import uuid
+
+import pytest
+from starlette.testclient import TestClient
+
+from app.core.events import EventBus
+from app.integrations.webhook_pipeline import (
+    DeliveryDeduper,
+    WebhookEvent,
+    WebhookPipeline,
+    WebhookQueueFull,
+)
+from app.integrations.webhook_signing import sign_hmac_sha256
+from app.main import create_app
+
+URL = "/integrations/webhooks/demo"
+
+
+def _signed(payload: dict, delivery_id: str, prefixed: bool = False) -> tuple[bytes, dict]:
+    body = json.dumps(payload).encode()
+    sig = sign_hmac_sha256("dev-secret", body)
+    if prefixed:
+        return body, {"X-Hub-Signature-256": f"sha256={sig}", "X-GitHub-Delivery": delivery_id}
+    return body, {"X-Signature": sig, "X-Delivery-Id": delivery_id}
+
+
+@pytest.fixture
+def received():
+    events: list[dict] = []
+
+    def listener(**kwargs):
+        events.append(kwargs)
+
+    EventBus.on("webhook_received")(listener)
+    yield events
+    EventBus.off("webhook_received", listener)
+
+
+def test_signed_webhook_is_accepted_once(received):
+    delivery = uuid.uuid4().hex
+    body, headers = _signed({"n": 1}, delivery)
+
+    with TestClient(create_app()) as client:
+        first = client.post(URL, content=body, headers=headers)
+        again = client.post(URL, content=body, headers=headers)
+    # leaving the client runs shutdown, which drains the queue
+
+    assert first.status_code == 202
+    assert again.status_code == 200 and again.json()["duplicate"] is True
+    assert [e["delivery_id"] for e in received] == [delivery]
+    assert received[0]["payload"] == {"n": 1}
+
+
+def test_prefixed_signature_header(test_client):
+    body, headers = _signed({"n": 2}, uuid.uuid4().hex, prefixed=True)
+    assert test_client.post(URL, content=body, headers=headers).status_code == 202
+
+    headers["X-Hub-Signature-256"] = "sha256=" + "0" * 64
+    assert test_client.post(URL, content=body, headers=headers).status_code == 401
+
+
+def test_full_queue_pushes_back_and_allows_redelivery():
+    release = asyncio.Event()
+
+    async def slow(event: WebhookEvent) -> None:
+        await release.wait()
+
+    async def run():
+        pipeline = WebhookPipeline(slow, workers=1, max_queue=1)
+        await pipeline.start()
+        pipeline.submit(WebhookEvent("a", "t", b""))
+        await asyncio.sleep(0)  # worker takes "a"
+        pipeline.submit(WebhookEvent("b", "t", b""))
+        with pytest.raises(WebhookQueueFull):
+            pipeline.submit(WebhookEvent("c", "t", b""))
+        release.set()
+        await asyncio.sleep(0.01)
+        assert pipeline.submit(WebhookEvent("c", "t", b""))
+        await pipeline.stop()
+        return pipeline.stats
+
+    stats = asyncio.run(run())
+    assert stats["rejected"] == 1 and stats["processed"] == 3
+
+
+def test_burst_is_shared_by_every_worker():
+    in_flight: set[str] = set()
+    peak = [0]
+    release = asyncio.Event()
+
+    async def slow(event: WebhookEvent) -> None:
+        in_flight.add(event.delivery_id)
+        peak[0] = max(peak[0], len(in_flight))
+        await release.wait()
+        in_flight.discard(event.delivery_id)
+
+    async def run():
+        pipeline = WebhookPipeline(slow, workers=4, max_queue=10)
+        await pipeline.start()
+        for i in range(8):
+            pipeline.submit(WebhookEvent(str(i), "t", b""))
+        await asyncio.sleep(0.01)
+        assert peak[0] == 4 and pipeline.depth() == 4
+        release.set()
+        await pipeline.stop()
+        return pipeline.stats
+
+    assert asyncio.run(run())["processed"] == 8
+
+
+def test_deduper_forgets_oldest_past_capacity():
+    dedup = DeliveryDeduper(max_ids=2)
+    assert dedup.claim("a") and dedup.claim("b") and dedup.claim("c")
+    assert not dedup.claim("c")
+    assert dedup.claim("a")